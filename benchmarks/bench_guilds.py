@@ -0,0 +1,334 @@
+#!/usr/bin/env python
+# CroissantBot/benchmarks/bench_guilds.py
+
+"""Multi-guild audio load benchmark.
+
+Measures how the Music cog behaves as the number of guilds playing at the same time grows.
+Each guild gets a fake voice client that consumes ``AudioSource.read()`` every 20 ms,
+like discord.py's audio player does, from local fixture files. Neither Discord nor the
+network is used, but discord.py and FFmpeg must be installed.
+
+For each guild count, it reports:
+	- the CPU time of the player threads, per second of audio played
+	- the frame-read jitter: how late the player thread wakes up for each read
+	- the time to first frame: from the call to play() to the first frame read
+	- the gap between tracks: from the last frame of a track to the first one of the next
+
+Usage:
+	python -m benchmarks.bench_guilds [--guilds 1,5,10,25] [--tracks 3] [--duration 5]
+		[--fixtures DIR] [--opus]
+
+
+The MIT License (MIT)
+
+Copyright (c) 2021-present JulioLoayzaM
+
+Permission is hereby granted, free of charge, to any person obtaining a
+copy of this software and associated documentation files (the "Software"),
+to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense,
+and/or sell copies of the Software, and to permit persons to whom the
+Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+DEALINGS IN THE SOFTWARE.
+"""
+
+import argparse
+import asyncio
+import logging
+import statistics
+import subprocess
+import tempfile
+import threading
+import time
+
+from contextlib import asynccontextmanager
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Callable, Dict, List, Union
+
+import discord
+
+from cogs.ext.song import Song
+from cogs.ext.songqueue import SongQueue
+from cogs.music import Music
+
+
+# Same cadence as discord.py's AudioPlayer.
+DELAY = 0.02
+
+
+class TrackStats():
+	"""What a fake voice client measured while playing a track.
+	"""
+
+	def __init__(self, requested: float):
+		self.requested = requested
+		self.first_frame: Union[float, None] = None
+		self.last_frame: Union[float, None] = None
+		self.frames = 0
+		# How late the thread woke up for each read, in seconds.
+		self.lateness: List[float] = list()
+		self.cpu = 0.0
+
+
+class FakeVoiceClient():
+	"""Stands in for a discord.VoiceClient: plays sources in a thread on a 20 ms cadence.
+
+	The loop mirrors discord.py's AudioPlayer, without sending anything.
+	If an opus encoder is given, frames are encoded like the real player would.
+	"""
+
+	def __init__(self, encoder: Union[discord.opus.Encoder, None] = None):
+		self.encoder = encoder
+		self.tracks: List[TrackStats] = list()
+		self.finished = threading.Event()
+		self._end = threading.Event()
+		self._thread: Union[threading.Thread, None] = None
+
+	def is_connected(self) -> bool:
+		return True
+
+	def is_playing(self) -> bool:
+		return self._thread is not None and self._thread.is_alive() and not self._end.is_set()
+
+	def is_paused(self) -> bool:
+		return False
+
+	def stop(self):
+		self._end.set()
+
+	def play(self, source: discord.AudioSource, *, after: Callable = None):
+		stats = TrackStats(time.perf_counter())
+		self.tracks.append(stats)
+		self._end = threading.Event()
+		self._thread = threading.Thread(
+			target=self._run, args=(source, after, stats, self._end), daemon=True
+		)
+		self._thread.start()
+
+	def _run(
+		self,
+		source: discord.AudioSource,
+		after: Callable,
+		stats: TrackStats,
+		end: threading.Event
+	):
+		cpu_start = time.thread_time()
+		start = time.perf_counter()
+		wake = start
+		loops = 0
+
+		try:
+			while not end.is_set():
+				stats.lateness.append(max(0.0, time.perf_counter() - wake))
+
+				loops += 1
+				data = source.read()
+				if not data:
+					break
+
+				if self.encoder is not None:
+					self.encoder.encode(data, self.encoder.SAMPLES_PER_FRAME)
+
+				now = time.perf_counter()
+				if stats.first_frame is None:
+					stats.first_frame = now
+				stats.last_frame = now
+				stats.frames += 1
+
+				next_time = start + DELAY * loops
+				delay = max(0.0, DELAY + (next_time - time.perf_counter()))
+				wake = time.perf_counter() + delay
+				time.sleep(delay)
+		finally:
+			stats.cpu = time.thread_time() - cpu_start
+			source.cleanup()
+
+		count = len(self.tracks)
+		if after is not None:
+			after(None)
+		# If after didn't start another track, the queue is done.
+		if len(self.tracks) == count:
+			self.finished.set()
+
+
+def make_fixtures(directory: Path, tracks: int, duration: int) -> List[Path]:
+	"""Generate sine tones with FFmpeg, one per track, reused between runs.
+	"""
+
+	files = list()
+	for i in range(tracks):
+		path = directory / f"fixture_{i}_{duration}s.opus"
+		if not path.exists():
+			subprocess.run(
+				[
+					'ffmpeg', '-loglevel', 'error', '-f', 'lavfi',
+					'-i', f'sine=frequency={220 * (i + 1)}:duration={duration}',
+					'-ac', '2', '-ar', '48000', str(path)
+				],
+				check=True
+			)
+		files.append(path)
+
+	return files
+
+
+def make_context(gid: int, vc: FakeVoiceClient) -> SimpleNamespace:
+	"""The parts of a commands.Context used by Music.play_song.
+	"""
+
+	@asynccontextmanager
+	async def typing():
+		yield
+
+	async def send(*args, **kwargs):
+		pass
+
+	guild = SimpleNamespace(id=gid, voice_client=vc)
+	return SimpleNamespace(
+		message=SimpleNamespace(guild=guild),
+		author=SimpleNamespace(color=discord.Colour.default()),
+		typing=typing,
+		send=send
+	)
+
+
+async def run(music: Music, guilds: int, fixtures: List[Path], encode: bool) -> Dict:
+	"""Play every fixture in `guilds` guilds at the same time.
+	"""
+
+	clients: List[FakeVoiceClient] = list()
+
+	for gid in range(guilds):
+		encoder = discord.opus.Encoder() if encode else None
+		vc = FakeVoiceClient(encoder)
+		clients.append(vc)
+
+		queue = SongQueue()
+		for i, path in enumerate(fixtures):
+			queue.push(Song(f"fixture {i}", str(path), f"fixture://{i}", ""))
+
+		music.info[gid] = {
+			'channel': None,
+			'queue': queue,
+			'volume': 0.5,
+			'source': None,
+			'humans': 1
+		}
+
+	wall_start = time.perf_counter()
+	await asyncio.gather(
+		*(music.play_song(make_context(gid, vc)) for gid, vc in enumerate(clients))
+	)
+	while not all(vc.finished.is_set() for vc in clients):
+		await asyncio.sleep(0.1)
+	wall = time.perf_counter() - wall_start
+
+	for gid in range(guilds):
+		del music.info[gid]
+
+	cpu_per_second = list()
+	lateness = list()
+	first_frame = list()
+	gaps = list()
+	for vc in clients:
+		played = sum(track.frames for track in vc.tracks) * DELAY
+		cpu_per_second.append(sum(track.cpu for track in vc.tracks) / max(played, DELAY))
+		for previous, track in zip([None] + vc.tracks, vc.tracks):
+			if track.first_frame is None:
+				continue
+			lateness.extend(track.lateness)
+			first_frame.append(track.first_frame - track.requested)
+			if previous is not None and previous.last_frame is not None:
+				gaps.append(track.first_frame - previous.last_frame)
+
+	return {
+		'wall': wall,
+		'cpu': cpu_per_second,
+		'lateness': lateness,
+		'first_frame': first_frame,
+		'gaps': gaps
+	}
+
+
+def percentile(values: List[float], fraction: float) -> float:
+	"""Nearest-rank percentile, 0 for an empty list.
+	"""
+	if not values:
+		return 0.0
+	ordered = sorted(values)
+	return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def report(guilds: int, results: Dict):
+	"""Print one line of results, times in milliseconds.
+	"""
+
+	ms = 1000
+	print(
+		f"{guilds:>6}"
+		f"  {statistics.mean(results['cpu']) * 100:>9.2f}%"
+		f"  {percentile(results['lateness'], 0.50) * ms:>7.2f}"
+		f"  {percentile(results['lateness'], 0.99) * ms:>7.2f}"
+		f"  {percentile(results['first_frame'], 0.50) * ms:>7.1f}"
+		f"  {percentile(results['first_frame'], 0.99) * ms:>7.1f}"
+		f"  {percentile(results['gaps'], 0.50) * ms:>7.1f}"
+		f"  {percentile(results['gaps'], 0.99) * ms:>7.1f}"
+		f"  {results['wall']:>7.1f}s"
+	)
+
+
+async def main_async(args: argparse.Namespace):
+	"""Set up the cog and run every guild count.
+	"""
+
+	fixtures_dir = Path(args.fixtures) if args.fixtures else Path(tempfile.gettempdir())
+	fixtures_dir.mkdir(parents=True, exist_ok=True)
+	fixtures = make_fixtures(fixtures_dir, args.tracks, args.duration)
+
+	if args.opus and not discord.opus.is_loaded():
+		discord.opus._load_default()
+
+	logger = logging.getLogger('CroissantBot')
+	bot = SimpleNamespace(logger=logger, loop=asyncio.get_running_loop())
+	# No ytdl instance: the songs are created from the fixtures directly.
+	music = Music(bot, None, args.duration + 1, 60, 600, None)
+
+	print(
+		f"{args.tracks} tracks of {args.duration}s per guild,"
+		f" opus encoding {'on' if args.opus else 'off'}, times in ms"
+	)
+	print(
+		"guilds  cpu/audio-s  late-50  late-99  ttff-50  ttff-99   gap-50   gap-99     wall"
+	)
+	for guilds in args.guilds:
+		report(guilds, await run(music, guilds, fixtures, args.opus))
+
+
+def main():
+	parser = argparse.ArgumentParser(description='Multi-guild audio load benchmark')
+	parser.add_argument(
+		'--guilds', type=lambda value: [int(n) for n in value.split(',')],
+		default=[1, 5, 10, 25], help='comma-separated guild counts'
+	)
+	parser.add_argument('--tracks', type=int, default=3, help='tracks per guild')
+	parser.add_argument('--duration', type=int, default=5, help='seconds per track')
+	parser.add_argument('--fixtures', help='where to generate the fixture files')
+	parser.add_argument('--opus', action='store_true', help='encode frames with opus')
+	args = parser.parse_args()
+
+	asyncio.run(main_async(args))
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+# CroissantBot/benchmarks/bench_volume.py
+
+"""Micro-benchmark of the per-frame cost of the volume transforms.
+
+Compares :py:class:`cogs.ext.volume.VolumeScaler` with what discord.py's
+PCMVolumeTransformer does for each frame (``audioop.mul``), when available.
+Neither Discord nor FFmpeg is needed: the frames are random PCM.
+
+Usage:
+	python -m benchmarks.bench_volume [--frames N] [--repeat N]
+
+
+The MIT License (MIT)
+
+Copyright (c) 2021-present JulioLoayzaM
+
+Permission is hereby granted, free of charge, to any person obtaining a
+copy of this software and associated documentation files (the "Software"),
+to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense,
+and/or sell copies of the Software, and to permit persons to whom the
+Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+DEALINGS IN THE SOFTWARE.
+"""
+
+import argparse
+import os
+import time
+import warnings
+
+from typing import Callable, List
+
+from cogs.ext.volume import CHANNELS, SAMPLES_PER_FRAME, VolumeScaler
+
+
+# audioop is deprecated since Python 3.11 and removed in 3.13.
+with warnings.catch_warnings():
+	warnings.simplefilter('ignore', DeprecationWarning)
+	try:
+		import audioop
+	except ImportError:
+		audioop = None
+
+
+FRAME_SIZE = SAMPLES_PER_FRAME * CHANNELS * 2
+
+
+def make_frames(count: int) -> List[bytes]:
+	"""Generate random 20 ms PCM frames.
+	"""
+	return [os.urandom(FRAME_SIZE) for _ in range(count)]
+
+
+def bench(transform: Callable[[bytes], bytes], frames: List[bytes], repeat: int) -> float:
+	"""Time a transform over all frames, keep the best run.
+
+	Returns:
+		The best time per frame, in microseconds.
+	"""
+
+	best = float('inf')
+	for _ in range(repeat):
+		start = time.perf_counter()
+		for frame in frames:
+			transform(frame)
+		best = min(best, time.perf_counter() - start)
+
+	return best / len(frames) * 1e6
+
+
+def main():
+	"""Run the benchmark and print the per-frame cost of each transform.
+	"""
+
+	parser = argparse.ArgumentParser(description='Per-frame cost of the volume transforms')
+	parser.add_argument(
+		'--frames', type=int, default=3000, help='frames per run (50 per second)'
+	)
+	parser.add_argument('--repeat', type=int, default=5, help='runs per transform')
+	args = parser.parse_args()
+
+	frames = make_frames(args.frames)
+	results = dict()
+
+	if audioop is not None:
+		results['audioop.mul (PCMVolumeTransformer)'] = bench(
+			lambda frame: audioop.mul(frame, 2, 0.5), frames, args.repeat
+		)
+
+	unchanged = VolumeScaler(1.0)
+	results['VolumeScaler, volume unchanged'] = bench(unchanged.scale, frames, args.repeat)
+
+	steady = VolumeScaler(0.5)
+	results['VolumeScaler, steady volume'] = bench(steady.scale, frames, args.repeat)
+
+	ramping = VolumeScaler(0.5)
+
+	def ramp(frame: bytes) -> bytes:
+		# Changes the volume on every frame, the worst case.
+		ramping.volume = 0.2 if ramping.volume > 0.3 else 0.8
+		return ramping.scale(frame)
+
+	results['VolumeScaler, ramp on every frame'] = bench(ramp, frames, args.repeat)
+
+	width = max(len(name) for name in results)
+	print(f"{args.frames} frames of {FRAME_SIZE} bytes, best of {args.repeat} runs")
+	for name, cost in results.items():
+		print(f"{name:<{width}}  {cost:8.2f} us/frame")
+
+	if audioop is None:
+		print("audioop is not available in this Python version, skipped.")
+
+
+if __name__ == '__main__':
+	main()
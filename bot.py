@@ -245,10 +245,7 @@ class CroissantBot(commands.Bot):
 			return False
 
 		try:
-			async with aiofiles.open(self._tw_file, mode='r') as file:
-				content = await file.read()
-
-			ids = json.loads(content) if content else dict()
+			ids = await twitch.tw_ids.load()
 
 		except IOError as ioe:
 			logger.error(f"Could not open \"{self._tw_file}\"")
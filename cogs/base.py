@@ -34,6 +34,7 @@ from discord import Colour, Embed
 from discord.ext import commands
 
 from bot import CroissantBot
+from cogs.ext.statefile import flush_all
 
 GREEN   = '\033[92m'
 WARNING = '\033[93m'
@@ -64,7 +65,8 @@ class Base(commands.Cog):
     async def close_connection(self, ctx: commands.Context):
         """Closes the bot's connection.
 
-        Cleans the voice clients, the requests session and logging.
+        Cleans the voice clients, the requests session and logging,
+        and saves the pending changes of the state files.
         Checks if the cogs are enabled, since failing to get the cog is not an error
         if they are not enabled.
         """
@@ -103,6 +105,12 @@ class Base(commands.Cog):
             else:
                 logger.error("Couldn't get cog 'Meme'.")
 
+        # Save the state files changed in the last seconds.
+        if await flush_all():
+            logger.debug(f"{GREEN}Saved the state files.{ENDC}")
+        else:
+            logger.error("Couldn't save every state file.")
+
         # Close the global aiohttp.ClientSession
         await bot._session.close()
         logger.debug(f"{WARNING}Closed:{ENDC} Global aiohttp.ClientSession.")
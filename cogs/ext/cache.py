@@ -0,0 +1,189 @@
+# CroissantBot/cogs/ext/cache.py
+
+"""
+A bounded in-process cache.
+
+This module provides :py:class:`LRUCache`, used by
+:py:class:`music_db.MusicDatabaseConnection` to avoid querying the database for
+playlists that didn't change.
+
+A value read from the database may be outdated by the time the query returns,
+if the entry was invalidated meanwhile: get the entry's :py:meth:`LRUCache.generation`
+before the query and pass it to :py:meth:`LRUCache.put`, which then ignores the value.
+"""
+
+# The MIT License (MIT)
+
+# Copyright (c) 2021-present JulioLoayzaM
+
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+from collections import OrderedDict
+from typing import Any, Dict, Hashable
+
+
+# Returned by LRUCache.get on a miss, None being a value that can be cached.
+MISSING = object()
+
+
+class LRUCache():
+	"""
+	A mapping holding at most `maxsize` entries, the least recently used one is
+	evicted to make room for a new one.
+
+	:param maxsize:
+		The maximum number of entries. 0 or less disables the cache: nothing is stored.
+	:type maxsize: int
+	"""
+
+	def __init__(self, maxsize: int = 1024):
+		self.maxsize = maxsize
+		self.data: OrderedDict = OrderedDict()
+		self.hits = 0
+		self.misses = 0
+		self.evictions = 0
+		# Values not stored because their entry was invalidated while they were read.
+		self.stale = 0
+		# Increased by each invalidation.
+		self.tick = 0
+		# key -> tick of its last invalidation, for at most max(maxsize, 1) keys.
+		self.generations: OrderedDict = OrderedDict()
+		# At least the tick of the invalidations no longer in generations.
+		self.floor = 0
+
+	def __len__(self) -> int:
+		return len(self.data)
+
+	def __contains__(self, key: Hashable) -> bool:
+		return key in self.data
+
+	def get(self, key: Hashable, default: Any = MISSING) -> Any:
+		"""
+		Get an entry and mark it as the most recently used.
+
+		:param key:
+			The key of the entry.
+		:type key: Hashable
+
+		:param default:
+			What to return if there is no entry, :py:data:`MISSING` by default.
+
+		:return:
+			The cached value, or `default`.
+		"""
+
+		try:
+			value = self.data[key]
+		except KeyError:
+			self.misses += 1
+			return default
+
+		self.data.move_to_end(key)
+		self.hits += 1
+		return value
+
+	def generation(self, key: Hashable) -> int:
+		"""
+		Get a number that changes whenever the entry is invalidated, by :py:meth:`pop`
+		or :py:meth:`clear`. It may also change without an invalidation.
+
+		:param key:
+			The key of the entry.
+		:type key: Hashable
+
+		:return:
+			The generation of the entry.
+		:rtype: int
+		"""
+		return self.generations.get(key, self.floor)
+
+	def put(self, key: Hashable, value: Any, generation: int = None):
+		"""
+		Add or replace an entry, evicting the least recently used one if the cache is full.
+
+		:param key:
+			The key of the entry.
+		:type key: Hashable
+
+		:param value:
+			The value to cache.
+
+		:param generation:
+			The :py:meth:`generation` of the entry when the value was read:
+			if it changed since, the value may be outdated and isn't stored.
+		:type generation: int
+		"""
+
+		if self.maxsize <= 0:
+			return
+
+		if generation is not None and generation != self.generation(key):
+			self.stale += 1
+			return
+
+		self.data[key] = value
+		self.data.move_to_end(key)
+
+		while len(self.data) > self.maxsize:
+			self.data.popitem(last=False)
+			self.evictions += 1
+
+	def pop(self, key: Hashable) -> Any:
+		"""
+		Remove an entry, if cached.
+
+		:param key:
+			The key of the entry.
+		:type key: Hashable
+
+		:return:
+			The removed value, :py:data:`MISSING` if there was none.
+		"""
+
+		self.tick += 1
+		self.generations[key] = self.tick
+		self.generations.move_to_end(key)
+		while len(self.generations) > max(self.maxsize, 1):
+			_, tick = self.generations.popitem(last=False)
+			self.floor = max(self.floor, tick)
+
+		return self.data.pop(key, MISSING)
+
+	def clear(self):
+		"""
+		Remove every entry.
+		"""
+		self.tick += 1
+		self.floor = self.tick
+		self.generations.clear()
+		self.data.clear()
+
+	def stats(self) -> Dict[str, int]:
+		"""
+		:return:
+			The number of entries, hits, misses, evictions and stale values.
+		:rtype: Dict[str, int]
+		"""
+		return {
+			'size': len(self.data),
+			'hits': self.hits,
+			'misses': self.misses,
+			'evictions': self.evictions,
+			'stale': self.stale
+		}
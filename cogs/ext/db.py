@@ -4,8 +4,19 @@
 For all database connection needs.
 
 This module provides :py:class:`DatabaseConnection`:
-	The base connection class with three methods: :py:func:`DatabaseConnection.connect`,
-	:py:func:`DatabaseConnection.close` and :py:func:`DatabaseConnection.is_connected`.
+	The base connection class, backed by a pool of connections. It can connect to a
+	database (:py:func:`DatabaseConnection.connect`), close the pool
+	(:py:func:`DatabaseConnection.close`), check whether it is connected
+	(:py:func:`DatabaseConnection.is_connected`) and run queries on a pooled connection
+	(:py:func:`DatabaseConnection.execute`, :py:func:`DatabaseConnection.fetch`, ...).
+	A background task checks the health of the connections and reconnects when needed.
+
+	Pending schema migrations are applied before the pool is created, see
+	:py:func:`DatabaseConnection.migrate`.
+	Named statements registered in :py:attr:`DatabaseConnection.statements` are prepared
+	on each new connection and run with :py:func:`DatabaseConnection.run_prepared`.
+
+And :py:class:`PoolStats`, the usage metrics of the pool.
 """
 
 # The MIT License (MIT)
@@ -33,6 +44,15 @@ This module provides :py:class:`DatabaseConnection`:
 import asyncio
 import asyncpg
 import logging
+import time
+
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Dict, Iterable, List, Union
+
+from cogs.ext.migrations import Migration
+# Defined with the interface of the playlists, still importable from here.
+from cogs.ext.music_store import DbInsertError, NotFoundError  # noqa: F401
+from cogs.ext.statements import StatementRegistry, fingerprint
 
 
 # Colours for logs.
@@ -43,11 +63,73 @@ ENDC = '\033[0m'
 RED = '\033[91m'
 FAIL = RED
 
+# Seconds to wait for a free connection before giving up.
+ACQUIRE_TIMEOUT = 10.0
+# Seconds to wait for the health check query.
+HEALTH_CHECK_TIMEOUT = 5.0
+# Seconds to wait for the connections in use to be released when closing.
+CLOSE_TIMEOUT = 10.0
+# Key of the advisory lock held while migrating, so that two bots starting at the
+# same time don't apply the same migration twice.
+MIGRATION_LOCK = 0x43524f49
+# Queries taking longer than this many seconds are logged, by default.
+SLOW_QUERY_THRESHOLD = 0.2
+
+
+class PoolStats():
+	"""
+	Usage metrics of a connection pool.
+	"""
+
+	def __init__(self):
+		# Connections currently acquired, and the most acquired at once.
+		self.in_use = 0
+		self.peak_in_use = 0
+		# Number of acquisitions and time spent waiting for a connection, in seconds.
+		self.acquisitions = 0
+		self.total_wait = 0.0
+		self.max_wait = 0.0
+		self.timeouts = 0
+		self.queries = 0
+		self.errors = 0
+		self.health_checks = 0
+		self.health_check_failures = 0
+		# Health checks that found no free connection: the pool is busy, not broken.
+		self.health_checks_busy = 0
+		self.reconnects = 0
+
+	def to_dict(self) -> Dict[str, Union[int, float]]:
+		"""
+		:return:
+			The metrics, with the average wait time added. Times are in milliseconds.
+		:rtype: Dict[str, Union[int, float]]
+		"""
+
+		average = self.total_wait / self.acquisitions if self.acquisitions else 0.0
+
+		return {
+			'in_use': self.in_use,
+			'peak_in_use': self.peak_in_use,
+			'acquisitions': self.acquisitions,
+			'average_wait_ms': round(average * 1000, 2),
+			'max_wait_ms': round(self.max_wait * 1000, 2),
+			'timeouts': self.timeouts,
+			'queries': self.queries,
+			'errors': self.errors,
+			'health_checks': self.health_checks,
+			'health_check_failures': self.health_check_failures,
+			'health_checks_busy': self.health_checks_busy,
+			'reconnects': self.reconnects
+		}
+
 
 class DatabaseConnection():
 	"""
 	The base class to represent a connection to a PostgreSQL database.
 
+	Queries run on connections taken from an :py:class:`asyncpg.Pool`, so that commands
+	from different guilds don't wait for each other.
+
 	:param logger_name:
 		The name of the logger to be used by the connection.
 	:type logger_name: str
@@ -61,9 +143,20 @@ class DatabaseConnection():
 			The name of the logger to be used by the connection.
 		:type logger_name: str
 		"""
-		self.conn: asyncpg.Connection = None
+		self.pool: Union[asyncpg.Pool, None] = None
 		self.logger = logging.getLogger(logger_name)
 		self.db_name = ""
+		self.stats = PoolStats()
+		# The arguments of asyncpg.create_pool, kept to reconnect.
+		self.pool_args: Dict[str, Any] = dict()
+		self.health_task: Union[asyncio.Task, None] = None
+		self.reconnect_lock = asyncio.Lock()
+		# Prepared on each connection opened by the pool, see init_connection.
+		self.statements = StatementRegistry()
+		# Applied by connect before creating the pool.
+		self.migrations: List[Migration] = list()
+		# In seconds, see record_query. 0 or less disables the log.
+		self.slow_query_threshold = SLOW_QUERY_THRESHOLD
 
 	async def connect(
 		self,
@@ -72,10 +165,15 @@ class DatabaseConnection():
 		password: str,
 		database: str,
 		loop: asyncio.AbstractEventLoop = None,
-		port: str = None
-	) -> asyncpg.Connection:
+		port: str = None,
+		min_size: int = 1,
+		max_size: int = 10
+	):
 		"""
-		Connect to a database using the credentials provided. Stores connection in `self.conn`.
+		Create a pool of connections to a database using the credentials provided.
+		The pool is stored in `self.pool`, and opens `min_size` connections right away.
+		The pending migrations of `self.migrations` are applied first, so that the
+		statements prepared by the pool match the schema.
 
 		:param host:
 			The hostname, usually 'localhost'.
@@ -101,32 +199,146 @@ class DatabaseConnection():
 		:param port:
 			The port to use, usually 5432. None by default.
 		:type port: str
+
+		:param min_size:
+			The number of connections kept open, 1 by default.
+		:type min_size: int
+
+		:param max_size:
+			The maximum number of connections open at once, 10 by default.
+		:type max_size: int
+
+		:raises Exception:
+			Raised when the pool couldn't be created.
 		"""
 
+		self.pool_args = {
+			'host': host,
+			'port': port,
+			'user': user,
+			'password': password,
+			'database': database,
+			'loop': loop,
+			'min_size': min_size,
+			'max_size': max(min_size, max_size),
+			'init': self.init_connection
+		}
+
+		self.db_name = database
+
+		if self.migrations:
+			try:
+				conn = await asyncpg.connect(
+					host=host, port=port, user=user, password=password, database=database,
+					loop=loop
+				)
+			except Exception as error:
+				raise Exception("Couldn't connect to the database.", error)
+
+			try:
+				await self.migrate(conn, self.migrations)
+			except Exception as error:
+				raise Exception("Couldn't migrate the database.", error)
+			finally:
+				await conn.close()
+
 		try:
-			conn = await asyncpg.connect(
-				host=host, port=port, user=user, password=password, database=database, loop=loop
-			)
+			self.pool = await asyncpg.create_pool(**self.pool_args)
 		except Exception as error:
 			raise Exception("Couldn't connect to the database.", error)
 
-		self.conn = conn
+		self.logger.debug(
+			f"{GREEN}Connected to database:{ENDC} {database},"
+			f" pool of {min_size} to {max_size} connections."
+		)
 
-		self.db_name = database
+	async def migrate(
+		self,
+		conn: asyncpg.Connection,
+		migrations: List[Migration]
+	) -> List[int]:
+		"""
+		Apply the migrations that weren't applied yet, in order.
+		Each one runs in its own transaction, along with its row in ``schema_version``:
+		a migration that fails leaves the schema as it was before it.
+		An advisory lock keeps other connections from migrating at the same time.
+
+		:param conn:
+			The connection to use.
+		:type conn: asyncpg.Connection
+
+		:param migrations:
+			All the migrations, by increasing version.
+		:type migrations: List[Migration]
+
+		:raises asyncpg.PostgresError:
+			Raised when a migration fails, the following ones aren't applied.
+
+		:return:
+			The versions applied.
+		:rtype: List[int]
+		"""
+
+		await conn.execute("SELECT pg_advisory_lock($1);", MIGRATION_LOCK)
+		try:
+			await conn.execute("""
+				CREATE TABLE IF NOT EXISTS schema_version (
+					version    integer     PRIMARY KEY,
+					name       text        NOT NULL,
+					applied_at timestamptz NOT NULL DEFAULT now()
+				);
+			""")
+
+			rows = await conn.fetch("SELECT version FROM schema_version;")
+			current = {row.get('version') for row in rows}
+
+			applied: List[int] = list()
+			for migration in migrations:
+				if migration.version in current:
+					continue
+
+				async with conn.transaction():
+					await conn.execute(migration.read())
+					await conn.execute(
+						"INSERT INTO schema_version(version, name) VALUES ($1, $2);",
+						migration.version,
+						migration.name
+					)
+
+				applied.append(migration.version)
+				self.logger.info(
+					f"Applied migration {migration.version} ({migration.name})"
+					f" to the database {self.db_name}."
+				)
+		finally:
+			await conn.execute("SELECT pg_advisory_unlock($1);", MIGRATION_LOCK)
+
+		return applied
+
+	async def init_connection(self, conn: asyncpg.Connection):
+		"""
+		Called by the pool for each new connection, prepares the registered statements.
 
-		self.logger.debug(f"{GREEN}Connected to database:{ENDC} {database}.")
+		:param conn:
+			The new connection.
+		:type conn: asyncpg.Connection
+		"""
+		await self.statements.prepare_all(conn)
 
 	async def close(self) -> bool:
 		"""
-		Closes the connection to the database.
+		Stops the health checks and closes the connections to the database.
 
 		:return:
 			True if the connection was closed, False if there was no connection to close.
 		:rtype: bool
 		"""
 
-		if self.conn is not None:
-			await self.conn.close()
+		self.stop_health_check()
+
+		if self.pool is not None:
+			pool, self.pool = self.pool, None
+			await self.close_pool(pool)
 			self.logger.debug(f"{WARNING}Closed:{ENDC} connection to the database {self.db_name}.")
 			return True
 
@@ -144,22 +356,484 @@ class DatabaseConnection():
 			True if there's a connection, False otherwise.
 		:rtype: bool
 		"""
+		return self.pool is not None
+
+	@asynccontextmanager
+	async def acquire(self) -> AsyncIterator[asyncpg.Connection]:
+		"""
+		Take a connection from the pool for the duration of an `async with` block,
+		for example to run several queries in a transaction.
+
+		:raises asyncpg.InterfaceError:
+			Raised when not connected.
+
+		:raises asyncio.TimeoutError:
+			Raised when no connection was free after :py:data:`ACQUIRE_TIMEOUT` seconds.
+		"""
+
+		if self.pool is None:
+			raise asyncpg.InterfaceError(f"Not connected to the database '{self.db_name}'.")
+
+		# Kept to release the connection to it, even if reconnect replaced it meanwhile.
+		pool = self.pool
+		stats = self.stats
+		start = time.perf_counter()
+		try:
+			conn = await pool.acquire(timeout=ACQUIRE_TIMEOUT)
+		except asyncio.TimeoutError:
+			stats.timeouts += 1
+			raise
+
+		waited = time.perf_counter() - start
+		stats.acquisitions += 1
+		stats.total_wait += waited
+		stats.max_wait = max(stats.max_wait, waited)
+		stats.in_use += 1
+		stats.peak_in_use = max(stats.peak_in_use, stats.in_use)
+
+		try:
+			yield conn
+		finally:
+			stats.in_use -= 1
+			await pool.release(conn)
+
+	async def run(
+		self,
+		method: str,
+		query: str,
+		*args,
+		conn: asyncpg.Connection = None,
+		timeout: float = None,
+		name: str = None
+	) -> Any:
+		"""
+		Run a query with one of asyncpg's query methods, timed like the statements of
+		:py:attr:`statements`.
+
+		:param method:
+			The name of the method: 'execute', 'executemany', 'fetch', 'fetchval'
+			or 'fetchrow'.
+		:type method: str
+
+		:param query:
+			The query to run.
+		:type query: str
+
+		:param args:
+			The query's arguments. For 'executemany', the list of the arguments
+			of each run.
+
+		:param conn:
+			The connection to use, for example in a transaction.
+			If None, a connection is taken from the pool for this query only.
+		:type conn: asyncpg.Connection
+
+		:param timeout:
+			The query's timeout in seconds, None to wait indefinitely.
+		:type timeout: float
+
+		:param name:
+			The name its duration is recorded under. If None, its :py:func:`fingerprint`.
+		:type name: str
+
+		:return:
+			What the method returns.
+		"""
+
+		if conn is None:
+			async with self.acquire() as conn:
+				return await self.run(
+					method, query, *args, conn=conn, timeout=timeout, name=name
+				)
+
+		return await self.timed(
+			getattr(conn, method)(query, *args, timeout=timeout), query, len(args), name
+		)
+
+	async def timed(
+		self,
+		call: Awaitable,
+		query: str,
+		arg_count: int,
+		name: str = None
+	) -> Any:
+		"""
+		Await a call to the database, counted and timed like the queries of :py:func:`run`.
+		For the calls that aren't a single query, such as a COPY.
+
+		:param call:
+			The call, not awaited yet.
+		:type call: Awaitable
+
+		:param query:
+			The SQL of the query, or what the call does, to get its :py:func:`fingerprint`.
+		:type query: str
+
+		:param arg_count:
+			The number of arguments of the call.
+		:type arg_count: int
+
+		:param name:
+			The name its duration is recorded under. If None, its :py:func:`fingerprint`.
+		:type name: str
+
+		:return:
+			What the call returns.
+		"""
+
+		self.stats.queries += 1
+
+		start = time.perf_counter()
+		error = False
+		try:
+			return await call
+		except Exception:
+			error = True
+			self.stats.errors += 1
+			raise
+		finally:
+			self.record_query(name, query, arg_count, time.perf_counter() - start, error)
+
+	async def run_prepared(
+		self,
+		method: str,
+		name: str,
+		*args,
+		conn: asyncpg.Connection = None,
+		timeout: float = None
+	) -> Any:
+		"""
+		Run a statement of :py:attr:`statements`, prepared on the connection used.
+		Its call and duration are counted in the registry.
+
+		:param method:
+			The name of the method of the prepared statement: 'fetch', 'fetchval'
+			or 'fetchrow'. Use 'fetch' for statements that don't return rows.
+		:type method: str
+
+		:param name:
+			The name of the statement.
+		:type name: str
+
+		:param args:
+			The statement's arguments.
+
+		:param conn:
+			The connection to use, for example in a transaction.
+			If None, a connection is taken from the pool for this statement only.
+		:type conn: asyncpg.Connection
+
+		:param timeout:
+			The statement's timeout in seconds, None to wait indefinitely.
+		:type timeout: float
+
+		:return:
+			What the method returns.
+		"""
+
+		if conn is None:
+			async with self.acquire() as conn:
+				return await self.run_prepared(method, name, *args, conn=conn, timeout=timeout)
+
+		self.stats.queries += 1
+		statement = await self.statements.get(conn, name)
+
+		start = time.perf_counter()
+		error = False
+		try:
+			return await getattr(statement, method)(*args, timeout=timeout)
+		except Exception:
+			error = True
+			self.stats.errors += 1
+			raise
+		finally:
+			query = self.statements.queries[name]
+			self.record_query(name, query, len(args), time.perf_counter() - start, error)
+
+	def record_query(
+		self,
+		name: Union[str, None],
+		query: str,
+		arg_count: int,
+		elapsed: float,
+		error: bool
+	):
+		"""
+		Count a query in :py:attr:`statements`, and log it if it took longer than
+		:py:attr:`slow_query_threshold` seconds. Only its fingerprint and number of
+		arguments are logged, the values may be private.
+
+		:param name:
+			The name of the query, None to use its fingerprint.
+		:type name: Union[str, None]
+
+		:param query:
+			The SQL of the query.
+		:type query: str
+
+		:param arg_count:
+			The number of arguments of the query.
+		:type arg_count: int
+
+		:param elapsed:
+			How long the query took, in seconds.
+		:type elapsed: float
+
+		:param error:
+			Whether the query failed.
+		:type error: bool
+		"""
+
+		shape = fingerprint(query)
+		slow = 0 < self.slow_query_threshold < elapsed
+
+		self.statements.record(name or shape, elapsed, error, slow)
+
+		if slow:
+			self.logger.warning(
+				f"Slow query{f' {name}' if name else ''}: {elapsed * 1000:.1f} ms,"
+				f" {arg_count} parameters: {shape}"
+			)
+
+	async def execute(self, query: str, *args, **kwargs) -> str:
+		"""
+		Run a query, see :py:func:`run`.
+
+		:return:
+			The status of the last command.
+		:rtype: str
+		"""
+		return await self.run('execute', query, *args, **kwargs)
+
+	async def fetch(self, query: str, *args, **kwargs) -> List[asyncpg.Record]:
+		"""
+		Run a query and get all the rows, see :py:func:`run`.
+
+		:return:
+			The rows.
+		:rtype: List[asyncpg.Record]
+		"""
+		return await self.run('fetch', query, *args, **kwargs)
+
+	async def fetchval(self, query: str, *args, **kwargs) -> Any:
+		"""
+		Run a query and get the first column of the first row, see :py:func:`run`.
+
+		:return:
+			The value, None if there are no rows.
+		"""
+		return await self.run('fetchval', query, *args, **kwargs)
+
+	async def fetchrow(self, query: str, *args, **kwargs) -> Union[asyncpg.Record, None]:
+		"""
+		Run a query and get the first row, see :py:func:`run`.
+
+		:return:
+			The row, None if there are no rows.
+		:rtype: Union[asyncpg.Record, None]
+		"""
+		return await self.run('fetchrow', query, *args, **kwargs)
+
+	async def executemany(self, query: str, args: Iterable[tuple], **kwargs):
+		"""
+		Run a query once per tuple of arguments, see :py:func:`run`.
+		"""
+		await self.run('executemany', query, args, **kwargs)
+
+	async def copy_records_to_table(
+		self,
+		table: str,
+		records: Iterable[tuple],
+		columns: List[str],
+		conn: asyncpg.Connection,
+		timeout: float = None,
+		name: str = None
+	) -> str:
+		"""
+		Copy rows to a table with COPY, timed like the queries of :py:func:`run`.
+
+		:param table:
+			The name of the table.
+		:type table: str
+
+		:param records:
+			The rows, in the order of `columns`.
+		:type records: Iterable[tuple]
+
+		:param columns:
+			The columns to fill.
+		:type columns: List[str]
+
+		:param conn:
+			The connection to use, the table may only exist in its transaction.
+		:type conn: asyncpg.Connection
+
+		:param timeout:
+			The timeout in seconds, None to wait indefinitely.
+		:type timeout: float
+
+		:param name:
+			The name its duration is recorded under. If None, its :py:func:`fingerprint`.
+		:type name: str
+
+		:return:
+			The status of the COPY.
+		:rtype: str
+		"""
+
+		call = conn.copy_records_to_table(
+			table, records=records, columns=columns, timeout=timeout
+		)
+		query = f"COPY {table} ({', '.join(columns)}) FROM STDIN;"
+		return await self.timed(call, query, len(columns), name)
+
+	async def check_health(self) -> bool:
+		"""
+		Check that the database answers, reconnect if it doesn't. If no connection is free
+		after :py:data:`ACQUIRE_TIMEOUT` seconds, the pool is only busy: the connections
+		in use are working, reconnecting would kill their queries.
+
+		:return:
+			True if the database answered, False otherwise.
+		:rtype: bool
+		"""
+
+		self.stats.health_checks += 1
+		acquired = False
+
+		try:
+			async with self.acquire() as conn:
+				acquired = True
+				await self.run(
+					'fetchval', "SELECT 1;",
+					conn=conn, timeout=HEALTH_CHECK_TIMEOUT, name='health_check'
+				)
+			return True
+
+		except asyncio.TimeoutError as error:
+			if not acquired:
+				self.stats.health_checks_busy += 1
+				self.logger.warning(
+					f"No connection to the database {self.db_name} was free for the health"
+					" check: it is busy, not reconnecting."
+				)
+				return False
+			failure = error
+
+		except Exception as error:
+			failure = error
+
+		self.stats.health_check_failures += 1
+		self.logger.warning(f"The database {self.db_name} didn't answer, reconnecting.")
+		self.logger.debug(f"Health check:\n{failure}")
+		await self.reconnect()
+		return False
+
+	async def reconnect(self) -> bool:
+		"""
+		Replace the pool with a new one, the connections of the old one are closed once
+		released, see :py:meth:`close_pool`. Concurrent calls only reconnect once.
+
+		:return:
+			True if the new pool was created, False otherwise: the old one is kept.
+		:rtype: bool
+		"""
 
-		if self.conn is None:
+		if not self.pool_args:
 			return False
-		else:
-			return not self.conn.is_closed()
 
+		old_pool = self.pool
 
-class DbInsertError(Exception):
-	"""
-	Raised when an error related to INSERT occurs.
-	"""
-	pass
+		async with self.reconnect_lock:
+			if self.pool is not old_pool:
+				# Another call already reconnected.
+				return True
 
+			try:
+				self.pool = await asyncpg.create_pool(**self.pool_args)
+			except Exception as error:
+				self.logger.error(f"Couldn't reconnect to the database {self.db_name}.")
+				self.logger.debug(f"Unexpected exception:\n{error}")
+				return False
 
-class NotFoundError(Exception):
-	"""
-	Raised when an error related to a missing result occurs.
-	"""
-	pass
+		self.stats.reconnects += 1
+		self.logger.info(f"Reconnected to the database {self.db_name}.")
+
+		# The queries still running on the old pool, such as an import, can finish.
+		if old_pool is not None:
+			await self.close_pool(old_pool)
+
+		return True
+
+	async def close_pool(self, pool: asyncpg.Pool):
+		"""
+		Close a pool once its connections are released. Those still in use after
+		:py:data:`CLOSE_TIMEOUT` seconds are closed anyway, their queries fail.
+
+		:param pool:
+			The pool to close.
+		:type pool: asyncpg.Pool
+		"""
+
+		try:
+			await asyncio.wait_for(pool.close(), CLOSE_TIMEOUT)
+		except asyncio.TimeoutError:
+			self.logger.warning("Connections still in use, closing them anyway.")
+			pool.terminate()
+
+	def start_health_check(self, interval: float, loop: asyncio.AbstractEventLoop = None):
+		"""
+		Check the health of the connection every `interval` seconds, in the background.
+
+		:param interval:
+			The time between two checks, in seconds. 0 or less disables the checks.
+		:type interval: float
+
+		:param loop:
+			The loop to use. If None, uses the running loop.
+		:type loop: asyncio.AbstractEventLoop
+		"""
+
+		self.stop_health_check()
+
+		if interval <= 0:
+			return
+
+		loop = loop or asyncio.get_event_loop()
+		self.health_task = loop.create_task(self.health_check_loop(interval))
+
+	def stop_health_check(self):
+		"""
+		Stop the background health checks, if running.
+		"""
+		if self.health_task is not None:
+			self.health_task.cancel()
+			self.health_task = None
+
+	async def health_check_loop(self, interval: float):
+		"""
+		Run :py:func:`check_health` every `interval` seconds until cancelled.
+
+		:param interval:
+			The time between two checks, in seconds.
+		:type interval: float
+		"""
+		while True:
+			await asyncio.sleep(interval)
+			if self.pool is not None:
+				await self.check_health()
+
+	def pool_stats(self) -> Dict[str, Union[int, float]]:
+		"""
+		Get the usage metrics of the pool.
+
+		:return:
+			The metrics of :py:class:`PoolStats`, and the pool's size limits.
+		:rtype: Dict[str, Union[int, float]]
+		"""
+
+		stats = self.stats.to_dict()
+		stats['min_size'] = self.pool_args.get('min_size', 0)
+		stats['max_size'] = self.pool_args.get('max_size', 0)
+
+		return stats
@@ -0,0 +1,271 @@
+# CroissantBot/cogs/ext/idle.py
+
+"""
+Timers used by the :py:mod:`music` cog to leave idle voice channels.
+
+This module provides:
+	:py:class:`TimerWheel`:
+		A hashed timer wheel: scheduling, cancelling and expiring a timer are O(1).
+	:py:class:`IdleScheduler`:
+		Drives a :py:class:`TimerWheel` from the event loop and calls back when a timer expires.
+"""
+
+# The MIT License (MIT)
+
+# Copyright (c) 2021-present JulioLoayzaM
+
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import asyncio
+import logging
+import math
+
+from typing import Awaitable, Callable, Dict, Hashable, List, Union
+
+
+class TimerWheel():
+	"""
+	A hashed timer wheel.
+
+	Each timer is stored in the slot where it expires, along with the number of full
+	turns of the wheel left before it does. Advancing the wheel only looks at one slot.
+
+	:param slots:
+		The number of slots in the wheel. 64 by default.
+	:type slots: int
+	"""
+
+	def __init__(self, slots: int = 64):
+		"""
+		Initializes an empty wheel.
+
+		:param slots:
+			The number of slots in the wheel. 64 by default.
+		:type slots: int
+		"""
+		if slots < 1:
+			raise ValueError("A timer wheel needs at least one slot.")
+
+		# Each slot maps a key to the number of turns left before it expires.
+		self.slots: List[Dict[Hashable, int]] = [dict() for _ in range(slots)]
+		self.current = 0
+		# Maps a key to the slot it's stored in.
+		self.timers: Dict[Hashable, int] = dict()
+
+	def schedule(self, key: Hashable, ticks: int):
+		"""
+		Schedule a timer, replacing any timer with the same key.
+
+		:param key:
+			The key identifying the timer.
+		:type key: Hashable
+
+		:param ticks:
+			In how many ticks the timer expires. Values lower than 1 are treated as 1.
+		:type ticks: int
+		"""
+		self.cancel(key)
+
+		ticks = max(1, ticks)
+		size = len(self.slots)
+		slot = (self.current + ticks) % size
+
+		self.slots[slot][key] = (ticks - 1) // size
+		self.timers[key] = slot
+
+	def cancel(self, key: Hashable) -> bool:
+		"""
+		Cancel a timer.
+
+		:param key:
+			The key identifying the timer.
+		:type key: Hashable
+
+		:return:
+			True if a timer was cancelled, False if there was no such timer.
+		:rtype: bool
+		"""
+		slot = self.timers.pop(key, None)
+		if slot is None:
+			return False
+
+		del self.slots[slot][key]
+		return True
+
+	def is_scheduled(self, key: Hashable) -> bool:
+		"""
+		Check whether a timer is pending.
+
+		:param key:
+			The key identifying the timer.
+		:type key: Hashable
+
+		:return:
+			True if the timer is pending, False otherwise.
+		:rtype: bool
+		"""
+		return key in self.timers
+
+	def clear(self):
+		"""
+		Cancel all timers.
+		"""
+		for slot in self.slots:
+			slot.clear()
+		self.timers.clear()
+
+	def advance(self) -> List[Hashable]:
+		"""
+		Move the wheel forward by one tick.
+
+		:return:
+			The keys of the timers that expired during this tick.
+		:rtype: List[Hashable]
+		"""
+		self.current = (self.current + 1) % len(self.slots)
+		slot = self.slots[self.current]
+
+		expired: List[Hashable] = list()
+		for key, turns in slot.items():
+			if turns == 0:
+				expired.append(key)
+			else:
+				slot[key] = turns - 1
+
+		for key in expired:
+			del slot[key]
+			del self.timers[key]
+
+		return expired
+
+	def __len__(self) -> int:
+		return len(self.timers)
+
+
+class IdleScheduler():
+	"""
+	Runs a :py:class:`TimerWheel` on the event loop, calling `callback` with the key of
+	every timer that expires.
+
+	:param callback:
+		The coroutine function to call with the key of an expired timer.
+	:type callback: Callable[[Hashable], Awaitable[None]]
+
+	:param logger_name:
+		The name of the logger used to report errors raised by the callback.
+	:type logger_name: str
+
+	:param tick:
+		The duration of a tick in seconds, 1 by default.
+	:type tick: float
+
+	:param slots:
+		The number of slots in the wheel, 64 by default.
+	:type slots: int
+	"""
+
+	def __init__(
+		self,
+		callback: Callable[[Hashable], Awaitable[None]],
+		logger_name: str,
+		tick: float = 1.0,
+		slots: int = 64
+	):
+		self.callback = callback
+		self.logger = logging.getLogger(logger_name)
+		self.tick = tick
+		self.wheel = TimerWheel(slots)
+		self.task: Union[asyncio.Task, None] = None
+
+	def schedule(self, key: Hashable, delay: float):
+		"""
+		Schedule a timer, replacing any timer with the same key.
+
+		:param key:
+			The key identifying the timer.
+		:type key: Hashable
+
+		:param delay:
+			In how many seconds the timer expires, rounded up to the next tick.
+		:type delay: float
+		"""
+		self.wheel.schedule(key, math.ceil(delay / self.tick))
+
+	def cancel(self, key: Hashable) -> bool:
+		"""
+		Cancel a timer.
+
+		:return:
+			True if a timer was cancelled, False if there was no such timer.
+		:rtype: bool
+		"""
+		return self.wheel.cancel(key)
+
+	def is_scheduled(self, key: Hashable) -> bool:
+		"""
+		Check whether a timer is pending.
+		"""
+		return self.wheel.is_scheduled(key)
+
+	def clear(self):
+		"""
+		Cancel all timers.
+		"""
+		self.wheel.clear()
+
+	def start(self, loop: asyncio.AbstractEventLoop = None):
+		"""
+		Start advancing the wheel, if it isn't already running.
+
+		:param loop:
+			The loop to run on. If None, uses the running loop.
+		:type loop: asyncio.AbstractEventLoop
+		"""
+		if self.task is not None and not self.task.done():
+			return
+
+		loop = loop or asyncio.get_event_loop()
+		self.task = loop.create_task(self.run())
+
+	def stop(self):
+		"""
+		Stop advancing the wheel. Pending timers are kept.
+		"""
+		if self.task is not None:
+			self.task.cancel()
+			self.task = None
+
+	async def run(self):
+		"""
+		Advance the wheel once per tick. The deadlines are anchored to the loop's clock,
+		so the time spent in callbacks doesn't make the wheel drift.
+		"""
+		loop = asyncio.get_event_loop()
+		deadline = loop.time()
+
+		while True:
+			deadline += self.tick
+			await asyncio.sleep(max(0.0, deadline - loop.time()))
+
+			for key in self.wheel.advance():
+				try:
+					await self.callback(key)
+				except Exception as error:
+					self.logger.error(f"Idle timer {key} failed.")
+					self.logger.debug(f"Unexpected exception:\n{error}")
@@ -0,0 +1,378 @@
+# CroissantBot/cogs/ext/journal.py
+
+"""
+A JSON state saved as a snapshot and a journal of the changes made since.
+
+Each change appends one line to the journal instead of rewriting the whole state:
+after :py:data:`COMPACT_AFTER` changes, the state is saved to a new snapshot with
+:py:func:`statefile.write_atomic` and the journal is emptied. The snapshot is never left
+half-written, and a change cut short by a crash is ignored when loading.
+
+This module provides :py:class:`FavouritesStore`, used by the Favourites cog to save
+the list of each user in its own journal.
+"""
+
+# The MIT License (MIT)
+
+# Copyright (c) 2021-present JulioLoayzaM
+
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import aiofiles
+import asyncio
+import json
+import logging
+import os
+import shutil
+import weakref
+
+from typing import Any, Dict, List
+
+from cogs.ext.cache import LRUCache, MISSING
+from cogs.ext.statefile import write_atomic
+
+
+# The number of changes journaled before they are compacted into a new snapshot.
+COMPACT_AFTER = 100
+# The number of lists of favourites kept in memory by a FavouritesStore.
+CACHED_LISTS = 256
+
+
+class Journal():
+	"""
+	A JSON state saved in the file `path`, and the changes made since in `path`.journal,
+	one JSON object per line. Subclasses define the initial state and how a change
+	is applied to it.
+
+	The snapshot holds the state and the number of the last change it includes,
+	so that the changes of a journal that couldn't be emptied after writing
+	a snapshot aren't applied twice.
+
+	:param path:
+		The path of the snapshot.
+	:type path: str
+
+	:param logger_name:
+		The name of the logger to use.
+	:type logger_name: str
+
+	:param compact_after:
+		The number of changes journaled before a new snapshot is written.
+	:type compact_after: int
+	"""
+
+	def __init__(self, path: str, logger_name: str, compact_after: int = COMPACT_AFTER):
+		self.path = path
+		self.logger = logging.getLogger(logger_name)
+		self.journal_path = f"{path}.journal"
+		self.compact_after = compact_after
+		self.state: Any = None
+		# The number of the last change applied to the state.
+		self.seq = 0
+		# The number of changes in the journal.
+		self.entries = 0
+		# Whether the journal ends with a change cut short, the next one can't follow it.
+		self.torn = False
+		self.lock = asyncio.Lock()
+
+	def empty(self) -> Any:
+		"""
+		:return:
+			The state before any change.
+		"""
+		return dict()
+
+	def check(self, state: Any, change: Dict[str, Any]):
+		"""
+		Make sure a change can be applied, before it is journaled.
+
+		:param state:
+			The current state.
+
+		:param change:
+			The change.
+		:type change: Dict[str, Any]
+
+		:raises ValueError:
+			Raised when the change can't be applied.
+		"""
+		pass
+
+	def apply(self, state: Any, change: Dict[str, Any]) -> Any:
+		"""
+		Apply a change to the state. Must only depend on the state and the change,
+		the journal being replayed when loading.
+
+		:param state:
+			The current state, modified in place.
+
+		:param change:
+			The change.
+		:type change: Dict[str, Any]
+
+		:return:
+			Whatever the change should return to the caller of :py:meth:`append`.
+		"""
+		raise NotImplementedError
+
+	async def load(self) -> Any:
+		"""
+		Read the snapshot and apply the changes of the journal.
+		Missing files are considered empty. Doesn't write anything.
+
+		:return:
+			The state.
+		"""
+
+		async with self.lock:
+
+			state, seq = self.empty(), 0
+			try:
+				async with aiofiles.open(self.path, 'r') as file:
+					content = await file.read()
+			except FileNotFoundError:
+				content = ''
+
+			if content:
+				snapshot = json.loads(content)
+				if isinstance(snapshot, dict) and set(snapshot) == {'seq', 'state'}:
+					state, seq = snapshot['state'], snapshot['seq']
+				else:
+					# Saved before the journal existed.
+					state = snapshot
+
+			try:
+				async with aiofiles.open(self.journal_path, 'r') as file:
+					lines = await file.readlines()
+			except FileNotFoundError:
+				lines = list()
+
+			entries = 0
+			torn = False
+			for line in lines:
+				try:
+					change = json.loads(line)
+				except ValueError:
+					# Only the last write can be cut short.
+					torn = True
+					break
+
+				entries += 1
+				if change['seq'] > seq:
+					self.apply(state, change)
+					seq = change['seq']
+
+			self.state, self.seq = state, seq
+			self.entries = entries
+			self.torn = torn
+
+			return state
+
+	async def append(self, change: Dict[str, Any]) -> Any:
+		"""
+		Journal a change then apply it, :py:meth:`load` must have been called.
+		Compacts the journal when it's long enough: if that fails,
+		the change is still saved and compacting is tried again after the next one.
+
+		:param change:
+			The change, a JSON object.
+		:type change: Dict[str, Any]
+
+		:raises ValueError:
+			Raised by :py:meth:`check` when the change can't be applied.
+
+		:return:
+			What :py:meth:`apply` returned.
+		"""
+
+		async with self.lock:
+
+			self.check(self.state, change)
+
+			if self.torn:
+				await self._compact()
+
+			change = {'seq': self.seq + 1, **change}
+			async with aiofiles.open(self.journal_path, 'a') as file:
+				await file.write(json.dumps(change) + '\n')
+
+			self.seq += 1
+			self.entries += 1
+			result = self.apply(self.state, change)
+
+			if self.entries >= self.compact_after:
+				try:
+					await self._compact()
+				except Exception as e:
+					self.logger.error(f"Could not compact \"{self.journal_path}\".")
+					self.logger.debug(f"Unexpected exception:\n{e}")
+
+			return result
+
+	async def compact(self):
+		"""
+		Save the state to a new snapshot and empty the journal.
+		"""
+		async with self.lock:
+			await self._compact()
+
+	async def _compact(self):
+		snapshot = json.dumps({'seq': self.seq, 'state': self.state})
+		await write_atomic(self.path, snapshot)
+		async with aiofiles.open(self.journal_path, 'w'):
+			pass
+		self.entries = 0
+		self.torn = False
+
+
+class FavouritesJournal(Journal):
+	"""
+	The list of favourite songs of a user.
+	The changes are the addition of a song at the end of the list,
+	``{'op': 'add', 'song': song}``, and the removal of a song by its index,
+	``{'op': 'remove', 'index': index, 'url': url}``. The URL, if given, must be the one of
+	the song at that index, so that a list changed since it was read isn't changed.
+	The songs are dictionaries with the title, URL and thumbnail.
+	"""
+
+	def empty(self) -> List[Dict[str, str]]:
+		return list()
+
+	def check(self, songs: List[Dict[str, str]], change: Dict[str, Any]):
+		if change['op'] == 'remove':
+			index = change['index']
+			if not 0 <= index < len(songs):
+				raise ValueError(f"No song with index {index}.")
+			if 'url' in change and change['url'] != songs[index].get('url'):
+				raise ValueError(f"The song with index {index} isn't {change['url']}.")
+		elif change['op'] != 'add':
+			raise ValueError(f"Unknown operation {change['op']}.")
+
+	def apply(self, songs: List[Dict[str, str]], change: Dict[str, Any]) -> Any:
+		if change['op'] == 'add':
+			songs.append(change['song'])
+			return change['song']
+		return songs.pop(change['index'])
+
+
+class SharedFavouritesJournal(FavouritesJournal):
+	"""
+	The lists of every user in a single file, by user ID, as they were saved before
+	:py:class:`FavouritesStore`. The changes also have the ID of the user, ``'user'``.
+	"""
+
+	def empty(self) -> Dict[str, List[Dict[str, str]]]:
+		return dict()
+
+	def check(self, state: Dict[str, List[Dict[str, str]]], change: Dict[str, Any]):
+		super().check(state.get(change['user'], list()), change)
+
+	def apply(self, state: Dict[str, List[Dict[str, str]]], change: Dict[str, Any]) -> Any:
+		return super().apply(state.setdefault(change['user'], list()), change)
+
+
+class FavouritesStore():
+	"""
+	The lists of favourite songs, in a directory with one :py:class:`FavouritesJournal`
+	per user. A list is only loaded when its user needs it, and at most `maxsize`
+	lists are kept in memory.
+
+	The first time it is used, the lists saved in a single file by a previous version
+	are split into the directory, which is then never read again.
+
+	:param path:
+		The file where the lists of every user were saved. The directory has the same path
+		without the extension, or ending in ``.d`` if there is none.
+	:type path: str
+
+	:param logger_name:
+		The name of the logger to use.
+	:type logger_name: str
+
+	:param maxsize:
+		The maximum number of lists kept in memory.
+	:type maxsize: int
+	"""
+
+	def __init__(self, path: str, logger_name: str, maxsize: int = CACHED_LISTS):
+		self.path = path
+		self.directory = os.path.splitext(path)[0]
+		if self.directory == path:
+			self.directory = f"{path}.d"
+		self.logger_name = logger_name
+		self.lists = LRUCache(maxsize)
+		# Lists evicted from the cache while a command still uses them:
+		# loading them again would give two journals writing to the same file.
+		self.in_use: weakref.WeakValueDictionary = weakref.WeakValueDictionary()
+		self.lock = asyncio.Lock()
+		self.ready = False
+
+	async def split(self):
+		"""
+		Create the directory if it doesn't exist, with the lists saved in `path` if any.
+		The lists are written to a temporary directory first, so that an interrupted
+		split starts over.
+		"""
+
+		async with self.lock:
+
+			if self.ready:
+				return
+
+			if not os.path.isdir(self.directory):
+				lists = await SharedFavouritesJournal(self.path, self.logger_name).load()
+
+				tmp = f"{self.directory}.tmp"
+				shutil.rmtree(tmp, ignore_errors=True)
+				os.makedirs(tmp)
+				for user_id, songs in lists.items():
+					snapshot = json.dumps({'seq': 0, 'state': songs})
+					await write_atomic(os.path.join(tmp, f"{user_id}.json"), snapshot)
+				os.replace(tmp, self.directory)
+
+			self.ready = True
+
+	async def get(self, user_id: str) -> FavouritesJournal:
+		"""
+		Get the list of a user, loading it if needed.
+
+		:param user_id:
+			The ID of the user.
+		:type user_id: str
+
+		:return:
+			The loaded list: :py:attr:`Journal.state` holds its songs.
+		:rtype: FavouritesJournal
+		"""
+
+		await self.split()
+
+		journal = self.lists.get(user_id)
+		if journal is MISSING:
+			journal = self.in_use.get(user_id)
+			if journal is None:
+				path = os.path.join(self.directory, f"{user_id}.json")
+				journal = FavouritesJournal(path, self.logger_name)
+				self.in_use[user_id] = journal
+			self.lists.put(user_id, journal)
+
+		if journal.state is None:
+			await journal.load()
+
+		return journal
@@ -0,0 +1,311 @@
+# CroissantBot/cogs/ext/loudness.py
+
+"""
+Loudness normalization for the :py:mod:`music` cog.
+
+The integrated loudness (EBU R128) of each downloaded song is measured once with
+FFmpeg's ``loudnorm`` filter, in a background process pool, and stored in a small
+file next to the song. The gain needed to reach the target loudness is then applied
+by FFmpeg during playback.
+
+This module provides :py:class:`LoudnessAnalyzer`, along with the functions it uses.
+"""
+
+# The MIT License (MIT)
+
+# Copyright (c) 2021-present JulioLoayzaM
+
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import asyncio
+import json
+import logging
+import math
+import multiprocessing
+import os
+import subprocess
+
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, Set, Tuple, Union
+
+from cogs.ext.song import Song
+
+
+# The gain is clamped to avoid blasting quiet intros or silencing a song
+# because of a bad measurement.
+MIN_GAIN = -20.0
+MAX_GAIN = 12.0
+# The gain is also limited so that the true peak stays below this level, in dBTP:
+# the output is 16-bit, louder peaks would clip.
+PEAK_CEILING = -1.0
+
+# Measuring a 10 minutes song takes a few seconds, this is just a safeguard.
+MEASURE_TIMEOUT = 120
+
+
+def parse_loudnorm_output(output: str) -> Union[Tuple[float, float], None]:
+	"""
+	Extract the integrated loudness and the true peak from the output of FFmpeg's
+	``loudnorm`` filter.
+
+	:param output:
+		What FFmpeg wrote to stderr, the filter prints its JSON summary at the end.
+	:type output: str
+
+	:return:
+		The integrated loudness in LUFS and the true peak in dBTP, None if they couldn't
+		be found or if the file is silent.
+	:rtype: Union[Tuple[float, float], None]
+	"""
+
+	start = output.rfind('{')
+	end = output.rfind('}')
+	if start == -1 or end < start:
+		return None
+
+	try:
+		summary: Dict[str, str] = json.loads(output[start:end + 1])
+		loudness = float(summary['input_i'])
+		peak = float(summary['input_tp'])
+	except (ValueError, KeyError):
+		return None
+
+	if not (math.isfinite(loudness) and math.isfinite(peak)):
+		return None
+
+	return loudness, peak
+
+
+def measure_loudness(file: str) -> Union[Tuple[float, float], None]:
+	"""
+	Measure the integrated loudness and the true peak of a file. Blocking, meant to run
+	in a worker process.
+
+	:param file:
+		The path of the audio file.
+	:type file: str
+
+	:return:
+		The integrated loudness in LUFS and the true peak in dBTP, None if the
+		measurement failed.
+	:rtype: Union[Tuple[float, float], None]
+	"""
+
+	command = [
+		'ffmpeg', '-hide_banner', '-nostats', '-i', file,
+		'-vn', '-af', 'loudnorm=print_format=json', '-f', 'null', '-'
+	]
+
+	try:
+		proc = subprocess.run(
+			command,
+			stdout=subprocess.DEVNULL,
+			stderr=subprocess.PIPE,
+			timeout=MEASURE_TIMEOUT
+		)
+	except (OSError, subprocess.TimeoutExpired):
+		return None
+
+	return parse_loudnorm_output(proc.stderr.decode(errors='replace'))
+
+
+def compute_gain(loudness: float, target: float, peak: float) -> float:
+	"""
+	Get the gain needed to bring a song to the target loudness, without raising its
+	true peak above :py:data:`PEAK_CEILING`.
+
+	:param loudness:
+		The measured integrated loudness, in LUFS.
+	:type loudness: float
+
+	:param target:
+		The target loudness, in LUFS.
+	:type target: float
+
+	:param peak:
+		The measured true peak, in dBTP.
+	:type peak: float
+
+	:return:
+		The gain in dB, clamped between :py:data:`MIN_GAIN` and :py:data:`MAX_GAIN`.
+	:rtype: float
+	"""
+	gain = min(target - loudness, PEAK_CEILING - peak)
+	return min(MAX_GAIN, max(MIN_GAIN, gain))
+
+
+def sidecar_path(file: str) -> str:
+	"""
+	Get the path of the file storing the loudness of a song.
+
+	:param file:
+		The path of the song.
+	:type file: str
+
+	:return:
+		The path of the sidecar file.
+	:rtype: str
+	"""
+	return f"{file}.loudness.json"
+
+
+class LoudnessAnalyzer():
+	"""
+	Measures the loudness of songs in a process pool and caches the results
+	next to the downloaded files.
+
+	:param logger_name:
+		The name of the logger to use.
+	:type logger_name: str
+
+	:param target:
+		The target loudness, in LUFS.
+	:type target: float
+
+	:param workers:
+		The number of worker processes, 1 by default.
+	:type workers: int
+	"""
+
+	def __init__(self, logger_name: str, target: float, workers: int = 1):
+		self.logger = logging.getLogger(logger_name)
+		self.target = target
+		self.workers = workers
+		# Created on first use, so that disabled or unused analyzers don't spawn processes.
+		self.executor: Union[ProcessPoolExecutor, None] = None
+		# Measurements in progress, by file: kept to cancel them when closing.
+		self.pending: Dict[str, Future] = dict()
+		# The analyses started by prepare: the loop only keeps weak references to tasks.
+		self.tasks: Set[asyncio.Task] = set()
+
+	def load(self, song: Song) -> bool:
+		"""
+		Set the song's gain from its sidecar file, if it was already measured.
+
+		:param song:
+			The song, its file must be downloaded.
+		:type song: Song
+
+		:return:
+			True if the gain is known, False otherwise.
+		:rtype: bool
+		"""
+
+		if song.gain is not None:
+			return True
+
+		# Files saved without the true peak are measured again.
+		try:
+			with open(sidecar_path(song.file), 'r') as file:
+				measurement = json.load(file)
+			loudness = float(measurement['loudness'])
+			peak = float(measurement['peak'])
+		except (OSError, ValueError, KeyError, TypeError):
+			return False
+
+		song.gain = compute_gain(loudness, self.target, peak)
+		return True
+
+	def prepare(self, song: Song, loop: asyncio.AbstractEventLoop = None):
+		"""
+		Set the song's gain if it's known, otherwise start measuring it in the background.
+		The gain is set once the measurement finishes, if the song hasn't started playing
+		by then it's normalized too.
+
+		:param song:
+			The song, its file must be downloaded.
+		:type song: Song
+
+		:param loop:
+			The loop to use. If None, uses the running loop.
+		:type loop: asyncio.AbstractEventLoop
+		"""
+
+		if self.load(song):
+			return
+
+		loop = loop or asyncio.get_event_loop()
+		task = loop.create_task(self.analyze(song, loop))
+		self.tasks.add(task)
+		task.add_done_callback(self.tasks.discard)
+
+	async def analyze(self, song: Song, loop: asyncio.AbstractEventLoop = None):
+		"""
+		Measure the loudness of a song, store it in its sidecar file and set its gain.
+		Concurrent calls for the same file share the same measurement.
+
+		:param song:
+			The song, its file must be downloaded.
+		:type song: Song
+
+		:param loop:
+			The loop to use. If None, uses the running loop.
+		:type loop: asyncio.AbstractEventLoop
+		"""
+
+		if not os.path.exists(song.file):
+			return
+
+		loop = loop or asyncio.get_event_loop()
+
+		future = self.pending.get(song.file)
+		if future is None:
+			if self.executor is None:
+				self.executor = ProcessPoolExecutor(
+					max_workers=self.workers,
+					mp_context=multiprocessing.get_context('spawn')
+				)
+			future = self.executor.submit(measure_loudness, song.file)
+			self.pending[song.file] = future
+
+		try:
+			measurement = await asyncio.wrap_future(future, loop=loop)
+		except Exception as error:
+			self.logger.warning(f"Could not measure the loudness of \"{song.file}\".")
+			self.logger.debug(f"Unexpected exception:\n{error}")
+			return
+		finally:
+			self.pending.pop(song.file, None)
+
+		if measurement is None:
+			self.logger.debug(f"No loudness measured for \"{song.file}\".")
+			return
+
+		loudness, peak = measurement
+		song.gain = compute_gain(loudness, self.target, peak)
+
+		try:
+			with open(sidecar_path(song.file), 'w') as file:
+				json.dump({'loudness': loudness, 'peak': peak}, file)
+		except OSError as error:
+			self.logger.warning(f"Could not save the loudness of \"{song.file}\".")
+			self.logger.debug(f"OSError:\n{error}")
+
+	def close(self):
+		"""
+		Shut down the worker processes, measurements in progress are cancelled.
+		"""
+		for task in list(self.tasks):
+			task.cancel()
+		if self.executor is not None:
+			# shutdown's cancel_futures needs Python 3.9.
+			for future in self.pending.values():
+				future.cancel()
+			self.executor.shutdown(wait=False)
+			self.executor = None
@@ -0,0 +1,26 @@
+-- The tables of the Playlist cog, as created by config.py before migrations existed.
+-- Databases created back then already have them.
+
+CREATE TABLE IF NOT EXISTS playlists (
+	list_id  serial      PRIMARY KEY,
+	title    varchar(80) NOT NULL,
+	owner_id varchar(20) NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS songs (
+	song_id   serial      PRIMARY KEY,
+	title     varchar(80) NOT NULL,
+	url       varchar(80) NOT NULL,
+	thumbnail varchar(80) NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS songs_in_lists (
+	song_id int NOT NULL,
+	list_id int NOT NULL,
+	FOREIGN KEY (song_id)
+		REFERENCES songs (song_id)
+		ON DELETE CASCADE,
+	FOREIGN KEY (list_id)
+		REFERENCES playlists (list_id)
+		ON DELETE CASCADE
+);
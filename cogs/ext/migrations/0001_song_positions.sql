@@ -0,0 +1,18 @@
+-- Songs are ordered by their position in the playlist instead of their ID.
+-- Positions leave gaps of 1024 so that a song can be moved between two others
+-- without renumbering the playlist.
+
+ALTER TABLE songs_in_lists ADD COLUMN position bigint;
+
+-- Keep the current order, which was by song ID.
+UPDATE songs_in_lists AS sil
+SET position = numbered.rank * 1024
+FROM (
+	SELECT ctid, row_number() OVER (PARTITION BY list_id ORDER BY song_id) AS rank
+	FROM songs_in_lists
+) AS numbered
+WHERE sil.ctid = numbered.ctid;
+
+ALTER TABLE songs_in_lists ALTER COLUMN position SET NOT NULL;
+
+CREATE INDEX songs_in_lists_list_id_position_idx ON songs_in_lists (list_id, position);
@@ -0,0 +1,11 @@
+-- A song is in a playlist at most once: (list_id, song_id) becomes the primary key,
+-- which also indexes the lookups and deletes of a song in a playlist.
+
+-- Keep the first occurrence of songs added twice.
+DELETE FROM songs_in_lists AS sil
+USING songs_in_lists AS first
+WHERE sil.list_id = first.list_id
+	AND sil.song_id = first.song_id
+	AND (sil.position, sil.ctid) > (first.position, first.ctid);
+
+ALTER TABLE songs_in_lists ADD PRIMARY KEY (list_id, song_id);
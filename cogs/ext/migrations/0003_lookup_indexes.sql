@@ -0,0 +1,45 @@
+-- Indexes for the lookups by URL and by title, which scanned the whole tables.
+-- Duplicates are merged first: the oldest song or playlist is kept.
+
+-- Songs with the same URL: move their playlist entries to the oldest one.
+CREATE TEMPORARY TABLE song_duplicates ON COMMIT DROP AS
+SELECT song_id, min(song_id) OVER (PARTITION BY url) AS kept
+FROM songs;
+
+INSERT INTO songs_in_lists(song_id, list_id, position)
+SELECT dup.kept, sil.list_id, sil.position
+FROM songs_in_lists AS sil
+JOIN song_duplicates AS dup ON dup.song_id = sil.song_id
+WHERE dup.song_id <> dup.kept
+ON CONFLICT DO NOTHING;
+
+-- Cascades to their remaining entries.
+DELETE FROM songs
+USING song_duplicates AS dup
+WHERE songs.song_id = dup.song_id AND dup.song_id <> dup.kept;
+
+CREATE UNIQUE INDEX songs_url_idx ON songs (url);
+
+-- Playlists with the same title and owner: append their songs to the oldest one.
+CREATE TEMPORARY TABLE playlist_duplicates ON COMMIT DROP AS
+SELECT list_id, min(list_id) OVER (PARTITION BY owner_id, title) AS kept
+FROM playlists;
+
+INSERT INTO songs_in_lists(song_id, list_id, position)
+SELECT sil.song_id, dup.kept, sil.position + (
+	SELECT COALESCE(max(position), 0) FROM songs_in_lists WHERE list_id = dup.kept
+)
+FROM songs_in_lists AS sil
+JOIN playlist_duplicates AS dup ON dup.list_id = sil.list_id
+WHERE dup.list_id <> dup.kept
+ON CONFLICT DO NOTHING;
+
+DELETE FROM playlists
+USING playlist_duplicates AS dup
+WHERE playlists.list_id = dup.list_id AND dup.list_id <> dup.kept;
+
+CREATE UNIQUE INDEX playlists_owner_id_title_idx ON playlists (owner_id, title);
+
+-- The primary key of songs_in_lists starts with list_id: this one finds the playlists
+-- of a song, used when a song is deleted.
+CREATE INDEX songs_in_lists_song_id_idx ON songs_in_lists (song_id);
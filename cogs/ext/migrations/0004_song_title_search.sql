@@ -0,0 +1,6 @@
+-- Trigram index for the search of songs by title, which matches words even when
+-- misspelled. pg_trgm is a trusted extension: the owner of the database can create it.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX songs_title_trgm_idx ON songs USING gin (title gin_trgm_ops);
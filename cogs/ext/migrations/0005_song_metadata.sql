@@ -0,0 +1,9 @@
+-- What yt-dlp found about a song, so that a saved song can be played without
+-- searching it again: the file it was downloaded to and its duration, in seconds.
+-- last_resolved_at is when they were last fetched, NULL if never.
+
+ALTER TABLE songs
+	ADD COLUMN video_id         varchar(20),
+	ADD COLUMN duration         integer,
+	ADD COLUMN filename         text,
+	ADD COLUMN last_resolved_at timestamptz;
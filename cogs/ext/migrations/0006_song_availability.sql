@@ -0,0 +1,10 @@
+-- Songs whose video was removed or made private are marked unavailable by the
+-- metadata refresher, so that playing a playlist skips them.
+
+ALTER TABLE songs ADD COLUMN available boolean NOT NULL DEFAULT true;
+
+-- The titles and thumbnails fetched again can be longer than 80 characters.
+-- varchar to text doesn't rewrite the table.
+ALTER TABLE songs
+	ALTER COLUMN title TYPE text,
+	ALTER COLUMN thumbnail TYPE text;
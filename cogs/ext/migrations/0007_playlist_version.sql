@@ -0,0 +1,35 @@
+-- The version of a playlist, increased by the triggers below whenever songs are added
+-- to it, removed from it or moved, so that a change by index can check that the
+-- playlist is still as it was when the indexes were read.
+-- The triggers run once per statement, an import bumps the version only once.
+
+ALTER TABLE playlists ADD COLUMN version bigint NOT NULL DEFAULT 0;
+
+CREATE FUNCTION bump_playlist_version() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+	IF TG_OP = 'DELETE' THEN
+		UPDATE playlists SET version = version + 1
+		WHERE list_id IN (SELECT DISTINCT list_id FROM old_rows);
+	ELSE
+		UPDATE playlists SET version = version + 1
+		WHERE list_id IN (SELECT DISTINCT list_id FROM new_rows);
+	END IF;
+	RETURN NULL;
+END;
+$$;
+
+CREATE TRIGGER songs_in_lists_insert_version
+	AFTER INSERT ON songs_in_lists
+	REFERENCING NEW TABLE AS new_rows
+	FOR EACH STATEMENT EXECUTE FUNCTION bump_playlist_version();
+
+CREATE TRIGGER songs_in_lists_update_version
+	AFTER UPDATE ON songs_in_lists
+	REFERENCING NEW TABLE AS new_rows
+	FOR EACH STATEMENT EXECUTE FUNCTION bump_playlist_version();
+
+CREATE TRIGGER songs_in_lists_delete_version
+	AFTER DELETE ON songs_in_lists
+	REFERENCING OLD TABLE AS old_rows
+	FOR EACH STATEMENT EXECUTE FUNCTION bump_playlist_version();
@@ -0,0 +1,35 @@
+-- One song per YouTube video: the links to a video, whatever their form, are saved
+-- as https://www.youtube.com/watch?v=<ID>, see song.canonical_url.
+-- The ID of the songs saved with a YouTube link is taken from it, then the songs with
+-- the same ID are merged like the duplicate URLs of migration 0003: the oldest is kept.
+-- The other songs lose the ID yt-dlp gave them: it isn't unique across sites,
+-- the generic extractor uses the name of the file.
+
+UPDATE songs
+SET video_id = substring(
+	url FROM '^(?:https?://)?(?:(?:www|m|music)\.)?(?:youtube(?:-nocookie)?\.com/(?:watch\?(?:[^#]*&)?v=|(?:shorts|embed|v|e|live)/)|youtu\.be/)([A-Za-z0-9_-]{11})(?:[^A-Za-z0-9_-]|$)'
+);
+
+CREATE TEMPORARY TABLE video_duplicates ON COMMIT DROP AS
+SELECT song_id, min(song_id) OVER (PARTITION BY video_id) AS kept
+FROM songs
+WHERE video_id IS NOT NULL;
+
+INSERT INTO songs_in_lists(song_id, list_id, position)
+SELECT dup.kept, sil.list_id, sil.position
+FROM songs_in_lists AS sil
+JOIN video_duplicates AS dup ON dup.song_id = sil.song_id
+WHERE dup.song_id <> dup.kept
+ON CONFLICT DO NOTHING;
+
+-- Cascades to their remaining entries.
+DELETE FROM songs
+USING video_duplicates AS dup
+WHERE songs.song_id = dup.song_id AND dup.song_id <> dup.kept;
+
+UPDATE songs
+SET url = 'https://www.youtube.com/watch?v=' || video_id
+WHERE video_id IS NOT NULL
+	AND url ~* '^(?:https?://)?(?:www\.)?(?:(?:m|music)\.)?(?:youtube(?:-nocookie)?\.com|youtu\.be)/';
+
+CREATE UNIQUE INDEX songs_video_id_idx ON songs (video_id) WHERE video_id IS NOT NULL;
@@ -0,0 +1,122 @@
+-- The number of songs of each playlist and their total duration in seconds, so that
+-- listing the playlists of a user reads their rows only.
+-- Kept up to date by triggers: the one of migration 0007, which now also counts the
+-- songs added and removed, and two on songs, for the durations found by yt-dlp and for
+-- the songs deleted, such as the duplicates merged by migration 0008. A deleted song
+-- removes its entries by cascade once it's gone: its duration is subtracted before.
+
+ALTER TABLE playlists
+	ADD COLUMN song_count     integer NOT NULL DEFAULT 0,
+	ADD COLUMN total_duration bigint  NOT NULL DEFAULT 0;
+
+UPDATE playlists
+SET song_count = counts.songs, total_duration = counts.duration
+FROM (
+	SELECT sil.list_id, count(*) AS songs, coalesce(sum(songs.duration), 0) AS duration
+	FROM songs_in_lists AS sil
+	JOIN songs ON songs.song_id = sil.song_id
+	GROUP BY sil.list_id
+) AS counts
+WHERE playlists.list_id = counts.list_id;
+
+DROP TRIGGER songs_in_lists_insert_version ON songs_in_lists;
+DROP TRIGGER songs_in_lists_update_version ON songs_in_lists;
+DROP TRIGGER songs_in_lists_delete_version ON songs_in_lists;
+DROP FUNCTION bump_playlist_version();
+
+-- One update of each playlist changed per statement, for the version and the counters.
+CREATE FUNCTION track_playlist_changes() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+	IF TG_OP = 'INSERT' THEN
+		UPDATE playlists
+		SET
+			version = version + 1,
+			song_count = song_count + changed.songs,
+			total_duration = total_duration + changed.duration
+		FROM (
+			SELECT new_rows.list_id, count(*) AS songs, coalesce(sum(songs.duration), 0) AS duration
+			FROM new_rows
+			LEFT JOIN songs ON songs.song_id = new_rows.song_id
+			GROUP BY new_rows.list_id
+		) AS changed
+		WHERE playlists.list_id = changed.list_id;
+	ELSIF TG_OP = 'DELETE' THEN
+		UPDATE playlists
+		SET
+			version = version + 1,
+			song_count = song_count - changed.songs,
+			total_duration = total_duration - changed.duration
+		FROM (
+			SELECT old_rows.list_id, count(*) AS songs, coalesce(sum(songs.duration), 0) AS duration
+			FROM old_rows
+			LEFT JOIN songs ON songs.song_id = old_rows.song_id
+			GROUP BY old_rows.list_id
+		) AS changed
+		WHERE playlists.list_id = changed.list_id;
+	ELSE
+		-- Songs moved: only the order changed.
+		UPDATE playlists SET version = version + 1
+		WHERE list_id IN (SELECT DISTINCT list_id FROM new_rows);
+	END IF;
+	RETURN NULL;
+END;
+$$;
+
+CREATE TRIGGER songs_in_lists_insert_changes
+	AFTER INSERT ON songs_in_lists
+	REFERENCING NEW TABLE AS new_rows
+	FOR EACH STATEMENT EXECUTE FUNCTION track_playlist_changes();
+
+CREATE TRIGGER songs_in_lists_update_changes
+	AFTER UPDATE ON songs_in_lists
+	REFERENCING NEW TABLE AS new_rows
+	FOR EACH STATEMENT EXECUTE FUNCTION track_playlist_changes();
+
+CREATE TRIGGER songs_in_lists_delete_changes
+	AFTER DELETE ON songs_in_lists
+	REFERENCING OLD TABLE AS old_rows
+	FOR EACH STATEMENT EXECUTE FUNCTION track_playlist_changes();
+
+-- The duration of a song found or changed: added to the playlists it's in.
+CREATE FUNCTION track_song_durations() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+	UPDATE playlists
+	SET total_duration = total_duration + changed.delta
+	FROM (
+		SELECT
+			sil.list_id,
+			sum(coalesce(new_rows.duration, 0) - coalesce(old_rows.duration, 0)) AS delta
+		FROM new_rows
+		JOIN old_rows ON old_rows.song_id = new_rows.song_id
+		JOIN songs_in_lists AS sil ON sil.song_id = new_rows.song_id
+		WHERE new_rows.duration IS DISTINCT FROM old_rows.duration
+		GROUP BY sil.list_id
+	) AS changed
+	WHERE playlists.list_id = changed.list_id;
+	RETURN NULL;
+END;
+$$;
+
+CREATE TRIGGER songs_duration_changes
+	AFTER UPDATE ON songs
+	REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+	FOR EACH STATEMENT EXECUTE FUNCTION track_song_durations();
+
+-- Before the cascade removes the song's entries, which can't find its duration anymore.
+CREATE FUNCTION track_deleted_songs() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+	UPDATE playlists
+	SET total_duration = total_duration - old.duration
+	WHERE list_id IN (SELECT list_id FROM songs_in_lists WHERE song_id = old.song_id);
+	RETURN old;
+END;
+$$;
+
+CREATE TRIGGER songs_delete_durations
+	BEFORE DELETE ON songs
+	FOR EACH ROW
+	WHEN (old.duration IS NOT NULL)
+	EXECUTE FUNCTION track_deleted_songs();
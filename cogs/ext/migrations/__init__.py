@@ -0,0 +1,111 @@
+# CroissantBot/cogs/ext/migrations/__init__.py
+
+"""
+The schema migrations of the music database.
+
+Each migration is an SQL file in this directory named ``<version>_<name>.sql``,
+the version being a four digits number. They are applied in order, once, by
+:py:func:`db.DatabaseConnection.migrate`, which records them in the ``schema_version``
+table.
+"""
+
+# The MIT License (MIT)
+
+# Copyright (c) 2021-present JulioLoayzaM
+
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import os
+import re
+
+from typing import List
+
+
+MIGRATIONS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+FILENAME = re.compile(r'^(\d{4})_(\w+)\.sql$')
+
+
+class Migration():
+	"""
+	A migration file.
+
+	:param version:
+		The version of the schema once the migration is applied.
+	:type version: int
+
+	:param name:
+		What the migration does, from its filename.
+	:type name: str
+
+	:param path:
+		The path of the SQL file.
+	:type path: str
+	"""
+
+	def __init__(self, version: int, name: str, path: str):
+		self.version = version
+		self.name = name
+		self.path = path
+
+	def __repr__(self) -> str:
+		return f"Migration({self.version}, '{self.name}')"
+
+	def read(self) -> str:
+		"""
+		:return:
+			The SQL of the migration.
+		:rtype: str
+		"""
+		with open(self.path, 'r') as file:
+			return file.read()
+
+
+def load_migrations(directory: str = MIGRATIONS_DIR) -> List[Migration]:
+	"""
+	Find the migrations in a directory. Files not named like a migration are ignored.
+
+	:param directory:
+		The directory to search, this package's by default.
+	:type directory: str
+
+	:raises ValueError:
+		Raised when two migrations have the same version.
+
+	:return:
+		The migrations, by increasing version.
+	:rtype: List[Migration]
+	"""
+
+	migrations = dict()
+
+	for filename in os.listdir(directory):
+		match = FILENAME.match(filename)
+		if match is None:
+			continue
+
+		version = int(match.group(1))
+		if version in migrations:
+			raise ValueError(f"Two migrations have the version {version}.", filename)
+
+		migrations[version] = Migration(
+			version, match.group(2), os.path.join(directory, filename)
+		)
+
+	return [migrations[version] for version in sorted(migrations)]
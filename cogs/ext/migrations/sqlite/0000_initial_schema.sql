@@ -0,0 +1,31 @@
+-- The tables of the Playlist cog for the SQLite backend, at the level of the
+-- PostgreSQL schema once its first migrations are applied.
+
+CREATE TABLE IF NOT EXISTS playlists (
+	list_id  INTEGER PRIMARY KEY,
+	title    TEXT    NOT NULL,
+	owner_id TEXT    NOT NULL
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS playlists_owner_id_title_idx ON playlists (owner_id, title);
+
+CREATE TABLE IF NOT EXISTS songs (
+	song_id   INTEGER PRIMARY KEY,
+	title     TEXT    NOT NULL,
+	url       TEXT    NOT NULL,
+	thumbnail TEXT    NOT NULL
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS songs_url_idx ON songs (url);
+
+-- Clustered on the primary key.
+CREATE TABLE IF NOT EXISTS songs_in_lists (
+	list_id  INTEGER NOT NULL REFERENCES playlists (list_id) ON DELETE CASCADE,
+	song_id  INTEGER NOT NULL REFERENCES songs (song_id) ON DELETE CASCADE,
+	position INTEGER NOT NULL,
+	PRIMARY KEY (list_id, song_id)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS songs_in_lists_list_id_position_idx
+	ON songs_in_lists (list_id, position);
+CREATE INDEX IF NOT EXISTS songs_in_lists_song_id_idx ON songs_in_lists (song_id);
@@ -0,0 +1,23 @@
+-- Full-text index for the search of songs by title, kept in sync with songs by triggers.
+
+CREATE VIRTUAL TABLE songs_fts USING fts5(
+	title,
+	content='songs',
+	content_rowid='song_id',
+	tokenize='unicode61 remove_diacritics 2'
+);
+
+CREATE TRIGGER songs_fts_insert AFTER INSERT ON songs BEGIN
+	INSERT INTO songs_fts(rowid, title) VALUES (new.song_id, new.title);
+END;
+
+CREATE TRIGGER songs_fts_delete AFTER DELETE ON songs BEGIN
+	INSERT INTO songs_fts(songs_fts, rowid, title) VALUES ('delete', old.song_id, old.title);
+END;
+
+CREATE TRIGGER songs_fts_update AFTER UPDATE OF title ON songs BEGIN
+	INSERT INTO songs_fts(songs_fts, rowid, title) VALUES ('delete', old.song_id, old.title);
+	INSERT INTO songs_fts(rowid, title) VALUES (new.song_id, new.title);
+END;
+
+INSERT INTO songs_fts(songs_fts) VALUES ('rebuild');
@@ -0,0 +1,6 @@
+-- What yt-dlp found about a song, see the PostgreSQL migration 0005.
+
+ALTER TABLE songs ADD COLUMN video_id TEXT;
+ALTER TABLE songs ADD COLUMN duration INTEGER;
+ALTER TABLE songs ADD COLUMN filename TEXT;
+ALTER TABLE songs ADD COLUMN last_resolved_at TEXT;
@@ -0,0 +1,3 @@
+-- Songs whose video was removed or made private, see the PostgreSQL migration 0006.
+
+ALTER TABLE songs ADD COLUMN available INTEGER NOT NULL DEFAULT 1;
@@ -0,0 +1,16 @@
+-- The version of a playlist, see the PostgreSQL migration 0007.
+-- SQLite only has row triggers: the version is bumped once per song changed.
+
+ALTER TABLE playlists ADD COLUMN version INTEGER NOT NULL DEFAULT 0;
+
+CREATE TRIGGER songs_in_lists_insert_version AFTER INSERT ON songs_in_lists BEGIN
+	UPDATE playlists SET version = version + 1 WHERE list_id = new.list_id;
+END;
+
+CREATE TRIGGER songs_in_lists_update_version AFTER UPDATE ON songs_in_lists BEGIN
+	UPDATE playlists SET version = version + 1 WHERE list_id = new.list_id;
+END;
+
+CREATE TRIGGER songs_in_lists_delete_version AFTER DELETE ON songs_in_lists BEGIN
+	UPDATE playlists SET version = version + 1 WHERE list_id = old.list_id;
+END;
@@ -0,0 +1,28 @@
+-- One song per YouTube video, see the PostgreSQL migration 0008.
+-- youtube_video_id is song.video_id_from_url, registered on the connection.
+-- Only the songs on YouTube keep an ID.
+
+UPDATE songs SET video_id = youtube_video_id(url);
+
+CREATE TEMPORARY TABLE video_duplicates AS
+SELECT song_id, min(song_id) OVER (PARTITION BY video_id) AS kept
+FROM songs
+WHERE video_id IS NOT NULL;
+
+INSERT OR IGNORE INTO songs_in_lists(song_id, list_id, position)
+SELECT dup.kept, sil.list_id, sil.position
+FROM songs_in_lists AS sil
+JOIN video_duplicates AS dup ON dup.song_id = sil.song_id
+WHERE dup.song_id <> dup.kept;
+
+-- Cascades to their remaining entries.
+DELETE FROM songs
+WHERE song_id IN (SELECT song_id FROM video_duplicates WHERE song_id <> kept);
+
+DROP TABLE video_duplicates;
+
+UPDATE songs
+SET url = 'https://www.youtube.com/watch?v=' || video_id
+WHERE youtube_video_id(url) IS NOT NULL;
+
+CREATE UNIQUE INDEX songs_video_id_idx ON songs (video_id) WHERE video_id IS NOT NULL;
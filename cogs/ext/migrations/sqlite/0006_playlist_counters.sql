@@ -0,0 +1,54 @@
+-- The number of songs of each playlist and their total duration, see the PostgreSQL
+-- migration 0009.
+
+ALTER TABLE playlists ADD COLUMN song_count INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE playlists ADD COLUMN total_duration INTEGER NOT NULL DEFAULT 0;
+
+UPDATE playlists
+SET
+	song_count = (
+		SELECT count(*) FROM songs_in_lists WHERE songs_in_lists.list_id = playlists.list_id
+	),
+	total_duration = (
+		SELECT coalesce(sum(songs.duration), 0)
+		FROM songs_in_lists
+		JOIN songs ON songs.song_id = songs_in_lists.song_id
+		WHERE songs_in_lists.list_id = playlists.list_id
+	);
+
+CREATE TRIGGER songs_in_lists_insert_count AFTER INSERT ON songs_in_lists BEGIN
+	UPDATE playlists
+	SET
+		song_count = song_count + 1,
+		total_duration = total_duration + coalesce(
+			(SELECT duration FROM songs WHERE song_id = new.song_id), 0
+		)
+	WHERE list_id = new.list_id;
+END;
+
+CREATE TRIGGER songs_in_lists_delete_count AFTER DELETE ON songs_in_lists BEGIN
+	UPDATE playlists
+	SET
+		song_count = song_count - 1,
+		total_duration = total_duration - coalesce(
+			(SELECT duration FROM songs WHERE song_id = old.song_id), 0
+		)
+	WHERE list_id = old.list_id;
+END;
+
+CREATE TRIGGER songs_duration_count AFTER UPDATE OF duration ON songs
+WHEN new.duration IS NOT old.duration
+BEGIN
+	UPDATE playlists
+	SET total_duration = total_duration + coalesce(new.duration, 0) - coalesce(old.duration, 0)
+	WHERE list_id IN (SELECT list_id FROM songs_in_lists WHERE song_id = new.song_id);
+END;
+
+-- Before the cascade removes the song's entries, which can't find its duration anymore.
+CREATE TRIGGER songs_delete_count BEFORE DELETE ON songs
+WHEN old.duration IS NOT NULL
+BEGIN
+	UPDATE playlists
+	SET total_duration = total_duration - old.duration
+	WHERE list_id IN (SELECT list_id FROM songs_in_lists WHERE song_id = old.song_id);
+END;
@@ -29,32 +29,271 @@
 # DEALINGS IN THE SOFTWARE.
 
 
-from typing import List, Tuple, Union
+import asyncpg
+
+from typing import Any, Awaitable, Callable, Dict, List, Tuple, Union
+
+from cogs.ext.cache import LRUCache, MISSING
+from cogs.ext.db import DatabaseConnection
+from cogs.ext.migrations import load_migrations
+from cogs.ext.music_store import (
+	ConflictError, DbInsertError, FIND_LIMIT, MusicStore, MUTATION_RETRIES, NotFoundError,
+	POSITION_GAP
+)
+from cogs.ext.song import Song, canonical_url, youtube_id
+
+
+# The hot statements, prepared once on each pooled connection.
+STATEMENTS = {
+	'get_playlist_id': """
+		SELECT list_id
+		FROM playlists
+		WHERE title = $1 AND owner_id = $2;
+	""",
+	'get_version': """
+		SELECT version
+		FROM playlists
+		WHERE list_id = $1;
+	""",
+	'get_song_id': """
+		SELECT song_id
+		FROM songs
+		WHERE url = $1;
+	""",
+	# The songs of a playlist with what's needed to play them, and the age in seconds
+	# of that info.
+	'get_playlist_songs': """
+		SELECT
+			songs.title, songs.url, songs.thumbnail,
+			songs.video_id, songs.duration, songs.filename, songs.available,
+			extract(epoch FROM now() - songs.last_resolved_at)::float8 AS age
+		FROM songs_in_lists
+		JOIN songs ON songs.song_id = songs_in_lists.song_id
+		WHERE songs_in_lists.list_id = $1
+		ORDER BY songs_in_lists.position
+		LIMIT $3
+		OFFSET $2;
+	""",
+	# Walks the songs by ID, a batch at a time, for the metadata refresher.
+	'get_stale_songs': """
+		SELECT song_id, url
+		FROM songs
+		WHERE song_id > $1
+			AND (
+				last_resolved_at IS NULL
+				OR last_resolved_at < now() - make_interval(secs => $2)
+			)
+		ORDER BY song_id
+		LIMIT $3;
+	""",
+	# Walks the (list_id, position) index up to the song.
+	'get_song_from': """
+		SELECT songs.url
+		FROM songs_in_lists
+		JOIN songs ON songs.song_id = songs_in_lists.song_id
+		WHERE songs_in_lists.list_id = $1
+		ORDER BY songs_in_lists.position
+		LIMIT 1
+		OFFSET $2;
+	""",
+	'get_playlists': """
+		SELECT title FROM playlists
+		WHERE owner_id = ($1);
+	""",
+	# The counters are kept up to date by triggers, see migration 0009.
+	'get_playlist_summaries': """
+		SELECT title, song_count, total_duration
+		FROM playlists
+		WHERE owner_id = $1
+		ORDER BY list_id;
+	""",
+	'get_titles_in_playlist': """
+		SELECT songs.title
+		FROM playlists
+		JOIN songs_in_lists ON songs_in_lists.list_id = playlists.list_id
+		JOIN songs ON songs.song_id = songs_in_lists.song_id
+		WHERE playlists.title = $1 AND playlists.owner_id = $2
+		ORDER BY songs_in_lists.position;
+	""",
+	# Same order as get_titles_in_playlist, so that indexes match.
+	'get_songs_in_playlist': """
+		SELECT songs.url
+		FROM playlists
+		JOIN songs_in_lists ON songs_in_lists.list_id = playlists.list_id
+		JOIN songs ON songs.song_id = songs_in_lists.song_id
+		WHERE playlists.title = $1 AND playlists.owner_id = $2
+		ORDER BY songs_in_lists.position;
+	""",
+	# '<%' matches the words of the title close to the text, using the trigram index.
+	# The index of a song is the number of songs up to its position in the playlist.
+	'find_songs': """
+		SELECT
+			playlists.title AS playlist,
+			(
+				SELECT count(*)
+				FROM songs_in_lists AS previous
+				WHERE previous.list_id = songs_in_lists.list_id
+					AND previous.position <= songs_in_lists.position
+			) AS "index",
+			songs.title,
+			songs.url
+		FROM songs
+		JOIN songs_in_lists ON songs_in_lists.song_id = songs.song_id
+		JOIN playlists ON playlists.list_id = songs_in_lists.list_id
+		WHERE $2 <% songs.title
+			AND playlists.owner_id = $1
+			AND ($3::text IS NULL OR playlists.title = $3)
+		ORDER BY $2 <<-> songs.title, playlists.title, songs_in_lists.position
+		LIMIT $4;
+	""",
+	# Creates the playlist and the song if needed, and matches them.
+	# All the CTEs see the same snapshot: the NOT EXISTS guards can't see rows
+	# inserted by a concurrent add, but SERIALIZABLE makes one of them fail with a
+	# serialization error instead of creating duplicates, and it's retried.
+	# ON CONFLICT covers the rows protected by unique indexes.
+	'add_song_to_playlist': """
+		WITH existing_list AS (
+			SELECT list_id
+			FROM playlists
+			WHERE title = $1 AND owner_id = $2
+			ORDER BY list_id
+			LIMIT 1
+		), new_list AS (
+			INSERT INTO playlists(title, owner_id)
+			SELECT $1, $2
+			WHERE NOT EXISTS (SELECT 1 FROM existing_list)
+			ON CONFLICT DO NOTHING
+			RETURNING list_id
+		), list AS (
+			SELECT list_id FROM existing_list
+			UNION ALL
+			SELECT list_id FROM new_list
+		), existing_song AS (
+			SELECT song_id
+			FROM songs
+			WHERE url = $3
+			ORDER BY song_id
+			LIMIT 1
+		), new_song AS (
+			INSERT INTO songs(
+				title, url, thumbnail, video_id, duration, filename, last_resolved_at
+			)
+			SELECT
+				$4::text, $3, $5::text, $7::text, $8::int, $9::text,
+				CASE WHEN $8::int IS NULL THEN NULL ELSE now() END
+			WHERE NOT EXISTS (SELECT 1 FROM existing_song)
+			ON CONFLICT DO NOTHING
+			RETURNING song_id
+		), song AS (
+			SELECT song_id FROM existing_song
+			UNION ALL
+			SELECT song_id FROM new_song
+		), matched AS (
+			INSERT INTO songs_in_lists(song_id, list_id, position)
+			SELECT song.song_id, list.list_id, COALESCE(
+				(SELECT max(position) FROM songs_in_lists WHERE list_id = list.list_id), 0
+			) + $6
+			FROM song, list
+			WHERE NOT EXISTS (
+				SELECT 1
+				FROM songs_in_lists
+				WHERE songs_in_lists.song_id = song.song_id
+					AND songs_in_lists.list_id = list.list_id
+			)
+			ON CONFLICT DO NOTHING
+			RETURNING song_id
+		)
+		SELECT
+			EXISTS (SELECT 1 FROM matched) AS added,
+			EXISTS (SELECT 1 FROM new_list) AS created;
+	"""
+}
+
 
-from cogs.ext.db import DatabaseConnection, DbInsertError, NotFoundError
-from cogs.ext.song import Song
+# Attempts of add_song_to_playlist when it conflicts with a concurrent add.
+ADD_SONG_ATTEMPTS = 3
 
 
-class MusicDatabaseConnection(DatabaseConnection):
+class MusicDatabaseConnection(DatabaseConnection, MusicStore):
 	"""
-	A class to provide an interface to manage the playlists used by the
-	`playlist` group of commands.
+	The PostgreSQL backend of :py:class:`music_store.MusicStore`, managing the
+	playlists used by the `playlist` group of commands.
+
+	Playlist IDs, the playlists of each user and the songs in each playlist are cached,
+	the methods changing them invalidate the affected entries. A value read while its
+	entry is invalidated isn't cached, see :py:meth:`cache.LRUCache.generation`.
 
 	:param logger_name:
 		The name of the logger to be used by this connection.
 	:type logger_name: str
+
+	:param cache_size:
+		The maximum number of entries of each cache, 0 disables the caches.
+	:type cache_size: int
 	"""
 
-	def __init__(self, logger_name: str):
+	def __init__(self, logger_name: str, cache_size: int = 1024):
 		"""
 		Initializes a new instance.
 
 		:param logger_name:
 			The name of the logger to be used by this connection.
 		:type logger_name: str
+
+		:param cache_size:
+			The maximum number of entries of each cache, 0 disables the caches.
+		:type cache_size: int
 		"""
 		super().__init__(logger_name)
 
+		for name, query in STATEMENTS.items():
+			self.statements.register(name, query)
+
+		self.migrations = load_migrations()
+
+		# (title, owner_id) -> list_id, or None if the playlist doesn't exist.
+		self.playlist_ids = LRUCache(cache_size)
+		# owner_id -> titles of the playlists, or None if the user has none.
+		self.playlist_lists = LRUCache(cache_size)
+		# ('titles' or 'urls', title, owner_id) -> songs, or None if there are none.
+		self.playlist_contents = LRUCache(cache_size)
+
+	def invalidate_playlist(self, title: str, owner_id: str, contents_only: bool = False):
+		"""
+		Remove a playlist from the caches after it changed.
+
+		:param title:
+			The title of the playlist.
+		:type title: str
+
+		:param owner_id:
+			The owner of the playlist.
+		:type owner_id: str
+
+		:param contents_only:
+			True if only its songs changed, False if it was created or deleted.
+		:type contents_only: bool
+		"""
+
+		self.playlist_contents.pop(('titles', title, owner_id))
+		self.playlist_contents.pop(('urls', title, owner_id))
+
+		if not contents_only:
+			self.playlist_ids.pop((title, owner_id))
+			self.playlist_lists.pop(owner_id)
+
+	def cache_stats(self) -> Dict[str, Dict[str, int]]:
+		"""
+		:return:
+			The stats of each cache, see :py:meth:`cache.LRUCache.stats`.
+		:rtype: Dict[str, Dict[str, int]]
+		"""
+		return {
+			'playlist IDs': self.playlist_ids.stats(),
+			'playlists': self.playlist_lists.stats(),
+			'contents': self.playlist_contents.stats()
+		}
+
 	async def insert_song(
 		self,
 		song: Song
@@ -71,13 +310,18 @@ class MusicDatabaseConnection(DatabaseConnection):
 		"""
 
 		query = """
-			INSERT INTO songs(song_id, title, url, thumbnail)
-			VALUES (NEXTVAL('songs_song_id_seq'), $1, $2, $3);
+			INSERT INTO songs(song_id, title, url, thumbnail, video_id)
+			VALUES (NEXTVAL('songs_song_id_seq'), $1, $2, $3, $4);
 		"""
-		values = (song.title, song.url, song.thumbnail)
+		values = (
+			song.title,
+			canonical_url(song.url, song.video_id),
+			song.thumbnail,
+			youtube_id(song.url, song.video_id)
+		)
 
 		try:
-			await self.conn.execute(query, *values)
+			await self.execute(query, *values)
 		except Exception as error:
 			self.logger.debug(error)
 			raise DbInsertError("Could not insert a song.", str(song))
@@ -98,13 +342,9 @@ class MusicDatabaseConnection(DatabaseConnection):
 		:rtype: Union[int, None]
 		"""
 
-		query = """
-			SELECT song_id
-			FROM songs
-			WHERE url = $1;
-		"""
-
-		song_id: Union[int, None] = await self.conn.fetchval(query, song_url)
+		song_id: Union[int, None] = await self.run_prepared(
+			'fetchval', 'get_song_id', song_url
+		)
 
 		return song_id
 
@@ -130,7 +370,7 @@ class MusicDatabaseConnection(DatabaseConnection):
 			WHERE song_id = $1;
 		"""
 
-		url: Union[str, None] = await self.conn.fetchval(query, song_id)
+		url: Union[str, None] = await self.fetchval(query, song_id)
 
 		return url
 
@@ -146,22 +386,22 @@ class MusicDatabaseConnection(DatabaseConnection):
 		:type song_ids: List[int]
 
 		:return:
-			A list of the corresponding song titles. Since the IDs SHOULD be in the database,
-			no value should be empty. However, no check is done at this point.
+			A list of the corresponding song titles, in the same order as `song_ids`.
+			IDs that aren't in the database are skipped.
 		:rtype: List[str]
 		"""
 
+		# One query for all the IDs, WITH ORDINALITY keeps the order of the list.
 		query = """
-			SELECT title
-			FROM songs
-			WHERE song_id = $1;
+			SELECT songs.title
+			FROM unnest($1::int[]) WITH ORDINALITY AS ids(song_id, ord)
+			JOIN songs ON songs.song_id = ids.song_id
+			ORDER BY ids.ord;
 		"""
 
-		titles: List[str] = list()
-		for sid in song_ids:
-			titles.append(await self.conn.fetchval(query, sid))
+		results = await self.fetch(query, song_ids)
 
-		return titles
+		return [result.get('title') for result in results]
 
 	async def get_urls(
 		self,
@@ -175,23 +415,21 @@ class MusicDatabaseConnection(DatabaseConnection):
 		:type song_ids: List[int]
 
 		:return:
-			A list of the corresponding song URLs. Since the IDs SHOULD be in the database,
-			no value should be empty. However, no check is done at this point.
+			A list of the corresponding song URLs, in the same order as `song_ids`.
+			IDs that aren't in the database are skipped.
 		:rtype: List[str]
 		"""
 
 		query = """
-			SELECT url
-			FROM songs
-			WHERE song_id = $1
-			ORDER BY song_id;
+			SELECT songs.url
+			FROM unnest($1::int[]) WITH ORDINALITY AS ids(song_id, ord)
+			JOIN songs ON songs.song_id = ids.song_id
+			ORDER BY ids.ord;
 		"""
 
-		urls: List[str] = list()
-		for sid in song_ids:
-			urls.append(await self.conn.fetchval(query, sid))
+		results = await self.fetch(query, song_ids)
 
-		return urls
+		return [result.get('url') for result in results]
 
 	async def get_titles_in_playlist(
 		self,
@@ -215,31 +453,18 @@ class MusicDatabaseConnection(DatabaseConnection):
 		:rtype: Union[List[str], None]
 		"""
 
-		playlist_id = await self.get_playlist_id(playlist_title, owner_id)
-		if playlist_id is None:
-			return None
+		key = ('titles', playlist_title, owner_id)
+		titles = self.playlist_contents.get(key)
 
-		query = """
-			SELECT song_id
-			FROM songs_in_lists
-			WHERE list_id = $1
-			ORDER BY song_id;
-		"""
-
-		results = await self.conn.fetch(query, playlist_id)
-
-		if len(results) == 0:
-			return None
-
-		ids: List[int] = list()
-		for result in results:
-			ids.append(result.get('song_id'))
+		if titles is MISSING:
+			generation = self.playlist_contents.generation(key)
+			results = await self.run_prepared(
+				'fetch', 'get_titles_in_playlist', playlist_title, owner_id
+			)
+			titles = tuple(result.get('title') for result in results) or None
+			self.playlist_contents.put(key, titles, generation)
 
-		songs = await self.get_titles(ids)
-		if len(songs) == 0:
-			return None
-		else:
-			return songs
+		return list(titles) if titles is not None else None
 
 	async def get_song_from(
 		self,
@@ -268,27 +493,154 @@ class MusicDatabaseConnection(DatabaseConnection):
 		:rtype: Union[str, None]
 		"""
 
+		if index < 1:
+			return None
+
 		playlist_id = await self.get_playlist_id(playlist_title, owner_id)
 		if playlist_id is None:
 			return None
 
-		# Get the song ID.
-		query = """
-			SELECT song_id
-			FROM songs_in_lists
-			WHERE list_id = $1
-			ORDER BY song_id
-			LIMIT 1
-			OFFSET $2;
+		song: Union[str, None] = await self.run_prepared(
+			'fetchval', 'get_song_from', playlist_id, index - 1
+		)
+
+		return song
+
+	async def get_playlist_songs(
+		self,
+		playlist_title: str,
+		owner_id: str,
+		index: int = None
+	) -> Union[List[Dict[str, Any]], None]:
 		"""
-		values = (playlist_id, index - 1)
-		song_id = await self.conn.fetchval(query, *values)
+		Get the songs of a playlist with what's needed to play them without searching
+		them again.
 
-		if song_id is None:
+		:param playlist_title:
+			The title of the playlist.
+		:type playlist_title: str
+
+		:param owner_id:
+			The discord ID of the owner of the playlist.
+		:type owner_id: str
+
+		:param index:
+			Only get the song at this index. If None, get all the songs.
+		:type index: int
+
+		:return:
+			The 'title', 'url', 'thumbnail', 'video_id', 'duration', 'filename' and
+			'available' of each song in order, and the 'age' in seconds of that info,
+			None if never fetched.
+			None if the playlist doesn't exist or has no song at `index`.
+		:rtype: Union[List[Dict[str, Any]], None]
+		"""
+
+		if index is not None and index < 1:
 			return None
-		song = await self.get_song_url(song_id)
 
-		return song
+		playlist_id = await self.get_playlist_id(playlist_title, owner_id)
+		if playlist_id is None:
+			return None
+
+		offset, limit = (0, None) if index is None else (index - 1, 1)
+		rows = await self.run_prepared(
+			'fetch', 'get_playlist_songs', playlist_id, offset, limit
+		)
+
+		return [dict(row) for row in rows] or None
+
+	async def set_song_metadata(self, songs: List[Song]):
+		"""
+		Save what yt-dlp found about songs already in the database, and when. The songs
+		are available again.
+
+		:param songs:
+			The songs, with their URL, title, thumbnail, video ID, duration and file.
+		:type songs: List[Song]
+		"""
+
+		query = """
+			UPDATE songs
+			SET
+				title = coalesce($5, title),
+				thumbnail = coalesce($6, thumbnail),
+				-- Kept if another song has that ID: saved with a link not recognized
+				-- as the same video before song.canonical_url knew its form.
+				video_id = CASE
+					WHEN EXISTS (
+						SELECT 1 FROM songs AS other
+						WHERE other.video_id = $2 AND other.song_id <> songs.song_id
+					) THEN songs.video_id
+					ELSE $2
+				END,
+				duration = $3,
+				filename = $4,
+				available = true,
+				last_resolved_at = now()
+			WHERE url = $1;
+		"""
+		values = [
+			(
+				song.url, youtube_id(song.url, song.video_id), song.duration, song.file,
+				song.title, song.thumbnail
+			)
+			for song in songs
+		]
+
+		await self.executemany(query, values, name='set_song_metadata')
+
+		# The cached titles may have changed.
+		self.playlist_contents.clear()
+
+	async def get_stale_songs(
+		self,
+		after_id: int,
+		max_age: float,
+		limit: int
+	) -> List[Tuple[int, str]]:
+		"""
+		Get the songs whose info was never fetched or is older than `max_age` seconds,
+		by increasing ID.
+
+		:param after_id:
+			Only get the songs with a greater ID.
+		:type after_id: int
+
+		:param max_age:
+			The age in seconds after which the info of a song is stale.
+		:type max_age: float
+
+		:param limit:
+			The maximum number of songs to get.
+		:type limit: int
+
+		:return:
+			The ID and URL of each song.
+		:rtype: List[Tuple[int, str]]
+		"""
+
+		rows = await self.run_prepared(
+			'fetch', 'get_stale_songs', after_id, float(max_age), limit
+		)
+		return [(row['song_id'], row['url']) for row in rows]
+
+	async def mark_unavailable(self, urls: List[str]):
+		"""
+		Mark songs as unavailable, their video being removed or private.
+
+		:param urls:
+			The URLs of the songs.
+		:type urls: List[str]
+		"""
+
+		query = """
+			UPDATE songs
+			SET available = false, last_resolved_at = now()
+			WHERE url = ANY($1::text[]);
+		"""
+
+		await self.execute(query, urls, name='mark_unavailable')
 
 	async def get_songs_in_playlist(
 		self,
@@ -312,30 +664,18 @@ class MusicDatabaseConnection(DatabaseConnection):
 		:rtype: Union[List[str], None]
 		"""
 
-		playlist_id = await self.get_playlist_id(playlist_title, owner_id)
-		if playlist_id is None:
-			return None
+		key = ('urls', playlist_title, owner_id)
+		urls = self.playlist_contents.get(key)
 
-		query = """
-			SELECT song_id
-			FROM songs_in_lists
-			WHERE list_id = $1;
-		"""
-
-		results = await self.conn.fetch(query, playlist_id)
-
-		if len(results) == 0:
-			return None
-
-		ids: List[int] = list()
-		for result in results:
-			ids.append(result.get('song_id'))
+		if urls is MISSING:
+			generation = self.playlist_contents.generation(key)
+			results = await self.run_prepared(
+				'fetch', 'get_songs_in_playlist', playlist_title, owner_id
+			)
+			urls = tuple(result.get('url') for result in results) or None
+			self.playlist_contents.put(key, urls, generation)
 
-		songs = await self.get_urls(ids)
-		if len(songs) == 0:
-			return None
-		else:
-			return songs
+		return list(urls) if urls is not None else None
 
 	async def song_exists(
 		self,
@@ -353,12 +693,13 @@ class MusicDatabaseConnection(DatabaseConnection):
 		:rtype: bool
 		"""
 
-		song_id: Union[int, None] = await self.get_song_id(song.url)
+		url = canonical_url(song.url, song.video_id)
+		song_id: Union[int, None] = await self.get_song_id(url)
 
 		if song_id is None:
 			return False
 
-		# TODO: check if title and thumbnail are up to date.
+		# The title and thumbnail are kept up to date by refresher.MetadataRefresher.
 		return True
 
 	async def song_matches_playlist(
@@ -387,7 +728,7 @@ class MusicDatabaseConnection(DatabaseConnection):
 		:rtype: bool
 		"""
 
-		song_id = await self.get_song_id(song.url)
+		song_id = await self.get_song_id(canonical_url(song.url, song.video_id))
 		if song_id is None:
 			return False
 
@@ -405,7 +746,7 @@ class MusicDatabaseConnection(DatabaseConnection):
 
 		values = (song_id, playlist_id)
 
-		result: bool = await self.conn.fetchval(query, *values)
+		result: bool = await self.fetchval(query, *values)
 
 		return result
 
@@ -431,7 +772,7 @@ class MusicDatabaseConnection(DatabaseConnection):
 		:type owner_id: str
 		"""
 
-		song_id = await self.get_song_id(song.url)
+		song_id = await self.get_song_id(canonical_url(song.url, song.video_id))
 		if song_id is None:
 			raise DbInsertError(
 				"Can't match a song that's not in the database.",
@@ -446,15 +787,18 @@ class MusicDatabaseConnection(DatabaseConnection):
 				owner_id
 			)
 
+		# Appended after the last song.
 		query = """
-			INSERT INTO songs_in_lists(song_id, list_id)
-			VALUES ($1, $2);
+			INSERT INTO songs_in_lists(song_id, list_id, position)
+			SELECT $1, $2, COALESCE(max(position), 0) + $3
+			FROM songs_in_lists
+			WHERE list_id = $2;
 		"""
 
-		values = (song_id, playlist_id)
+		values = (song_id, playlist_id, POSITION_GAP)
 
 		try:
-			await self.conn.execute(query, *values)
+			await self.execute(query, *values)
 		except Exception as error:
 			self.logger.debug(error)
 			raise DbInsertError(
@@ -466,11 +810,14 @@ class MusicDatabaseConnection(DatabaseConnection):
 				f"owner_id: {owner_id}"
 			)
 
+		self.invalidate_playlist(playlist_title, owner_id, contents_only=True)
+
 	async def remove_song_from(
 		self,
 		title: str,
 		owner_id: str,
-		index: int
+		index: int,
+		version: int = None
 	):
 		"""
 		Removes a song from a playlist.
@@ -487,37 +834,442 @@ class MusicDatabaseConnection(DatabaseConnection):
 			The index of the song in the playlist.
 		:type index: int
 
+		:param version:
+			The version of the playlist `index` was read at. If None, the current one.
+		:type version: int
+
 		:raises NotFoundError:
-			Raised when the song is not in the database.
+			Raised when the playlist doesn't exist or has no song at that index.
+
+		:raises ConflictError:
+			Raised when the playlist isn't at `version` anymore.
 
 		:raises DbInsertError:
 			Raised when an error removing the song occurs.
 		"""
 
-		song_url = await self.get_song_from(index, title, owner_id)
-		if song_url is None:
+		playlist_id = await self.get_playlist_id(title, owner_id)
+		if playlist_id is None or index < 1:
 			raise NotFoundError(
-				"Can't remove a song that's not in the database.",
-				song_url
+				"Can't remove a song that's not in the playlist.",
+				f"title: {title}",
+				f"index: {index}"
 			)
 
+		# Only from this playlist: the (list_id, position) index finds the song,
+		# the primary key the row to delete. 'at_version' locks the playlist's row if it's
+		# still at the version, until the trigger bumps it.
 		query = """
-			DELETE FROM songs_in_lists
-			USING songs
-			WHERE songs_in_lists.song_id = songs.song_id AND songs.url = $1;
+			WITH at_version AS (
+				SELECT list_id
+				FROM playlists
+				WHERE list_id = $1 AND version = $3
+				FOR UPDATE
+			), removed AS (
+				DELETE FROM songs_in_lists
+				WHERE list_id = (SELECT list_id FROM at_version) AND song_id = (
+					SELECT song_id
+					FROM songs_in_lists
+					WHERE list_id = $1
+					ORDER BY position
+					LIMIT 1
+					OFFSET $2
+				)
+				RETURNING song_id
+			)
+			SELECT
+				EXISTS (SELECT 1 FROM at_version) AS at_version,
+				(SELECT song_id FROM removed) AS song_id;
 		"""
 
 		try:
-			await self.conn.execute(query, song_url)
+			row = await self.run_at_version(
+				playlist_id,
+				version,
+				lambda current: self.fetchrow(query, playlist_id, index - 1, current)
+			)
+			song_id = row.get('song_id') if row is not None else None
+		except ConflictError:
+			raise
 		except Exception as error:
 			self.logger.debug(error)
 			raise DbInsertError(
 				"Could not remove song from playlist.",
-				f"song_url: {song_url}",
+				f"index: {index}",
 				f"title: {title}",
 				f"owner_id: {owner_id}"
 			)
 
+		if song_id is None:
+			raise NotFoundError(
+				"Can't remove a song that's not in the playlist.",
+				f"title: {title}",
+				f"index: {index}"
+			)
+
+		self.invalidate_playlist(title, owner_id, contents_only=True)
+
+	async def remove_songs_from(
+		self,
+		title: str,
+		owner_id: str,
+		start: int,
+		end: int,
+		version: int = None
+	) -> int:
+		"""
+		Removes the songs of a playlist from an index to another, both included.
+
+		:param title:
+			The title of the playlist.
+		:type title: str
+
+		:param owner_id:
+			The owner of the playlist.
+		:type owner_id: str
+
+		:param start:
+			The index of the first song to remove.
+		:type start: int
+
+		:param end:
+			The index of the last song to remove. Past the end, the songs are removed
+			up to the last one.
+		:type end: int
+
+		:param version:
+			The version of the playlist the indexes were read at. If None, the current one.
+		:type version: int
+
+		:raises NotFoundError:
+			Raised when the playlist doesn't exist or has no song in the range.
+
+		:raises ConflictError:
+			Raised when the playlist isn't at `version` anymore.
+
+		:raises DbInsertError:
+			Raised when an error removing the songs occurs.
+
+		:return:
+			The number of songs removed.
+		:rtype: int
+		"""
+
+		playlist_id = await self.get_playlist_id(title, owner_id)
+		if playlist_id is None or start < 1 or end < start:
+			raise NotFoundError(
+				"Can't remove songs that are not in the playlist.",
+				f"title: {title}",
+				f"start: {start}",
+				f"end: {end}"
+			)
+
+		query = """
+			WITH at_version AS (
+				SELECT list_id
+				FROM playlists
+				WHERE list_id = $1 AND version = $4
+				FOR UPDATE
+			), removed AS (
+				DELETE FROM songs_in_lists
+				WHERE list_id = (SELECT list_id FROM at_version) AND song_id IN (
+					SELECT song_id
+					FROM songs_in_lists
+					WHERE list_id = $1
+					ORDER BY position
+					LIMIT $3
+					OFFSET $2
+				)
+				RETURNING song_id
+			)
+			SELECT
+				EXISTS (SELECT 1 FROM at_version) AS at_version,
+				(SELECT count(*) FROM removed) AS count;
+		"""
+		values = (playlist_id, start - 1, end - start + 1)
+
+		try:
+			row = await self.run_at_version(
+				playlist_id, version, lambda current: self.fetchrow(query, *values, current)
+			)
+			count = row.get('count') if row is not None else 0
+		except ConflictError:
+			raise
+		except Exception as error:
+			self.logger.debug(error)
+			raise DbInsertError(
+				"Could not remove songs from playlist.",
+				f"start: {start}",
+				f"end: {end}",
+				f"title: {title}",
+				f"owner_id: {owner_id}"
+			)
+
+		if not count:
+			raise NotFoundError(
+				"Can't remove songs that are not in the playlist.",
+				f"title: {title}",
+				f"start: {start}",
+				f"end: {end}"
+			)
+
+		self.invalidate_playlist(title, owner_id, contents_only=True)
+		return count
+
+	async def move_song(
+		self,
+		title: str,
+		owner_id: str,
+		index: int,
+		new_index: int,
+		version: int = None
+	):
+		"""
+		Move a song of a playlist to another index.
+
+		The song gets a position halfway between its new neighbours, only its row is
+		updated. If there is no room left between them, the playlist is renumbered first.
+
+		:param title:
+			The title of the playlist.
+		:type title: str
+
+		:param owner_id:
+			The owner of the playlist.
+		:type owner_id: str
+
+		:param index:
+			The index of the song to move.
+		:type index: int
+
+		:param new_index:
+			The index of the song once moved. Past the end, the song is moved last.
+		:type new_index: int
+
+		:param version:
+			The version of the playlist `index` was read at. If None, the current one.
+		:type version: int
+
+		:raises NotFoundError:
+			Raised when the playlist doesn't exist or has no song at `index`.
+
+		:raises ConflictError:
+			Raised when the playlist isn't at `version` anymore.
+
+		:raises DbInsertError:
+			Raised when an error moving the song occurs.
+		"""
+
+		playlist_id = await self.get_playlist_id(title, owner_id)
+		if playlist_id is None or index < 1:
+			raise NotFoundError(
+				"Can't move a song that's not in the playlist.",
+				f"title: {title}",
+				f"index: {index}"
+			)
+
+		new_index = max(new_index, 1)
+		if new_index == index:
+			return
+
+		# 'others' is the playlist without the moved song: the song goes right before
+		# the one at new_index in it, or last if there is none.
+		query = """
+			WITH at_version AS (
+				SELECT list_id
+				FROM playlists
+				WHERE list_id = $1 AND version = $5
+				FOR UPDATE
+			), moved AS (
+				SELECT song_id
+				FROM songs_in_lists
+				WHERE list_id = (SELECT list_id FROM at_version)
+				ORDER BY position
+				LIMIT 1
+				OFFSET $2
+			), others AS (
+				SELECT position
+				FROM songs_in_lists
+				WHERE list_id = $1 AND song_id NOT IN (SELECT song_id FROM moved)
+			), bounds AS (
+				SELECT
+					CASE WHEN $3 = 0 THEN 0 ELSE COALESCE(
+						(
+							SELECT position
+							FROM others
+							ORDER BY position
+							OFFSET greatest($3 - 1, 0)
+							LIMIT 1
+						),
+						(SELECT max(position) FROM others)
+					) END AS before,
+					(SELECT position FROM others ORDER BY position OFFSET $3 LIMIT 1) AS after
+			), updated AS (
+				UPDATE songs_in_lists
+				SET position = CASE
+					WHEN bounds.after IS NULL THEN COALESCE(bounds.before, 0) + $4
+					ELSE (bounds.before + bounds.after) / 2
+				END
+				FROM moved, bounds
+				WHERE songs_in_lists.list_id = $1
+					AND songs_in_lists.song_id = moved.song_id
+					AND (bounds.after IS NULL OR bounds.after - bounds.before >= 2)
+				RETURNING 1
+			)
+			SELECT
+				EXISTS (SELECT 1 FROM at_version) AS at_version,
+				EXISTS (SELECT 1 FROM moved) AS found,
+				EXISTS (SELECT 1 FROM updated) AS moved;
+		"""
+		values = (playlist_id, index - 1, new_index - 1, POSITION_GAP)
+
+		async def move(current: int) -> asyncpg.Record:
+			async with self.acquire() as conn:
+				async with conn.transaction():
+					row = await self.fetchrow(query, *values, current, conn=conn)
+
+					if row.get('found') and not row.get('moved'):
+						# No room between the neighbours: renumber and try again, at the
+						# version set by the renumbering. The playlist's row is still locked.
+						await self.renumber_playlist(playlist_id, conn=conn)
+						current = await self.run_prepared(
+							'fetchval', 'get_version', playlist_id, conn=conn
+						)
+						row = await self.fetchrow(query, *values, current, conn=conn)
+
+			return row
+
+		try:
+			row = await self.run_at_version(playlist_id, version, move)
+		except ConflictError:
+			raise
+		except Exception as error:
+			self.logger.debug(error)
+			raise DbInsertError(
+				"Could not move the song.",
+				f"title: {title}",
+				f"owner_id: {owner_id}",
+				f"index: {index}",
+				f"new_index: {new_index}"
+			)
+
+		if row is None or not row.get('found'):
+			raise NotFoundError(
+				"Can't move a song that's not in the playlist.",
+				f"title: {title}",
+				f"index: {index}"
+			)
+
+		self.invalidate_playlist(title, owner_id, contents_only=True)
+
+	async def run_at_version(
+		self,
+		playlist_id: int,
+		version: Union[int, None],
+		change: Callable[[int], Awaitable[Union[asyncpg.Record, None]]]
+	) -> Union[asyncpg.Record, None]:
+		"""
+		Run a change by index of a playlist, which only applies if the playlist is at the
+		version given to it. Its result has an 'at_version' column telling if it was.
+
+		:param playlist_id:
+			The ID of the playlist.
+		:type playlist_id: int
+
+		:param version:
+			The version the indexes were read at. If None, the current version is read
+			before each of the :py:data:`music_store.MUTATION_RETRIES` attempts.
+		:type version: Union[int, None]
+
+		:param change:
+			Runs the change at a version, and returns its result.
+		:type change: Callable[[int], Awaitable[Union[asyncpg.Record, None]]]
+
+		:raises ConflictError:
+			Raised when the playlist isn't at `version` anymore, or kept changing.
+
+		:return:
+			The result of the change, None if the playlist was deleted meanwhile.
+		:rtype: Union[asyncpg.Record, None]
+		"""
+
+		for _ in range(MUTATION_RETRIES):
+			current = version
+			if current is None:
+				current = await self.run_prepared('fetchval', 'get_version', playlist_id)
+				if current is None:
+					return None
+
+			row = await change(current)
+			if row is not None and row.get('at_version'):
+				return row
+
+			if version is not None:
+				break
+
+		raise ConflictError(
+			"The playlist changed meanwhile.",
+			f"playlist_id: {playlist_id}",
+			f"version: {version}"
+		)
+
+	async def get_playlist_version(
+		self,
+		playlist_title: str,
+		owner_id: str
+	) -> Union[int, None]:
+		"""
+		Get the version of a playlist, to pass to the changes by index.
+
+		:param playlist_title:
+			The title of the playlist.
+		:type playlist_title: str
+
+		:param owner_id:
+			The discord ID of the owner of the playlist.
+		:type owner_id: str
+
+		:return:
+			The version if the playlist exists, None otherwise.
+		:rtype: Union[int, None]
+		"""
+
+		playlist_id = await self.get_playlist_id(playlist_title, owner_id)
+		if playlist_id is None:
+			return None
+
+		return await self.run_prepared('fetchval', 'get_version', playlist_id)
+
+	async def renumber_playlist(
+		self,
+		playlist_id: int,
+		conn: asyncpg.Connection = None
+	):
+		"""
+		Space the positions of a playlist's songs evenly again, keeping their order.
+
+		:param playlist_id:
+			The ID of the playlist.
+		:type playlist_id: int
+
+		:param conn:
+			The connection to use, for example in a transaction.
+		:type conn: asyncpg.Connection
+		"""
+
+		query = """
+			UPDATE songs_in_lists AS sil
+			SET position = numbered.rank * $2
+			FROM (
+				SELECT song_id, row_number() OVER (ORDER BY position) AS rank
+				FROM songs_in_lists
+				WHERE list_id = $1
+			) AS numbered
+			WHERE sil.list_id = $1 AND sil.song_id = numbered.song_id;
+		"""
+
+		await self.execute(query, playlist_id, POSITION_GAP, conn=conn)
+
 	async def create_playlist(
 		self,
 		title: str,
@@ -552,12 +1304,14 @@ class MusicDatabaseConnection(DatabaseConnection):
 		"""
 
 		try:
-			await self.conn.execute(query, *values)
+			await self.execute(query, *values)
 
 		except Exception as error:
 			self.logger.debug(error)
 			raise DbInsertError("Could not create the playlist.", values)
 
+		self.invalidate_playlist(title, owner_id)
+
 	async def delete_playlist(
 		self,
 		title: str,
@@ -591,12 +1345,14 @@ class MusicDatabaseConnection(DatabaseConnection):
 		"""
 
 		try:
-			await self.conn.execute(query, plid)
+			await self.execute(query, plid)
 
 		except Exception as error:
 			self.logger.debug(error)
 			raise DbInsertError("Could not delete the playlist.", values)
 
+		self.invalidate_playlist(title, owner_id)
+
 	async def get_playlists(
 		self,
 		owner_id: str
@@ -613,21 +1369,75 @@ class MusicDatabaseConnection(DatabaseConnection):
 		:rtype: Union[List[str], None]
 		"""
 
-		query = """
-			SELECT title FROM playlists
-			WHERE owner_id = ($1);
+		titles = self.playlist_lists.get(owner_id)
+
+		if titles is MISSING:
+			generation = self.playlist_lists.generation(owner_id)
+			results = await self.run_prepared('fetch', 'get_playlists', owner_id)
+			titles = tuple(result.get('title') for result in results) or None
+			self.playlist_lists.put(owner_id, titles, generation)
+
+		return list(titles) if titles is not None else None
+
+	async def get_playlist_summaries(
+		self,
+		owner_id: str
+	) -> Union[List[Dict[str, Any]], None]:
 		"""
+		Get the playlists of a user with their number of songs and total duration,
+		read from the counters of the playlists. Not cached: they change with each song
+		added or removed.
 
-		results = await self.conn.fetch(query, owner_id)
+		:param owner_id:
+			The discord ID of the user.
+		:type owner_id: str
 
-		if len(results) == 0:
-			return None
+		:return:
+			The 'title', 'song_count' and 'total_duration' in seconds of each playlist,
+			None if the user has none.
+		:rtype: Union[List[Dict[str, Any]], None]
+		"""
+
+		rows = await self.run_prepared('fetch', 'get_playlist_summaries', owner_id)
+		return [dict(row) for row in rows] or None
+
+	async def find_songs(
+		self,
+		owner_id: str,
+		text: str,
+		playlist_title: str = None,
+		limit: int = FIND_LIMIT
+	) -> List[Dict[str, Union[str, int]]]:
+		"""
+		Search the songs of a user's playlists by title, allowing typos.
+
+		:param owner_id:
+			The discord ID of the user.
+		:type owner_id: str
+
+		:param text:
+			The text to search for.
+		:type text: str
+
+		:param playlist_title:
+			Only search this playlist. If None, search all the user's playlists.
+		:type playlist_title: str
+
+		:param limit:
+			The maximum number of songs returned.
+		:type limit: int
+
+		:return:
+			The best matches first, each with the 'playlist' it's in, its 'index' there,
+			its 'title' and 'url'. Empty if nothing matches.
+		:rtype: List[Dict[str, Union[str, int]]]
+		"""
 
-		titles: List[str] = list()
-		for result in results:
-			titles.append(result.get('title'))
+		rows = await self.run_prepared(
+			'fetch', 'find_songs', owner_id, text, playlist_title, limit
+		)
 
-		return titles
+		return [dict(row) for row in rows]
 
 	async def add_song_to_playlist(
 		self,
@@ -637,7 +1447,8 @@ class MusicDatabaseConnection(DatabaseConnection):
 	) -> Tuple[bool, bool]:
 		"""
 		Add a song to a playlist if it's owned by the calling user.
-		Creates the playlist if it doesn't exist.
+		Creates the playlist if it doesn't exist, and the song if it isn't in the database.
+		Runs as a single statement in a transaction, retried if a concurrent add conflicts.
 
 		:param song:
 			The song to add.
@@ -663,39 +1474,215 @@ class MusicDatabaseConnection(DatabaseConnection):
 		:rtype: Tuple[bool, bool]
 		"""
 
-		added, created = False, False
+		# Saved under the video's canonical URL, see song.canonical_url.
+		values = (
+			playlist_title, user_id, canonical_url(song.url, song.video_id), song.title,
+			song.thumbnail, POSITION_GAP, youtube_id(song.url, song.video_id),
+			song.duration, song.file
+		)
 
-		if not await self.playlist_exists(playlist_title, user_id):
+		for attempt in range(1, ADD_SONG_ATTEMPTS + 1):
 			try:
-				await self.create_playlist(playlist_title, user_id)
-				created = True
-			except DbInsertError as error:
-				message, *rest = error.args
-				self.logger.error(message)
-				self.logger.debug(rest)
-				raise DbInsertError(message)
-
-		if not await self.song_exists(song):
-			try:
-				await self.insert_song(song)
-			except DbInsertError as error:
-				message, *rest = error.args
-				self.logger.error(message)
-				self.logger.debug(rest)
+				async with self.acquire() as conn:
+					async with conn.transaction(isolation='serializable'):
+						row = await self.run_prepared(
+							'fetchrow', 'add_song_to_playlist', *values, conn=conn
+						)
+				break
+
+			except asyncpg.SerializationError as error:
+				if attempt == ADD_SONG_ATTEMPTS:
+					self.logger.error("Concurrent adds to a playlist kept conflicting.")
+					self.logger.debug(f"SerializationError:\n{error}")
+					raise DbInsertError("An error occured while adding the song.")
+
+			except Exception as error:
+				self.logger.error("Could not add the song to the playlist.")
+				self.logger.debug(f"Unexpected exception:\n{error}")
 				raise DbInsertError("An error occured while adding the song.")
 
-		if not await self.song_matches_playlist(song, playlist_title, user_id):
-			try:
-				await self.match_song_to_playlist(song, playlist_title, user_id)
-				added = True
-			except DbInsertError as error:
-				message, *rest = error.args
-				self.logger.error(message)
-				self.logger.debug(rest)
-				raise DbInsertError("An error occured while adding the song.")
+		added, created = row.get('added'), row.get('created')
+
+		if added or created:
+			self.invalidate_playlist(playlist_title, user_id, contents_only=not created)
 
 		return (added, created)
 
+	async def import_songs(
+		self,
+		songs: List[Song],
+		playlist_title: str,
+		user_id: str
+	) -> Tuple[int, bool]:
+		"""
+		Add many songs to a playlist at once, in the order given. Creates the playlist if
+		it doesn't exist, and the songs that aren't in the database.
+
+		The songs are copied to a temporary table in one round trip, then merged with two
+		statements, instead of calling :py:meth:`add_song_to_playlist` for each.
+
+		:param songs:
+			The songs to add.
+		:type songs: List[Song]
+
+		:param playlist_title:
+			The title of the playlist to add the songs to.
+		:type playlist_title: str
+
+		:param user_id:
+			The discord ID of the calling user.
+		:type user_id: str
+
+		:raises DbInsertError:
+			When a problem creating the playlist or adding the songs occurs.
+
+		:return:
+			The number of songs added, the others were already in the playlist,
+			and a bool to indicate whether the playlist had to be created.
+		:rtype: Tuple[int, bool]
+		"""
+
+		# Saved under the videos' canonical URL, see song.canonical_url.
+		records = [
+			(
+				order, canonical_url(song.url, song.video_id), song.title, song.thumbnail,
+				youtube_id(song.url, song.video_id), song.duration, song.file
+			)
+			for order, song in enumerate(songs)
+		]
+
+		create_playlist = """
+			INSERT INTO playlists(title, owner_id)
+			VALUES ($1, $2)
+			ON CONFLICT DO NOTHING
+			RETURNING list_id;
+		"""
+
+		# A URL given twice is saved once.
+		insert_songs = """
+			INSERT INTO songs(
+				title, url, thumbnail, video_id, duration, filename, last_resolved_at
+			)
+			SELECT DISTINCT ON (url)
+				title, url, thumbnail, video_id, duration, filename,
+				CASE WHEN duration IS NULL THEN NULL ELSE now() END
+			FROM import_staging
+			ORDER BY url, ord
+			ON CONFLICT DO NOTHING;
+		"""
+
+		# A separate statement, which sees the songs that a concurrent add inserted and
+		# insert_songs skipped: ON CONFLICT waits for them to be committed.
+		# A song given twice is added once, where it first appears. Found by URL, or by
+		# video for those saved under another link to it.
+		merge = """
+			WITH staged AS (
+				SELECT DISTINCT ON (songs.song_id) songs.song_id, import_staging.ord
+				FROM import_staging
+				JOIN songs
+					ON songs.url = import_staging.url
+					OR songs.video_id = import_staging.video_id
+				ORDER BY songs.song_id, import_staging.ord
+			), matched AS (
+				INSERT INTO songs_in_lists(song_id, list_id, position)
+				SELECT staged.song_id, $1, COALESCE(
+					(SELECT max(position) FROM songs_in_lists WHERE list_id = $1), 0
+				) + row_number() OVER (ORDER BY staged.ord) * $2
+				FROM staged
+				WHERE NOT EXISTS (
+					SELECT 1
+					FROM songs_in_lists
+					WHERE list_id = $1 AND song_id = staged.song_id
+				)
+				ON CONFLICT DO NOTHING
+				RETURNING song_id
+			)
+			SELECT count(*) FROM matched;
+		"""
+
+		try:
+			async with self.acquire() as conn:
+				async with conn.transaction():
+					playlist_id = await self.fetchval(
+						create_playlist, playlist_title, user_id, conn=conn
+					)
+					created = playlist_id is not None
+					if not created:
+						playlist_id = await self.run_prepared(
+							'fetchval', 'get_playlist_id', playlist_title, user_id, conn=conn
+						)
+
+					await self.execute("""
+						CREATE TEMPORARY TABLE import_staging (
+							ord       integer,
+							url       text,
+							title     text,
+							thumbnail text,
+							video_id  text,
+							duration  integer,
+							filename  text
+						) ON COMMIT DROP;
+					""", conn=conn, name='import_create_staging')
+					await self.copy_records_to_table(
+						'import_staging',
+						records,
+						['ord', 'url', 'title', 'thumbnail', 'video_id', 'duration', 'filename'],
+						conn=conn,
+						name='import_copy'
+					)
+					await self.execute(insert_songs, conn=conn, name='import_insert_songs')
+					added = await self.fetchval(
+						merge, playlist_id, POSITION_GAP, conn=conn, name='import_merge'
+					)
+
+		except Exception as error:
+			self.logger.error("Could not import the songs to the playlist.")
+			self.logger.debug(f"Unexpected exception:\n{error}")
+			raise DbInsertError("An error occured while importing the songs.")
+
+		if added or created:
+			self.invalidate_playlist(playlist_title, user_id, contents_only=not created)
+
+		return (added, created)
+
+	async def export_playlist(
+		self,
+		title: str,
+		owner_id: str
+	) -> Union[List[Dict[str, str]], None]:
+		"""
+		Get the songs of a playlist in the format used by the Favourites cog, which
+		:py:meth:`import_songs` can read back.
+
+		:param title:
+			The title of the playlist.
+		:type title: str
+
+		:param owner_id:
+			The owner of the playlist.
+		:type owner_id: str
+
+		:return:
+			The title, URL and thumbnail of each song, in order. None if the playlist is
+			empty or doesn't exist.
+		:rtype: Union[List[Dict[str, str]], None]
+		"""
+
+		query = """
+			SELECT songs.title, songs.url, songs.thumbnail
+			FROM playlists
+			JOIN songs_in_lists ON songs_in_lists.list_id = playlists.list_id
+			JOIN songs ON songs.song_id = songs_in_lists.song_id
+			WHERE playlists.title = $1 AND playlists.owner_id = $2
+			ORDER BY songs_in_lists.position;
+		"""
+
+		rows = await self.fetch(query, title, owner_id)
+		if not rows:
+			return None
+
+		return [dict(row) for row in rows]
+
 	async def get_playlist_id(
 		self,
 		playlist_title: str,
@@ -717,15 +1704,15 @@ class MusicDatabaseConnection(DatabaseConnection):
 		:rtype: Union[int, None]
 		"""
 
-		query = """
-			SELECT list_id
-			FROM playlists
-			WHERE title = $1 AND owner_id = $2;
-		"""
-
 		values = (playlist_title, owner_id)
 
-		playlist_id: Union[int, None] = await self.conn.fetchval(query, *values)
+		playlist_id: Union[int, None] = self.playlist_ids.get(values)
+
+		if playlist_id is MISSING:
+			# Not cached if the playlist is created or deleted during the query.
+			generation = self.playlist_ids.generation(values)
+			playlist_id = await self.run_prepared('fetchval', 'get_playlist_id', *values)
+			self.playlist_ids.put(values, playlist_id, generation)
 
 		return playlist_id
 
@@ -750,12 +1737,6 @@ class MusicDatabaseConnection(DatabaseConnection):
 		:rtype: bool
 		"""
 
-		query = """
-			SELECT exists(SELECT * FROM playlists WHERE title = $1 AND owner_id = $2);
-		"""
-
-		values = (playlist_title, owner_id)
-
-		result: bool = await self.conn.fetchval(query, *values)
+		playlist_id = await self.get_playlist_id(playlist_title, owner_id)
 
-		return result
+		return playlist_id is not None
@@ -0,0 +1,421 @@
+# CroissantBot/cogs/ext/music_store.py
+
+"""
+:py:class:`MusicStore`:
+	The interface of the playlists used by the `playlist` group of commands,
+	implemented by a backend for each database:
+	:py:class:`music_db.MusicDatabaseConnection` for PostgreSQL and
+	:py:class:`sqlite_music_db.SQLiteMusicConnection` for SQLite.
+
+And the exceptions raised by its methods, :py:class:`DbInsertError` and
+:py:class:`NotFoundError`.
+"""
+
+# The MIT License (MIT)
+
+# Copyright (c) 2022-present JulioLoayzaM
+
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Tuple, Union
+
+from cogs.ext.song import Song
+
+
+# Space between the positions of two consecutive songs when appending or renumbering,
+# a song can be moved between two others this many times before renumbering.
+POSITION_GAP = 1024
+
+# Number of songs returned by MusicStore.find_songs by default.
+FIND_LIMIT = 10
+
+# Attempts of a change by index before giving up, when the playlist keeps changing
+# meanwhile and no version was given.
+MUTATION_RETRIES = 3
+
+
+class MusicStore(ABC):
+	"""
+	The playlists of the users, each an ordered list of songs.
+
+	Songs are identified by their URL, playlists by their title and owner: a discord ID.
+	Indexes in a playlist start at 1, as displayed by the commands.
+
+	Each playlist has a version, increased whenever its songs or their order change.
+	The changes by index take the version the indexes were read at: if the playlist
+	changed since, they raise :py:class:`ConflictError` instead of changing another song.
+	Without a version, they use the current one and try again if it changes meanwhile.
+	"""
+
+	@abstractmethod
+	async def is_connected(self) -> bool:
+		"""
+		:return:
+			Whether the store is ready to be used.
+		:rtype: bool
+		"""
+
+	@abstractmethod
+	async def close(self) -> bool:
+		"""
+		Close the connection to the database.
+
+		:return:
+			True if the connection was closed, False if there was no connection to close.
+		:rtype: bool
+		"""
+
+	@abstractmethod
+	async def get_playlist_id(self, playlist_title: str, owner_id: str) -> Union[int, None]:
+		"""
+		Get the database ID of a playlist.
+
+		:return:
+			The ID of the playlist if it exists, None otherwise.
+		:rtype: Union[int, None]
+		"""
+
+	@abstractmethod
+	async def get_playlist_version(
+		self,
+		playlist_title: str,
+		owner_id: str
+	) -> Union[int, None]:
+		"""
+		Get the version of a playlist, to pass to the changes by index.
+
+		:return:
+			The version if the playlist exists, None otherwise.
+		:rtype: Union[int, None]
+		"""
+
+	async def playlist_exists(self, playlist_title: str, owner_id: str) -> bool:
+		"""
+		Check if a playlist exists.
+
+		:return:
+			True if a playlist with that title and owner exists.
+		:rtype: bool
+		"""
+		return await self.get_playlist_id(playlist_title, owner_id) is not None
+
+	@abstractmethod
+	async def get_playlists(self, owner_id: str) -> Union[List[str], None]:
+		"""
+		Get the titles of the playlists of a user.
+
+		:return:
+			The titles, None if the user has no playlist.
+		:rtype: Union[List[str], None]
+		"""
+
+	@abstractmethod
+	async def get_playlist_summaries(
+		self,
+		owner_id: str
+	) -> Union[List[Dict[str, Any]], None]:
+		"""
+		Get the playlists of a user with their size, kept up to date by the database
+		rather than counted.
+
+		:return:
+			The 'title', 'song_count' and 'total_duration' in seconds of each playlist,
+			by creation, None if the user has none. The songs whose duration isn't known
+			yet don't count in the total.
+		:rtype: Union[List[Dict[str, Any]], None]
+		"""
+
+	@abstractmethod
+	async def create_playlist(self, title: str, owner_id: str):
+		"""
+		Create an empty playlist.
+
+		:raises DbInsertError:
+			Raised when the playlist already exists or couldn't be created.
+		"""
+
+	@abstractmethod
+	async def delete_playlist(self, title: str, owner_id: str):
+		"""
+		Delete a playlist and remove its songs from it.
+
+		:raises DbInsertError:
+			Raised when the playlist doesn't exist or couldn't be deleted.
+		"""
+
+	@abstractmethod
+	async def get_titles_in_playlist(
+		self,
+		playlist_title: str,
+		owner_id: str
+	) -> Union[List[str], None]:
+		"""
+		Get the titles of the songs of a playlist, in order.
+
+		:return:
+			The titles, None if the playlist doesn't exist or is empty.
+		:rtype: Union[List[str], None]
+		"""
+
+	@abstractmethod
+	async def get_songs_in_playlist(
+		self,
+		playlist_title: str,
+		owner_id: str
+	) -> Union[List[str], None]:
+		"""
+		Get the URLs of the songs of a playlist, in the same order as
+		:py:meth:`get_titles_in_playlist`.
+
+		:return:
+			The URLs, None if the playlist doesn't exist or is empty.
+		:rtype: Union[List[str], None]
+		"""
+
+	@abstractmethod
+	async def get_playlist_songs(
+		self,
+		playlist_title: str,
+		owner_id: str,
+		index: int = None
+	) -> Union[List[Dict[str, Any]], None]:
+		"""
+		Get the songs of a playlist with what's needed to play them without searching
+		them again, all of them or only the one at `index`.
+
+		:return:
+			The 'title', 'url', 'thumbnail', 'video_id', 'duration', 'filename' and
+			'available' of each song in order, and the 'age' in seconds of that info,
+			None if never fetched.
+			None if the playlist doesn't exist or has no song at `index`.
+		:rtype: Union[List[Dict[str, Any]], None]
+		"""
+
+	@abstractmethod
+	async def set_song_metadata(self, songs: List[Song]):
+		"""
+		Save what yt-dlp found about songs already stored: their title, thumbnail,
+		video ID, duration and file. Their info's age starts again from 0 and they are
+		available again.
+		"""
+
+	@abstractmethod
+	async def get_stale_songs(
+		self,
+		after_id: int,
+		max_age: float,
+		limit: int
+	) -> List[Tuple[int, str]]:
+		"""
+		Get the songs whose info was never fetched or is older than `max_age` seconds,
+		by increasing ID.
+
+		:param after_id:
+			Only get the songs with a greater ID, to walk the songs a batch at a time.
+		:type after_id: int
+
+		:return:
+			The ID and URL of at most `limit` songs.
+		:rtype: List[Tuple[int, str]]
+		"""
+
+	@abstractmethod
+	async def mark_unavailable(self, urls: List[str]):
+		"""
+		Mark songs as unavailable, their video being removed or private. Their info's
+		age starts again from 0, so they are checked again later.
+		"""
+
+	@abstractmethod
+	async def get_song_from(
+		self,
+		index: int,
+		playlist_title: str,
+		owner_id: str
+	) -> Union[str, None]:
+		"""
+		Get the URL of a song of a playlist by its index.
+
+		:return:
+			The URL, None if there is no song at that index.
+		:rtype: Union[str, None]
+		"""
+
+	@abstractmethod
+	async def find_songs(
+		self,
+		owner_id: str,
+		text: str,
+		playlist_title: str = None,
+		limit: int = FIND_LIMIT
+	) -> List[Dict[str, Union[str, int]]]:
+		"""
+		Search the songs of a user's playlists by title, using the database's text index.
+
+		:param playlist_title:
+			Only search this playlist. If None, search all the user's playlists.
+		:type playlist_title: str
+
+		:return:
+			The best matches first, each with the 'playlist' it's in, its 'index' there,
+			its 'title' and 'url'. Empty if nothing matches.
+		:rtype: List[Dict[str, Union[str, int]]]
+		"""
+
+	@abstractmethod
+	async def add_song_to_playlist(
+		self,
+		song: Song,
+		playlist_title: str,
+		user_id: str
+	) -> Tuple[bool, bool]:
+		"""
+		Append a song to a playlist, creating the playlist if needed.
+
+		:raises DbInsertError:
+			Raised when the song couldn't be added.
+
+		:return:
+			Whether the song was added, False if it was already in the playlist,
+			and whether the playlist was created.
+		:rtype: Tuple[bool, bool]
+		"""
+
+	@abstractmethod
+	async def import_songs(
+		self,
+		songs: List[Song],
+		playlist_title: str,
+		user_id: str
+	) -> Tuple[int, bool]:
+		"""
+		Append many songs to a playlist at once, creating the playlist if needed.
+
+		:raises DbInsertError:
+			Raised when the songs couldn't be added.
+
+		:return:
+			The number of songs added, and whether the playlist was created.
+		:rtype: Tuple[int, bool]
+		"""
+
+	@abstractmethod
+	async def export_playlist(
+		self,
+		title: str,
+		owner_id: str
+	) -> Union[List[Dict[str, str]], None]:
+		"""
+		Get the title, URL and thumbnail of each song of a playlist, in order.
+
+		:return:
+			The songs, None if the playlist doesn't exist or is empty.
+		:rtype: Union[List[Dict[str, str]], None]
+		"""
+
+	@abstractmethod
+	async def remove_song_from(
+		self,
+		title: str,
+		owner_id: str,
+		index: int,
+		version: int = None
+	):
+		"""
+		Remove a song from a playlist by its index.
+
+		:raises NotFoundError:
+			Raised when the playlist doesn't exist or has no song at that index.
+
+		:raises ConflictError:
+			Raised when the playlist isn't at `version` anymore.
+
+		:raises DbInsertError:
+			Raised when the song couldn't be removed.
+		"""
+
+	@abstractmethod
+	async def remove_songs_from(
+		self,
+		title: str,
+		owner_id: str,
+		start: int,
+		end: int,
+		version: int = None
+	) -> int:
+		"""
+		Remove the songs of a playlist from an index to another, both included.
+
+		:raises NotFoundError:
+			Raised when the playlist doesn't exist or has no song in the range.
+
+		:raises ConflictError:
+			Raised when the playlist isn't at `version` anymore.
+
+		:raises DbInsertError:
+			Raised when the songs couldn't be removed.
+
+		:return:
+			The number of songs removed.
+		:rtype: int
+		"""
+
+	@abstractmethod
+	async def move_song(
+		self,
+		title: str,
+		owner_id: str,
+		index: int,
+		new_index: int,
+		version: int = None
+	):
+		"""
+		Move a song of a playlist to another index, past the end meaning last.
+
+		:raises NotFoundError:
+			Raised when the playlist doesn't exist or has no song at `index`.
+
+		:raises ConflictError:
+			Raised when the playlist isn't at `version` anymore.
+
+		:raises DbInsertError:
+			Raised when the song couldn't be moved.
+		"""
+
+
+class DbInsertError(Exception):
+	"""
+	Raised when an error related to INSERT occurs.
+	"""
+	pass
+
+
+class NotFoundError(Exception):
+	"""
+	Raised when an error related to a missing result occurs.
+	"""
+	pass
+
+
+class ConflictError(Exception):
+	"""
+	Raised when a playlist changed since its indexes were read.
+	"""
+	pass
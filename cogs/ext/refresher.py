@@ -0,0 +1,221 @@
+# CroissantBot/cogs/ext/refresher.py
+
+"""
+Keeps the info of the songs saved in playlists up to date.
+
+This module provides:
+	:py:class:`RateLimiter`:
+		Spaces out calls to respect a maximum rate.
+	:py:class:`MetadataRefresher`:
+		A background task walking the saved songs in small batches, fetching the info
+		of the stale ones again and marking those whose video is gone.
+"""
+
+# The MIT License (MIT)
+
+# Copyright (c) 2021-present JulioLoayzaM
+
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import asyncio
+import logging
+
+from typing import Awaitable, Callable, Dict, List, Union
+
+from cogs.ext.music_store import MusicStore
+from cogs.ext.song import Song
+
+
+class SongUnavailableError(Exception):
+	"""
+	Raised by the resolver of a :py:class:`MetadataRefresher` when a song's video
+	doesn't exist anymore or can't be played, as opposed to a temporary failure.
+	"""
+	pass
+
+
+class RateLimiter():
+	"""
+	Lets calls through at most `rate` times per second, spaced out evenly.
+
+	:param rate:
+		The maximum number of calls per second.
+	:type rate: float
+	"""
+
+	def __init__(self, rate: float):
+		if rate <= 0:
+			raise ValueError("The rate must be positive.")
+
+		self.interval = 1 / rate
+		# Loop time at which the next call can go through.
+		self.next_call = 0.0
+
+	async def wait(self):
+		"""
+		Wait until the next call is allowed.
+		"""
+
+		loop = asyncio.get_event_loop()
+		now = loop.time()
+
+		delay = self.next_call - now
+		self.next_call = max(now, self.next_call) + self.interval
+
+		if delay > 0:
+			await asyncio.sleep(delay)
+
+
+class MetadataRefresher():
+	"""
+	Walks the songs of a :py:class:`music_store.MusicStore` by increasing ID, a batch
+	at a time, and fetches again the info of those not fetched for `max_age` seconds.
+	The info found is saved with one query per batch, the songs that are gone are
+	marked unavailable. Songs that fail for another reason are retried on the next pass.
+
+	:param store:
+		The store of the songs.
+	:type store: music_store.MusicStore
+
+	:param resolve:
+		The coroutine function fetching the info of a song from its URL. It raises
+		:py:class:`SongUnavailableError` when the song is gone.
+	:type resolve: Callable[[str], Awaitable[Song]]
+
+	:param logger_name:
+		The name of the logger to use.
+	:type logger_name: str
+
+	:param max_age:
+		Seconds after which the info of a song is fetched again.
+	:type max_age: float
+
+	:param batch_size:
+		The number of songs read from the store at a time.
+	:type batch_size: int
+
+	:param interval:
+		Seconds between two batches. A full pass over the songs is followed by a pause
+		of `max_age` / 10 seconds.
+	:type interval: float
+
+	:param rate:
+		The maximum number of songs resolved per second.
+	:type rate: float
+	"""
+
+	def __init__(
+		self,
+		store: MusicStore,
+		resolve: Callable[[str], Awaitable[Song]],
+		logger_name: str,
+		max_age: float,
+		batch_size: int = 20,
+		interval: float = 300.0,
+		rate: float = 0.1
+	):
+		self.store = store
+		self.resolve = resolve
+		self.logger = logging.getLogger(logger_name)
+		self.max_age = max_age
+		self.batch_size = batch_size
+		self.interval = interval
+		self.limiter = RateLimiter(rate)
+		# The ID of the last song of the previous batch.
+		self.cursor = 0
+		self.task: Union[asyncio.Task, None] = None
+		self.counts: Dict[str, int] = {'refreshed': 0, 'unavailable': 0, 'failed': 0}
+
+	async def run_once(self) -> bool:
+		"""
+		Refresh the next batch of stale songs.
+
+		:return:
+			True if the pass over the songs is complete, the next batch starting over
+			from the first song.
+		:rtype: bool
+		"""
+
+		rows = await self.store.get_stale_songs(self.cursor, self.max_age, self.batch_size)
+
+		refreshed: List[Song] = list()
+		unavailable: List[str] = list()
+
+		for song_id, url in rows:
+			self.cursor = song_id
+			await self.limiter.wait()
+
+			try:
+				refreshed.append(await self.resolve(url))
+			except SongUnavailableError:
+				unavailable.append(url)
+			except Exception as error:
+				self.counts['failed'] += 1
+				self.logger.debug(f"Could not refresh {url}:\n{error}")
+
+		if refreshed:
+			await self.store.set_song_metadata(refreshed)
+		if unavailable:
+			await self.store.mark_unavailable(unavailable)
+			self.logger.info(f"{len(unavailable)} saved songs are not available anymore.")
+
+		self.counts['refreshed'] += len(refreshed)
+		self.counts['unavailable'] += len(unavailable)
+
+		done = len(rows) < self.batch_size
+		if done:
+			self.cursor = 0
+		return done
+
+	def start(self, loop: asyncio.AbstractEventLoop = None):
+		"""
+		Start refreshing in the background, if not already running.
+
+		:param loop:
+			The loop to run on. If None, uses the running loop.
+		:type loop: asyncio.AbstractEventLoop
+		"""
+		if self.task is not None and not self.task.done():
+			return
+
+		loop = loop or asyncio.get_event_loop()
+		self.task = loop.create_task(self.run())
+
+	def stop(self):
+		"""
+		Stop refreshing. The next start resumes from the current batch.
+		"""
+		if self.task is not None:
+			self.task.cancel()
+			self.task = None
+
+	async def run(self):
+		"""
+		Refresh a batch every `interval` seconds, pausing after each full pass.
+		"""
+
+		while True:
+			try:
+				done = await self.run_once()
+			except Exception as error:
+				done = False
+				self.logger.error("Could not refresh the saved songs.")
+				self.logger.debug(f"Unexpected exception:\n{error}")
+
+			await asyncio.sleep(self.max_age / 10 if done else self.interval)
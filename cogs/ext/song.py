@@ -2,6 +2,9 @@
 
 """
 Small class to represent a song for the queue.
+
+Also provides :py:func:`canonical_url`, the URL a song is saved under so that the
+links to the same YouTube video match.
 """
 
 # The MIT License (MIT)
@@ -26,19 +29,149 @@ Small class to represent a song for the queue.
 # FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
 # DEALINGS IN THE SOFTWARE.
 
+import re
+
+from typing import Union
+from urllib.parse import parse_qs, urlsplit
+
+
+# The hosts serving YouTube videos, without 'www.'.
+YOUTUBE_HOSTS = {
+	'youtube.com', 'm.youtube.com', 'music.youtube.com', 'youtube-nocookie.com', 'youtu.be'
+}
+# The paths ending with the video ID, besides youtu.be's.
+YOUTUBE_ID_PATHS = {'shorts', 'embed', 'v', 'e', 'live'}
+VIDEO_ID = re.compile(r"[A-Za-z0-9_-]{11}")
+
+
+def youtube_host(url: str) -> bool:
+	"""
+	:return:
+		Whether a URL, with or without scheme, is on one of the :py:data:`YOUTUBE_HOSTS`.
+	:rtype: bool
+	"""
+
+	try:
+		host = (urlsplit(url if '://' in url else f"https://{url}").hostname or '').lower()
+	except ValueError:
+		return False
+
+	if host.startswith('www.'):
+		host = host[4:]
+	return host in YOUTUBE_HOSTS
+
+
+def video_id_from_url(url: str) -> Union[str, None]:
+	"""
+	Get the ID of a YouTube video from one of its links: youtu.be, watch, shorts,
+	embed or live links, on youtube.com, m.youtube.com or music.youtube.com.
+
+	:param url:
+		The link, with or without scheme.
+	:type url: str
+
+	:return:
+		The video ID, None if the URL isn't a link to a YouTube video.
+	:rtype: Union[str, None]
+	"""
+
+	url = url.strip()
+	if not youtube_host(url):
+		return None
+
+	parts = urlsplit(url if '://' in url else f"https://{url}")
+	segments = [segment for segment in parts.path.split('/') if segment]
+
+	if parts.hostname.lower() in ('youtu.be', 'www.youtu.be'):
+		candidate = segments[0] if segments else None
+	elif segments == ['watch']:
+		candidate = parse_qs(parts.query).get('v', [None])[0]
+	elif len(segments) >= 2 and segments[0] in YOUTUBE_ID_PATHS:
+		candidate = segments[1]
+	else:
+		candidate = None
+
+	if candidate is None or not VIDEO_ID.fullmatch(candidate):
+		return None
+	return candidate
+
+
+def canonical_url(url: str, video_id: str = None) -> str:
+	"""
+	Get the URL a song is saved under: https://www.youtube.com/watch?v=<ID> for the
+	links to a YouTube video, whatever their form and parameters.
+
+	:param url:
+		The URL of the song, as given by the user.
+	:type url: str
+
+	:param video_id:
+		The ID found by yt-dlp, used when the URL is on a YouTube host but its form
+		isn't known.
+	:type video_id: str
+
+	:return:
+		The canonical URL, or `url` itself if it isn't a YouTube link.
+	:rtype: str
+	"""
+
+	found = video_id_from_url(url)
+	if found is None and video_id and VIDEO_ID.fullmatch(video_id) and youtube_host(url):
+		found = video_id
+
+	if found is None:
+		return url
+	return f"https://www.youtube.com/watch?v={found}"
+
+
+def youtube_id(url: str, video_id: str = None) -> Union[str, None]:
+	"""
+	Get the ID a song is saved with: only songs on YouTube have one, the IDs that
+	yt-dlp gives to the songs of other sites aren't unique across sites.
+
+	:param url:
+		The URL of the song.
+	:type url: str
+
+	:param video_id:
+		The ID found by yt-dlp, see :py:func:`canonical_url`.
+	:type video_id: str
+
+	:return:
+		The ID of the YouTube video, None if the song isn't on YouTube.
+	:rtype: Union[str, None]
+	"""
+	return video_id_from_url(canonical_url(url, video_id))
+
 
 class Song():
 	"""
 	A class to represent a song. Stores the title, the name of the downloaded file,
 	the URL and the thumbnail URL.
+	The gain, in dB, is the one needed to normalize the song's loudness: None if
+	it hasn't been measured.
+	The ID of the YouTube video and the duration, in seconds, are None if unknown
+	or, for the ID, if the song isn't on YouTube.
 	"""
 
-	def __init__(self, title: str, file: str, url: str, thumbnail: str):
+	def __init__(
+		self,
+		title: str,
+		file: str,
+		url: str,
+		thumbnail: str,
+		gain: float = None,
+		video_id: str = None,
+		duration: int = None
+	):
 
 		self.title = title
 		self.file  = file
 		self.url   = url
 		self.thumbnail = thumbnail
+		self.gain  = gain
+		self.video_id = video_id
+		self.duration = duration
 
 	def __str__(self):
 		return f"{self.title} - {self.url}"
@@ -0,0 +1,846 @@
+# CroissantBot/cogs/ext/sqlite_music_db.py
+
+"""
+:py:class:`SQLiteMusicConnection`:
+	The SQLite backend of :py:class:`music_store.MusicStore`, storing the playlists
+	in a local file instead of a PostgreSQL server.
+"""
+
+# The MIT License (MIT)
+
+# Copyright (c) 2022-present JulioLoayzaM
+
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import aiosqlite
+import asyncio
+import logging
+import os
+import re
+
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Tuple, Union
+
+from cogs.ext.migrations import MIGRATIONS_DIR, Migration, load_migrations
+from cogs.ext.music_store import (
+	ConflictError, DbInsertError, FIND_LIMIT, MusicStore, NotFoundError, POSITION_GAP
+)
+from cogs.ext.song import Song, canonical_url, video_id_from_url, youtube_id
+
+
+SQLITE_MIGRATIONS_DIR = os.path.join(MIGRATIONS_DIR, 'sqlite')
+
+# Number of statements sqlite3 keeps compiled, by their SQL text.
+CACHED_STATEMENTS = 128
+
+# The statements are constants, so that each is compiled once and then reused from
+# the connection's statement cache.
+STATEMENTS = {
+	'get_playlist_id': """
+		SELECT list_id
+		FROM playlists
+		WHERE title = ? AND owner_id = ?;
+	""",
+	'get_playlist_version': """
+		SELECT version
+		FROM playlists
+		WHERE title = ? AND owner_id = ?;
+	""",
+	'get_version': """
+		SELECT version
+		FROM playlists
+		WHERE list_id = ?;
+	""",
+	'get_playlists': """
+		SELECT title
+		FROM playlists
+		WHERE owner_id = ?
+		ORDER BY list_id;
+	""",
+	'get_playlist_summaries': """
+		SELECT title, song_count, total_duration
+		FROM playlists
+		WHERE owner_id = ?
+		ORDER BY list_id;
+	""",
+	'create_playlist': """
+		INSERT OR IGNORE INTO playlists(title, owner_id)
+		VALUES (?, ?);
+	""",
+	'delete_playlist': """
+		DELETE FROM playlists
+		WHERE list_id = ?;
+	""",
+	'get_titles_in_playlist': """
+		SELECT songs.title
+		FROM songs_in_lists
+		JOIN songs ON songs.song_id = songs_in_lists.song_id
+		WHERE songs_in_lists.list_id = ?
+		ORDER BY songs_in_lists.position;
+	""",
+	'get_songs_in_playlist': """
+		SELECT songs.url
+		FROM songs_in_lists
+		JOIN songs ON songs.song_id = songs_in_lists.song_id
+		WHERE songs_in_lists.list_id = ?
+		ORDER BY songs_in_lists.position;
+	""",
+	'export_playlist': """
+		SELECT songs.title, songs.url, songs.thumbnail
+		FROM songs_in_lists
+		JOIN songs ON songs.song_id = songs_in_lists.song_id
+		WHERE songs_in_lists.list_id = ?
+		ORDER BY songs_in_lists.position;
+	""",
+	'get_song_from': """
+		SELECT songs.url
+		FROM songs_in_lists
+		JOIN songs ON songs.song_id = songs_in_lists.song_id
+		WHERE songs_in_lists.list_id = ?
+		ORDER BY songs_in_lists.position
+		LIMIT 1
+		OFFSET ?;
+	""",
+	'find_songs': """
+		SELECT
+			playlists.title AS playlist,
+			(
+				SELECT count(*)
+				FROM songs_in_lists AS previous
+				WHERE previous.list_id = songs_in_lists.list_id
+					AND previous.position <= songs_in_lists.position
+			) AS "index",
+			songs.title,
+			songs.url
+		FROM songs_fts
+		JOIN songs ON songs.song_id = songs_fts.rowid
+		JOIN songs_in_lists ON songs_in_lists.song_id = songs.song_id
+		JOIN playlists ON playlists.list_id = songs_in_lists.list_id
+		WHERE songs_fts MATCH ?2
+			AND playlists.owner_id = ?1
+			AND (?3 IS NULL OR playlists.title = ?3)
+		ORDER BY songs_fts.rank, playlists.title, songs_in_lists.position
+		LIMIT ?4;
+	""",
+	'get_playlist_songs': """
+		SELECT
+			songs.title, songs.url, songs.thumbnail,
+			songs.video_id, songs.duration, songs.filename, songs.available,
+			(julianday('now') - julianday(songs.last_resolved_at)) * 86400 AS age
+		FROM songs_in_lists
+		JOIN songs ON songs.song_id = songs_in_lists.song_id
+		WHERE songs_in_lists.list_id = ?
+		ORDER BY songs_in_lists.position
+		LIMIT ?
+		OFFSET ?;
+	""",
+	'set_song_metadata': """
+		UPDATE songs
+		SET
+			title = coalesce(?5, title),
+			thumbnail = coalesce(?6, thumbnail),
+			-- Kept if another song has that ID, see music_db.
+			video_id = CASE
+				WHEN EXISTS (
+					SELECT 1 FROM songs AS other
+					WHERE other.video_id = ?2 AND other.song_id <> songs.song_id
+				) THEN songs.video_id
+				ELSE ?2
+			END,
+			duration = ?3,
+			filename = ?4,
+			available = 1,
+			last_resolved_at = CURRENT_TIMESTAMP
+		WHERE url = ?1;
+	""",
+	'get_stale_songs': """
+		SELECT song_id, url
+		FROM songs
+		WHERE song_id > ?1
+			AND (
+				last_resolved_at IS NULL
+				OR (julianday('now') - julianday(last_resolved_at)) * 86400 > ?2
+			)
+		ORDER BY song_id
+		LIMIT ?3;
+	""",
+	'mark_unavailable': """
+		UPDATE songs
+		SET available = 0, last_resolved_at = CURRENT_TIMESTAMP
+		WHERE url = ?;
+	""",
+	'insert_song': """
+		INSERT OR IGNORE INTO songs(
+			title, url, thumbnail, video_id, duration, filename, last_resolved_at
+		)
+		VALUES (
+			?1, ?2, ?3, ?4, ?5, ?6, CASE WHEN ?5 IS NULL THEN NULL ELSE CURRENT_TIMESTAMP END
+		);
+	""",
+	# Appended after the last song of the playlist.
+	'match_song': """
+		INSERT OR IGNORE INTO songs_in_lists(list_id, song_id, position)
+		SELECT ?1, song_id, (
+			SELECT COALESCE(max(position), 0) FROM songs_in_lists WHERE list_id = ?1
+		) + ?2
+		FROM songs
+		WHERE url = ?3;
+	""",
+	'remove_songs_from': """
+		DELETE FROM songs_in_lists
+		WHERE list_id = ?1 AND song_id IN (
+			SELECT song_id
+			FROM songs_in_lists
+			WHERE list_id = ?1
+			ORDER BY position
+			LIMIT ?3
+			OFFSET ?2
+		);
+	""",
+	'get_positions': """
+		SELECT song_id, position
+		FROM songs_in_lists
+		WHERE list_id = ?
+		ORDER BY position;
+	""",
+	'set_position': """
+		UPDATE songs_in_lists
+		SET position = ?
+		WHERE list_id = ? AND song_id = ?;
+	"""
+}
+
+
+class SQLiteMusicConnection(MusicStore):
+	"""
+	Playlists stored in a SQLite database, for deployments without a PostgreSQL server.
+
+	The database is opened in WAL mode, so reads don't wait for writes to finish.
+	A single connection is used, its queries run one at a time in aiosqlite's thread:
+	a lock keeps the queries of other commands out of a transaction.
+
+	:param logger_name:
+		The name of the logger to be used by this connection.
+	:type logger_name: str
+	"""
+
+	def __init__(self, logger_name: str):
+		self.conn: Union[aiosqlite.Connection, None] = None
+		self.logger = logging.getLogger(logger_name)
+		self.db_name = ""
+		self.lock = asyncio.Lock()
+		self.migrations: List[Migration] = load_migrations(SQLITE_MIGRATIONS_DIR)
+
+	async def connect(self, path: str):
+		"""
+		Opens the database, creating it if needed, and applies the pending migrations.
+
+		:param path:
+			The path of the database file, or ':memory:'.
+		:type path: str
+
+		:raises Exception:
+			Raised when the database couldn't be opened or migrated.
+		"""
+
+		try:
+			# Transactions are started explicitly, see transaction.
+			conn = await aiosqlite.connect(
+				path, isolation_level=None, cached_statements=CACHED_STATEMENTS
+			)
+		except Exception as error:
+			raise Exception("Couldn't open the database.", error)
+
+		try:
+			await conn.execute("PRAGMA journal_mode = WAL;")
+			# Safe with WAL: a crash can only lose the last transactions, not corrupt.
+			await conn.execute("PRAGMA synchronous = NORMAL;")
+			await conn.execute("PRAGMA foreign_keys = ON;")
+			conn.row_factory = aiosqlite.Row
+			# Used by the migration merging the links to the same video.
+			await conn.create_function(
+				'youtube_video_id', 1, video_id_from_url, deterministic=True
+			)
+
+			await self.migrate(conn, self.migrations)
+		except Exception as error:
+			await conn.close()
+			raise Exception("Couldn't migrate the database.", error)
+
+		self.conn = conn
+		self.db_name = path
+		self.logger.debug(f"Opened the SQLite database {path}.")
+
+	async def migrate(
+		self,
+		conn: aiosqlite.Connection,
+		migrations: List[Migration]
+	) -> List[int]:
+		"""
+		Apply the migrations that weren't applied yet, in order, each in its own
+		transaction along with its row in ``schema_version``.
+
+		:param conn:
+			The connection to use.
+		:type conn: aiosqlite.Connection
+
+		:param migrations:
+			All the migrations, by increasing version.
+		:type migrations: List[Migration]
+
+		:return:
+			The versions applied.
+		:rtype: List[int]
+		"""
+
+		await conn.execute("""
+			CREATE TABLE IF NOT EXISTS schema_version (
+				version    INTEGER PRIMARY KEY,
+				name       TEXT    NOT NULL,
+				applied_at TEXT    NOT NULL DEFAULT CURRENT_TIMESTAMP
+			);
+		""")
+
+		async with conn.execute("SELECT version FROM schema_version;") as cursor:
+			current = {row[0] for row in await cursor.fetchall()}
+
+		applied: List[int] = list()
+		for migration in migrations:
+			if migration.version in current:
+				continue
+
+			# The name matches \w+, see migrations.FILENAME.
+			script = (
+				"BEGIN IMMEDIATE;\n"
+				f"{migration.read()}\n"
+				"INSERT INTO schema_version(version, name)"
+				f" VALUES ({migration.version}, '{migration.name}');\n"
+				"COMMIT;"
+			)
+			try:
+				await conn.executescript(script)
+			except Exception:
+				if conn.in_transaction:
+					await conn.execute("ROLLBACK;")
+				raise
+
+			applied.append(migration.version)
+			self.logger.info(
+				f"Applied migration {migration.version} ({migration.name})"
+				f" to the database {self.db_name or 'being opened'}."
+			)
+
+		return applied
+
+	async def close(self) -> bool:
+		"""
+		Closes the database.
+
+		:return:
+			True if the database was closed, False if it wasn't open.
+		:rtype: bool
+		"""
+
+		if self.conn is None:
+			return False
+
+		async with self.lock:
+			await self.conn.close()
+			self.conn = None
+
+		self.logger.debug(f"Closed the SQLite database {self.db_name}.")
+		return True
+
+	async def is_connected(self) -> bool:
+		"""
+		:return:
+			Whether the database is open.
+		:rtype: bool
+		"""
+		return self.conn is not None
+
+	@asynccontextmanager
+	async def transaction(self) -> AsyncIterator[aiosqlite.Connection]:
+		"""
+		Run queries in a transaction, committed when the with block exits and rolled back
+		if it raises. Pass the connection to :py:meth:`run` as `conn`.
+		"""
+
+		async with self.lock:
+			await self.conn.execute("BEGIN IMMEDIATE;")
+			try:
+				yield self.conn
+			except BaseException:
+				await self.conn.execute("ROLLBACK;")
+				raise
+			await self.conn.execute("COMMIT;")
+
+	async def run(
+		self,
+		method: str,
+		name: str,
+		*args,
+		conn: aiosqlite.Connection = None
+	) -> Any:
+		"""
+		Run one of the :py:data:`STATEMENTS`.
+
+		:param method:
+			'execute' to get the number of rows changed, 'fetch' for all the rows,
+			'fetchrow' for the first one or 'fetchval' for its first column.
+		:type method: str
+
+		:param name:
+			The name of the statement.
+		:type name: str
+
+		:param args:
+			The arguments of the statement.
+
+		:param conn:
+			The connection of a :py:meth:`transaction`. If None, the statement runs on
+			its own once no transaction is running.
+		:type conn: aiosqlite.Connection
+
+		:return:
+			The result, depending on `method`. None if there is no row.
+		"""
+
+		if conn is None:
+			async with self.lock:
+				return await self.run(method, name, *args, conn=self.conn)
+
+		async with conn.execute(STATEMENTS[name], args) as cursor:
+			if method == 'execute':
+				return cursor.rowcount
+			if method == 'fetch':
+				return await cursor.fetchall()
+
+			row = await cursor.fetchone()
+			if method == 'fetchrow' or row is None:
+				return row
+			return row[0]
+
+	async def get_playlist_id(self, playlist_title: str, owner_id: str) -> Union[int, None]:
+		return await self.run('fetchval', 'get_playlist_id', playlist_title, owner_id)
+
+	async def get_playlist_version(
+		self,
+		playlist_title: str,
+		owner_id: str
+	) -> Union[int, None]:
+		return await self.run('fetchval', 'get_playlist_version', playlist_title, owner_id)
+
+	async def check_version(
+		self,
+		playlist_id: int,
+		version: Union[int, None],
+		conn: aiosqlite.Connection
+	):
+		"""
+		Check that a playlist is still at a version, in a :py:meth:`transaction`.
+		The transactions run one at a time: no need to try again when there is no version.
+
+		:raises ConflictError:
+			Raised when the playlist isn't at `version` anymore.
+		"""
+
+		if version is None:
+			return
+
+		current = await self.run('fetchval', 'get_version', playlist_id, conn=conn)
+		if current != version:
+			raise ConflictError(
+				"The playlist changed meanwhile.",
+				f"playlist_id: {playlist_id}",
+				f"version: {version}"
+			)
+
+	async def get_playlists(self, owner_id: str) -> Union[List[str], None]:
+		rows = await self.run('fetch', 'get_playlists', owner_id)
+		return [row['title'] for row in rows] or None
+
+	async def get_playlist_summaries(
+		self,
+		owner_id: str
+	) -> Union[List[Dict[str, Any]], None]:
+		rows = await self.run('fetch', 'get_playlist_summaries', owner_id)
+		return [dict(row) for row in rows] or None
+
+	async def create_playlist(self, title: str, owner_id: str):
+		values = (title, owner_id)
+
+		try:
+			created = await self.run('execute', 'create_playlist', *values)
+		except Exception as error:
+			self.logger.debug(error)
+			raise DbInsertError("Could not create the playlist.", values)
+
+		if not created:
+			raise DbInsertError("A playlist with that name already exists!", values)
+
+	async def delete_playlist(self, title: str, owner_id: str):
+		values = (title, owner_id)
+
+		playlist_id = await self.get_playlist_id(title, owner_id)
+		if playlist_id is None:
+			raise DbInsertError("No playlist with that name exists!", values)
+
+		try:
+			await self.run('execute', 'delete_playlist', playlist_id)
+		except Exception as error:
+			self.logger.debug(error)
+			raise DbInsertError("Could not delete the playlist.", values)
+
+	async def get_titles_in_playlist(
+		self,
+		playlist_title: str,
+		owner_id: str
+	) -> Union[List[str], None]:
+		playlist_id = await self.get_playlist_id(playlist_title, owner_id)
+		if playlist_id is None:
+			return None
+
+		rows = await self.run('fetch', 'get_titles_in_playlist', playlist_id)
+		return [row['title'] for row in rows] or None
+
+	async def get_songs_in_playlist(
+		self,
+		playlist_title: str,
+		owner_id: str
+	) -> Union[List[str], None]:
+		playlist_id = await self.get_playlist_id(playlist_title, owner_id)
+		if playlist_id is None:
+			return None
+
+		rows = await self.run('fetch', 'get_songs_in_playlist', playlist_id)
+		return [row['url'] for row in rows] or None
+
+	async def get_playlist_songs(
+		self,
+		playlist_title: str,
+		owner_id: str,
+		index: int = None
+	) -> Union[List[Dict[str, Any]], None]:
+		if index is not None and index < 1:
+			return None
+
+		playlist_id = await self.get_playlist_id(playlist_title, owner_id)
+		if playlist_id is None:
+			return None
+
+		# A negative limit means no limit.
+		offset, limit = (0, -1) if index is None else (index - 1, 1)
+		rows = await self.run('fetch', 'get_playlist_songs', playlist_id, limit, offset)
+		return [dict(row) for row in rows] or None
+
+	async def set_song_metadata(self, songs: List[Song]):
+		# One transaction rather than one per song.
+		async with self.transaction() as conn:
+			await conn.executemany(
+				STATEMENTS['set_song_metadata'],
+				[
+					(
+						song.url, youtube_id(song.url, song.video_id), song.duration, song.file,
+						song.title, song.thumbnail
+					)
+					for song in songs
+				]
+			)
+
+	async def get_stale_songs(
+		self,
+		after_id: int,
+		max_age: float,
+		limit: int
+	) -> List[Tuple[int, str]]:
+		rows = await self.run('fetch', 'get_stale_songs', after_id, max_age, limit)
+		return [(row['song_id'], row['url']) for row in rows]
+
+	async def mark_unavailable(self, urls: List[str]):
+		async with self.transaction() as conn:
+			await conn.executemany(STATEMENTS['mark_unavailable'], [(url,) for url in urls])
+
+	async def get_song_from(
+		self,
+		index: int,
+		playlist_title: str,
+		owner_id: str
+	) -> Union[str, None]:
+		if index < 1:
+			return None
+
+		playlist_id = await self.get_playlist_id(playlist_title, owner_id)
+		if playlist_id is None:
+			return None
+
+		return await self.run('fetchval', 'get_song_from', playlist_id, index - 1)
+
+	async def find_songs(
+		self,
+		owner_id: str,
+		text: str,
+		playlist_title: str = None,
+		limit: int = FIND_LIMIT
+	) -> List[Dict[str, Union[str, int]]]:
+		query = fts_query(text)
+		if query is None:
+			return list()
+
+		rows = await self.run('fetch', 'find_songs', owner_id, query, playlist_title, limit)
+		return [dict(row) for row in rows]
+
+	async def add_song_to_playlist(
+		self,
+		song: Song,
+		playlist_title: str,
+		user_id: str
+	) -> Tuple[bool, bool]:
+		added, created = await self.import_songs([song], playlist_title, user_id)
+		return (added > 0, created)
+
+	async def import_songs(
+		self,
+		songs: List[Song],
+		playlist_title: str,
+		user_id: str
+	) -> Tuple[int, bool]:
+		try:
+			async with self.transaction() as conn:
+				created = await self.run(
+					'execute', 'create_playlist', playlist_title, user_id, conn=conn
+				)
+				playlist_id = await self.run(
+					'fetchval', 'get_playlist_id', playlist_title, user_id, conn=conn
+				)
+
+				# Saved under the videos' canonical URL, see song.canonical_url.
+				urls = [canonical_url(song.url, song.video_id) for song in songs]
+				await conn.executemany(
+					STATEMENTS['insert_song'],
+					[
+						(
+							song.title, url, song.thumbnail,
+							youtube_id(song.url, song.video_id), song.duration, song.file
+						)
+						for song, url in zip(songs, urls)
+					]
+				)
+
+				# The rows changed by the statements only, not by the triggers.
+				async with conn.executemany(
+					STATEMENTS['match_song'],
+					[(playlist_id, POSITION_GAP, url) for url in urls]
+				) as cursor:
+					added = cursor.rowcount
+
+		except Exception as error:
+			self.logger.error("Could not add the songs to the playlist.")
+			self.logger.debug(f"Unexpected exception:\n{error}")
+			raise DbInsertError("An error occured while adding the songs.")
+
+		return (added, created > 0)
+
+	async def export_playlist(
+		self,
+		title: str,
+		owner_id: str
+	) -> Union[List[Dict[str, str]], None]:
+		playlist_id = await self.get_playlist_id(title, owner_id)
+		if playlist_id is None:
+			return None
+
+		rows = await self.run('fetch', 'export_playlist', playlist_id)
+		return [dict(row) for row in rows] or None
+
+	async def remove_song_from(
+		self,
+		title: str,
+		owner_id: str,
+		index: int,
+		version: int = None
+	):
+		try:
+			await self.remove_songs_from(title, owner_id, index, index, version)
+		except NotFoundError:
+			raise NotFoundError(
+				"Can't remove a song that's not in the playlist.",
+				f"title: {title}",
+				f"index: {index}"
+			)
+
+	async def remove_songs_from(
+		self,
+		title: str,
+		owner_id: str,
+		start: int,
+		end: int,
+		version: int = None
+	) -> int:
+		playlist_id = await self.get_playlist_id(title, owner_id)
+		if playlist_id is None or start < 1 or end < start:
+			raise NotFoundError(
+				"Can't remove songs that are not in the playlist.",
+				f"title: {title}",
+				f"start: {start}",
+				f"end: {end}"
+			)
+
+		try:
+			async with self.transaction() as conn:
+				await self.check_version(playlist_id, version, conn)
+				count = await self.run(
+					'execute', 'remove_songs_from', playlist_id, start - 1, end - start + 1,
+					conn=conn
+				)
+		except ConflictError:
+			raise
+		except Exception as error:
+			self.logger.debug(error)
+			raise DbInsertError(
+				"Could not remove songs from playlist.",
+				f"start: {start}",
+				f"end: {end}",
+				f"title: {title}",
+				f"owner_id: {owner_id}"
+			)
+
+		if not count:
+			raise NotFoundError(
+				"Can't remove songs that are not in the playlist.",
+				f"title: {title}",
+				f"start: {start}",
+				f"end: {end}"
+			)
+
+		return count
+
+	async def move_song(
+		self,
+		title: str,
+		owner_id: str,
+		index: int,
+		new_index: int,
+		version: int = None
+	):
+		playlist_id = await self.get_playlist_id(title, owner_id)
+		if playlist_id is None or index < 1:
+			raise NotFoundError(
+				"Can't move a song that's not in the playlist.",
+				f"title: {title}",
+				f"index: {index}"
+			)
+
+		new_index = max(new_index, 1)
+		if new_index == index:
+			return
+
+		try:
+			async with self.transaction() as conn:
+				await self.check_version(playlist_id, version, conn)
+				rows = await self.run('fetch', 'get_positions', playlist_id, conn=conn)
+				if index > len(rows):
+					raise NotFoundError(
+						"Can't move a song that's not in the playlist.",
+						f"title: {title}",
+						f"index: {index}"
+					)
+
+				song_id = rows[index - 1]['song_id']
+				others = [row['position'] for row in rows if row['song_id'] != song_id]
+
+				position = position_between(others, new_index)
+				if position is None:
+					# No room between the neighbours: renumber and try again.
+					values = [
+						(rank * POSITION_GAP, playlist_id, row['song_id'])
+						for rank, row in enumerate(rows, start=1)
+					]
+					await conn.executemany(STATEMENTS['set_position'], values)
+					others = [position for position, _, other in values if other != song_id]
+					position = position_between(others, new_index)
+
+				await self.run(
+					'execute', 'set_position', position, playlist_id, song_id, conn=conn
+				)
+
+		except (ConflictError, NotFoundError):
+			raise
+		except Exception as error:
+			self.logger.debug(error)
+			raise DbInsertError(
+				"Could not move the song.",
+				f"title: {title}",
+				f"owner_id: {owner_id}",
+				f"index: {index}",
+				f"new_index: {new_index}"
+			)
+
+
+def position_between(others: List[int], new_index: int) -> Union[int, None]:
+	"""
+	Get the position of a song moved to an index.
+
+	:param others:
+		The positions of the other songs of the playlist, in order.
+	:type others: List[int]
+
+	:param new_index:
+		The index of the song once moved, starting at 1. Past the end, the song is last.
+	:type new_index: int
+
+	:return:
+		The position halfway between the song's new neighbours,
+		None if there is no room left between them.
+	:rtype: Union[int, None]
+	"""
+
+	index = min(new_index, len(others) + 1) - 1
+	before = others[index - 1] if index > 0 else 0
+
+	if index == len(others):
+		return before + POSITION_GAP
+
+	after = others[index]
+	if after - before < 2:
+		return None
+
+	return (before + after) // 2
+
+
+def fts_query(text: str) -> Union[str, None]:
+	"""
+	Turn what a user typed into an FTS5 query matching the titles that contain
+	words starting with each of the words typed.
+
+	:param text:
+		The text to search for.
+	:type text: str
+
+	:return:
+		The query, None if the text has no word.
+	:rtype: Union[str, None]
+	"""
+
+	# Quoted, the words can't be read as FTS5 operators.
+	words = re.findall(r'\w+', text)
+	if not words:
+		return None
+
+	return ' '.join(f'"{word}"*' for word in words)
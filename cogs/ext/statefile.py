@@ -0,0 +1,202 @@
+# CroissantBot/cogs/ext/statefile.py
+
+"""
+JSON files holding the state of a cog, such as the kill counts of the Misc cog.
+
+A :py:class:`StateFile` keeps its state in memory: a change only marks it dirty,
+and the changes made within :py:data:`WRITE_DELAY` seconds are saved by a single
+write. Files are replaced with :py:func:`write_atomic`, so they are never left
+half-written, and :py:func:`flush_all` saves every pending change before the bot exits.
+"""
+
+# The MIT License (MIT)
+
+# Copyright (c) 2021-present JulioLoayzaM
+
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import aiofiles
+import asyncio
+import json
+import logging
+import os
+import weakref
+
+from typing import Any, Callable, Union
+
+
+# In seconds, how long a change waits for others to be saved with it.
+WRITE_DELAY = 5.0
+
+# Every StateFile, for flush_all.
+_state_files: weakref.WeakSet = weakref.WeakSet()
+
+
+def _write_file(path: str, content: str):
+	tmp = f"{path}.tmp"
+	with open(tmp, 'w') as file:
+		file.write(content)
+		file.flush()
+		os.fsync(file.fileno())
+	os.replace(tmp, path)
+
+
+async def write_atomic(path: str, content: str):
+	"""
+	Replace the content of a file: it is written to a temporary file first,
+	which then takes the place of the file. A crash while writing leaves the
+	previous content untouched.
+
+	:param path:
+		The path of the file.
+	:type path: str
+
+	:param content:
+		The new content.
+	:type content: str
+	"""
+	loop = asyncio.get_running_loop()
+	await loop.run_in_executor(None, _write_file, path, content)
+
+
+class StateFile():
+	"""
+	A JSON state saved in a file, at most once every `delay` seconds.
+	Change :py:attr:`state` in place, then call :py:meth:`mark_dirty`.
+
+	:param path:
+		The path of the file.
+	:type path: str
+
+	:param logger_name:
+		The name of the logger to use.
+	:type logger_name: str
+
+	:param delay:
+		In seconds, how long to wait after a change before saving the state.
+	:type delay: float
+	"""
+
+	def __init__(self, path: str, logger_name: str, delay: float = WRITE_DELAY):
+		self.path = path
+		self.logger = logging.getLogger(logger_name)
+		self.delay = delay
+		self.state: Any = None
+		# Whether the state changed since it was last saved.
+		self.dirty = False
+		self.writes = 0
+		self.timer: Union[asyncio.Task, None] = None
+		self.lock = asyncio.Lock()
+		_state_files.add(self)
+
+	async def load(self, default: Callable[[], Any] = dict) -> Any:
+		"""
+		Read the state from the file, if not done yet.
+		A missing or empty file gives the default state.
+
+		:param default:
+			Returns the default state, an empty dict by default.
+		:type default: Callable[[], Any]
+
+		:return:
+			The state.
+		"""
+
+		async with self.lock:
+
+			if self.state is None:
+				try:
+					async with aiofiles.open(self.path, 'r') as file:
+						content = await file.read()
+				except FileNotFoundError:
+					content = ''
+
+				self.state = json.loads(content) if content else default()
+
+			return self.state
+
+	def mark_dirty(self):
+		"""
+		Save the state in :py:attr:`delay` seconds, with the other changes made until then.
+		"""
+
+		self.dirty = True
+		if self.timer is None:
+			self.timer = asyncio.get_running_loop().create_task(self._flush_later())
+
+	async def _flush_later(self):
+		await asyncio.sleep(self.delay)
+		self.timer = None
+		await self.flush()
+
+	async def flush(self) -> bool:
+		"""
+		Save the state now if it changed. On failure, it stays dirty
+		and is saved with the next change.
+
+		:return:
+			Whether the state is saved.
+		:rtype: bool
+		"""
+
+		async with self.lock:
+
+			if not self.dirty:
+				return True
+
+			content = json.dumps(self.state)
+			self.dirty = False
+
+			try:
+				await write_atomic(self.path, content)
+			except Exception as e:
+				self.dirty = True
+				self.logger.error(f"Could not save \"{self.path}\".")
+				self.logger.debug(f"Unexpected exception:\n{e}")
+				return False
+
+			self.writes += 1
+			return True
+
+	async def close(self) -> bool:
+		"""
+		Cancel the pending save and save the state now, see :py:meth:`flush`.
+		"""
+
+		if self.timer is not None:
+			self.timer.cancel()
+			self.timer = None
+
+		return await self.flush()
+
+
+async def flush_all() -> bool:
+	"""
+	Save the pending changes of every :py:class:`StateFile`, see :py:meth:`StateFile.close`.
+
+	:return:
+		Whether every state is saved.
+	:rtype: bool
+	"""
+
+	saved = True
+	for state_file in list(_state_files):
+		saved = await state_file.close() and saved
+
+	return saved
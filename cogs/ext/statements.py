@@ -0,0 +1,228 @@
+# CroissantBot/cogs/ext/statements.py
+
+"""
+A registry of the named SQL statements used by a :py:class:`db.DatabaseConnection`.
+
+The statements are prepared once per pooled connection, when the pool opens it,
+and reused for every call. The registry also counts the calls to each statement
+and how long they took, to see which queries take the most database time.
+Queries run without being registered are counted under their :py:func:`fingerprint`.
+"""
+
+# The MIT License (MIT)
+
+# Copyright (c) 2021-present JulioLoayzaM
+
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import re
+
+from typing import Any, Dict, List, Union
+
+from cogs.ext.tracing import LatencyHistogram
+
+
+# Quoted strings, then numbers that aren't part of a name or a $n parameter.
+LITERALS = re.compile(r"'(?:[^']|'')*'|(?<![\w$])\d+(?:\.\d+)?")
+
+
+def fingerprint(query: str) -> str:
+	"""
+	Get the shape of a query, to group the calls to the same query and log it without
+	the values it contains: literals are replaced by ``?`` and whitespace is collapsed.
+
+	:param query:
+		The SQL of the query.
+	:type query: str
+
+	:return:
+		The fingerprint.
+	:rtype: str
+	"""
+	return " ".join(LITERALS.sub("?", query).split())
+
+
+class StatementStats():
+	"""
+	The calls to a statement and their duration.
+	"""
+
+	def __init__(self):
+		self.calls = 0
+		self.errors = 0
+		# Calls slower than the threshold of the DatabaseConnection.
+		self.slow = 0
+		# In seconds.
+		self.total_time = 0.0
+		self.max_time = 0.0
+		self.histogram = LatencyHistogram()
+
+	def record(self, elapsed: float, error: bool = False, slow: bool = False):
+		"""
+		Count a call.
+
+		:param elapsed:
+			How long the call took, in seconds.
+		:type elapsed: float
+
+		:param error:
+			Whether the call failed.
+		:type error: bool
+
+		:param slow:
+			Whether the call was logged as slow.
+		:type slow: bool
+		"""
+		self.calls += 1
+		self.errors += int(error)
+		self.slow += int(slow)
+		self.total_time += elapsed
+		self.max_time = max(self.max_time, elapsed)
+		self.histogram.record(elapsed)
+
+	def to_dict(self) -> Dict[str, Union[int, float]]:
+		"""
+		:return:
+			The stats, times in milliseconds.
+		:rtype: Dict[str, Union[int, float]]
+		"""
+
+		average = self.total_time / self.calls if self.calls else 0.0
+
+		return {
+			'calls': self.calls,
+			'errors': self.errors,
+			'slow': self.slow,
+			'total_ms': round(self.total_time * 1000, 2),
+			'average_ms': round(average * 1000, 3),
+			'p50_ms': round(self.histogram.percentile(0.50) * 1000, 3),
+			'p95_ms': round(self.histogram.percentile(0.95) * 1000, 3),
+			'p99_ms': round(self.histogram.percentile(0.99) * 1000, 3),
+			'max_ms': round(self.max_time * 1000, 3)
+		}
+
+
+class StatementRegistry():
+	"""
+	Named SQL statements, prepared once per connection.
+
+	They are kept in the statement cache of each asyncpg connection, the proxies of a pool
+	forwarding to the connection they wrap: a statement prepared on a connection is never
+	given to another, and is prepared again if the cache evicted it. A
+	``PreparedStatement`` can't be kept between calls, asyncpg refuses to run it once its
+	connection went back to the pool.
+	"""
+
+	def __init__(self):
+		self.queries: Dict[str, str] = dict()
+		self.stats: Dict[str, StatementStats] = dict()
+
+	def register(self, name: str, query: str) -> str:
+		"""
+		Add a statement to the registry. Registering a name again replaces its query.
+
+		:param name:
+			The name of the statement.
+		:type name: str
+
+		:param query:
+			The SQL of the statement.
+		:type query: str
+
+		:return:
+			The query.
+		:rtype: str
+		"""
+
+		if self.queries.get(name) != query:
+			self.queries[name] = query
+			self.stats[name] = StatementStats()
+
+		return query
+
+	async def prepare_all(self, conn: Any):
+		"""
+		Prepare every statement on a new connection. Meant to be the pool's `init` hook.
+
+		:param conn:
+			The new connection.
+		:type conn: asyncpg.Connection
+		"""
+
+		for name in self.queries:
+			await self.get(conn, name)
+
+	async def get(self, conn: Any, name: str) -> Any:
+		"""
+		Get a statement prepared on a connection, preparing it if needed.
+		Only valid until the connection is released to the pool.
+
+		:param conn:
+			The connection the statement will run on.
+		:type conn: asyncpg.Connection
+
+		:param name:
+			The name of the statement.
+		:type name: str
+
+		:raises KeyError:
+			Raised when no statement has that name.
+
+		:return:
+			The prepared statement.
+		:rtype: asyncpg.prepared_stmt.PreparedStatement
+		"""
+
+		# Unlike prepare, looks the statement up in the connection's cache first.
+		return await conn._prepare(self.queries[name], use_cache=True)
+
+	def record(self, name: str, elapsed: float, error: bool = False, slow: bool = False):
+		"""
+		Count a call to a statement, see :py:meth:`StatementStats.record`.
+		Names that weren't registered, such as the fingerprints of other queries,
+		get their own stats.
+		"""
+		stats = self.stats.get(name)
+		if stats is None:
+			stats = self.stats[name] = StatementStats()
+		stats.record(elapsed, error, slow)
+
+	def reset(self):
+		"""
+		Drop the stats of every statement, and those of the other queries.
+		"""
+		self.stats = {name: StatementStats() for name in self.queries}
+
+	def summary(self) -> List[Dict[str, Union[str, int, float]]]:
+		"""
+		Get the stats of the statements called at least once.
+
+		:return:
+			The stats of each statement with its name, by decreasing total time.
+		:rtype: List[Dict[str, Union[str, int, float]]]
+		"""
+
+		summary = [
+			{'name': name, **stats.to_dict()}
+			for name, stats in self.stats.items()
+			if stats.calls > 0
+		]
+		summary.sort(key=lambda stats: stats['total_ms'], reverse=True)
+
+		return summary
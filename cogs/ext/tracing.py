@@ -0,0 +1,350 @@
+# CroissantBot/cogs/ext/tracing.py
+
+"""
+Latency tracing for the commands of the :py:mod:`music` cog.
+
+A :py:class:`Trace` times the steps (spans) of a single request, for example the
+download of a song, and the moments (marks) something happens, like the first frame of
+audio being read. When a trace finishes, its :py:class:`Tracer` logs it as one JSON
+record and adds its timings to :py:class:`LatencyHistogram` instances, from which the
+p50/p95/p99 latencies are read.
+"""
+
+# The MIT License (MIT)
+
+# Copyright (c) 2021-present JulioLoayzaM
+
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import json
+import logging
+import math
+import threading
+import time
+
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Sequence, Union
+
+
+# Bucket upper bounds, in seconds: from 1 ms to about 2 min, each 19% wider than the
+# previous one. A percentile is off by at most that much.
+BUCKETS = tuple(0.001 * 2 ** (i / 4) for i in range(69))
+
+# The percentiles reported by LatencyHistogram.summary.
+PERCENTILES = (0.50, 0.95, 0.99)
+
+
+class LatencyHistogram():
+	"""
+	Counts latencies in exponential buckets, using constant memory.
+	Safe to use from several threads.
+
+	:param bounds:
+		The upper bounds of the buckets, in seconds and in increasing order.
+		Latencies above the last one go in an overflow bucket.
+	:type bounds: Sequence[float]
+	"""
+
+	def __init__(self, bounds: Sequence[float] = BUCKETS):
+		self.bounds = tuple(bounds)
+		self.counts: List[int] = [0] * (len(self.bounds) + 1)
+		self.count = 0
+		self.total = 0.0
+		self.max = 0.0
+		self.lock = threading.Lock()
+
+	def record(self, seconds: float):
+		"""
+		Add a latency to the histogram.
+
+		:param seconds:
+			The latency, in seconds.
+		:type seconds: float
+		"""
+
+		index = 0
+		# Binary search of the first bound greater than or equal to seconds.
+		high = len(self.bounds)
+		while index < high:
+			middle = (index + high) // 2
+			if self.bounds[middle] < seconds:
+				index = middle + 1
+			else:
+				high = middle
+
+		with self.lock:
+			self.counts[index] += 1
+			self.count += 1
+			self.total += seconds
+			self.max = max(self.max, seconds)
+
+	def percentile(self, fraction: float) -> float:
+		"""
+		Get a percentile of the recorded latencies.
+
+		:param fraction:
+			The percentile, between 0 and 1: 0.95 for p95.
+		:type fraction: float
+
+		:return:
+			The upper bound of the bucket the percentile falls in, capped at the highest
+			latency recorded. 0 if nothing was recorded.
+		:rtype: float
+		"""
+
+		with self.lock:
+			if self.count == 0:
+				return 0.0
+
+			rank = max(1, math.ceil(fraction * self.count))
+			seen = 0
+			for index, count in enumerate(self.counts):
+				seen += count
+				if seen >= rank:
+					break
+
+			if index == len(self.bounds):
+				return self.max
+			return min(self.bounds[index], self.max)
+
+	def summary(self) -> Dict[str, float]:
+		"""
+		:return:
+			The count, mean, max and :py:data:`PERCENTILES` of the latencies, in seconds.
+		:rtype: Dict[str, float]
+		"""
+
+		result = {
+			'count': self.count,
+			'mean': self.total / self.count if self.count else 0.0,
+			'max': self.max
+		}
+		for fraction in PERCENTILES:
+			result[f"p{int(fraction * 100)}"] = self.percentile(fraction)
+
+		return result
+
+
+class Trace():
+	"""
+	The timings of a single request.
+
+	Spans and marks can be added from any thread, the trace is recorded once, by the
+	first call to :py:meth:`finish`. A trace without tracer records nothing, which lets
+	functions accept an optional trace without checking for None.
+
+	:param name:
+		The name of the request, for example the command's name.
+	:type name: str
+
+	:param tracer:
+		The tracer recording the trace when it finishes.
+	:type tracer: Union[Tracer, None]
+
+	:param fields:
+		Anything else to include in the logged record.
+	"""
+
+	def __init__(self, name: str, tracer: Union['Tracer', None] = None, **fields):
+		self.name = name
+		self.tracer = tracer
+		self.fields = fields
+		self.start = time.perf_counter()
+		# Durations of the spans and offsets of the marks from the start, in seconds.
+		self.spans: Dict[str, float] = dict()
+		self.marks: Dict[str, float] = dict()
+		self.status: Union[str, None] = None
+		self.duration: Union[float, None] = None
+		self.lock = threading.Lock()
+
+	@property
+	def finished(self) -> bool:
+		"""
+		Whether the trace was already recorded.
+		"""
+		return self.status is not None
+
+	@contextmanager
+	def span(self, name: str) -> Iterator[None]:
+		"""
+		Time the code in a with block, await included. Repeated spans add up.
+
+		:param name:
+			The name of the span.
+		:type name: str
+		"""
+
+		start = time.perf_counter()
+		try:
+			yield
+		finally:
+			elapsed = time.perf_counter() - start
+			with self.lock:
+				self.spans[name] = self.spans.get(name, 0.0) + elapsed
+
+	def mark(self, name: str):
+		"""
+		Note the time since the start of the trace. Only the first mark of a name is kept.
+
+		:param name:
+			The name of the mark.
+		:type name: str
+		"""
+
+		elapsed = time.perf_counter() - self.start
+		with self.lock:
+			self.marks.setdefault(name, elapsed)
+
+	def finish(self, status: str = 'ok'):
+		"""
+		End the trace and have it recorded. Does nothing if it already finished.
+
+		:param status:
+			How the request ended, 'ok' by default.
+		:type status: str
+		"""
+
+		with self.lock:
+			if self.status is not None:
+				return
+			self.status = status
+			self.duration = time.perf_counter() - self.start
+
+		if self.tracer is not None:
+			self.tracer.record(self)
+
+	def to_record(self) -> Dict:
+		"""
+		:return:
+			The trace as a JSON serializable dict, with times in milliseconds.
+		:rtype: Dict
+		"""
+
+		with self.lock:
+			return {
+				'trace': self.name,
+				'status': self.status,
+				'total_ms': round((self.duration or 0.0) * 1000, 1),
+				'spans': {name: round(value * 1000, 1) for name, value in self.spans.items()},
+				'marks': {name: round(value * 1000, 1) for name, value in self.marks.items()},
+				**self.fields
+			}
+
+
+class Tracer():
+	"""
+	Creates traces, logs them and aggregates their timings.
+
+	Each trace name gets a histogram per span and mark, plus one named 'total' for the
+	duration of the requests that ended with the status 'ok'. The duration of the others
+	is recorded by status, for example under 'total_error'.
+
+	:param logger_name:
+		The name of the logger to use.
+	:type logger_name: str
+	"""
+
+	def __init__(self, logger_name: str):
+		self.logger = logging.getLogger(logger_name)
+		# trace name -> span or mark name -> histogram
+		self.histograms: Dict[str, Dict[str, LatencyHistogram]] = dict()
+		self.lock = threading.Lock()
+
+	def start(self, name: str, **fields) -> Trace:
+		"""
+		Start a trace recorded by this tracer.
+
+		:param name:
+			The name of the request.
+		:type name: str
+
+		:param fields:
+			Anything else to include in the logged record.
+
+		:return:
+			The new trace.
+		:rtype: Trace
+		"""
+		return Trace(name, self, **fields)
+
+	def histogram(self, trace_name: str, name: str) -> LatencyHistogram:
+		"""
+		Get a histogram, creating it if needed.
+
+		:param trace_name:
+			The name of the traces.
+		:type trace_name: str
+
+		:param name:
+			The name of the span or mark, or 'total' followed by the status if not 'ok'.
+		:type name: str
+
+		:return:
+			The histogram.
+		:rtype: LatencyHistogram
+		"""
+
+		with self.lock:
+			histograms = self.histograms.setdefault(trace_name, dict())
+			if name not in histograms:
+				histograms[name] = LatencyHistogram()
+			return histograms[name]
+
+	def record(self, trace: Trace):
+		"""
+		Log a finished trace and add its timings to the histograms.
+
+		:param trace:
+			The trace, called by :py:meth:`Trace.finish`.
+		:type trace: Trace
+		"""
+
+		record = trace.to_record()
+		self.logger.debug(f"trace {json.dumps(record, default=str)}")
+
+		total = 'total' if trace.status == 'ok' else f"total_{trace.status}"
+		self.histogram(trace.name, total).record(trace.duration)
+		for name, value in list(trace.spans.items()) + list(trace.marks.items()):
+			self.histogram(trace.name, name).record(value)
+
+	def summary(self, trace_name: str) -> Dict[str, Dict[str, float]]:
+		"""
+		Get the latencies of a kind of trace.
+
+		:param trace_name:
+			The name of the traces.
+		:type trace_name: str
+
+		:return:
+			The summary of each histogram, by span or mark name, see
+			:py:meth:`LatencyHistogram.summary`. Empty if no trace was recorded.
+		:rtype: Dict[str, Dict[str, float]]
+		"""
+
+		with self.lock:
+			histograms = dict(self.histograms.get(trace_name, dict()))
+
+		return {name: histogram.summary() for name, histogram in histograms.items()}
+
+	def reset(self):
+		"""
+		Drop all the recorded latencies.
+		"""
+		with self.lock:
+			self.histograms.clear()
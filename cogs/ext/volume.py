@@ -0,0 +1,168 @@
+# CroissantBot/cogs/ext/volume.py
+
+"""
+Volume transform for the PCM frames played by the :py:mod:`music` cog.
+
+discord.py's ``PCMVolumeTransformer`` relies on ``audioop``, which was removed in
+Python 3.13. This module provides :py:class:`VolumeScaler`, which does the same
+with NumPy on preallocated buffers, and ramps volume changes to avoid clicks.
+"""
+
+# The MIT License (MIT)
+
+# Copyright (c) 2021-present JulioLoayzaM
+
+# Permission is hereby granted, free of charge, to any person obtaining a
+# copy of this software and associated documentation files (the "Software"),
+# to deal in the Software without restriction, including without limitation
+# the rights to use, copy, modify, merge, publish, distribute, sublicense,
+# and/or sell copies of the Software, and to permit persons to whom the
+# Software is furnished to do so, subject to the following conditions:
+
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS
+# OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+# DEALINGS IN THE SOFTWARE.
+
+import numpy as np
+
+
+# discord.py sends 20 ms frames of 48 kHz, 16-bit stereo audio.
+SAMPLE_RATE = 48000
+CHANNELS = 2
+FRAME_LENGTH = 0.02
+SAMPLES_PER_FRAME = int(SAMPLE_RATE * FRAME_LENGTH)
+
+# Same limit as discord.py's PCMVolumeTransformer.
+MAX_VOLUME = 2.0
+
+
+class VolumeScaler():
+	"""
+	Scales 16-bit PCM frames by a volume.
+
+	The buffers are allocated once, scaling a frame only allocates the returned bytes.
+	When the volume changes, the next frame goes linearly from the old volume to the new
+	one instead of jumping, which would cause an audible click.
+
+	:param volume:
+		The initial volume, 1.0 by default.
+	:type volume: float
+
+	:param samples_per_frame:
+		The number of samples per channel in a frame.
+	:type samples_per_frame: int
+
+	:param channels:
+		The number of interleaved channels.
+	:type channels: int
+
+	:param max_volume:
+		The highest volume, :py:data:`MAX_VOLUME` by default. Higher when the audio was
+		already scaled down, so that scaling it back up isn't limited.
+	:type max_volume: float
+	"""
+
+	def __init__(
+		self,
+		volume: float = 1.0,
+		samples_per_frame: int = SAMPLES_PER_FRAME,
+		channels: int = CHANNELS,
+		max_volume: float = MAX_VOLUME
+	):
+		self.channels = channels
+		self.max_volume = max_volume
+		# The volume to reach, and the one reached at the end of the last frame.
+		self.target = min(max(volume, 0.0), max_volume)
+		self.current = self.target
+		self.allocate(samples_per_frame)
+
+	def allocate(self, samples_per_frame: int):
+		"""
+		(Re)allocates the buffers for frames with `samples_per_frame` samples per channel.
+
+		:param samples_per_frame:
+			The number of samples per channel in a frame.
+		:type samples_per_frame: int
+		"""
+		self.samples_per_frame = samples_per_frame
+		size = samples_per_frame * self.channels
+		self.work = np.empty(size, dtype=np.float32)
+		self.out = np.empty(size, dtype=np.int16)
+		self.gains = np.empty(samples_per_frame, dtype=np.float32)
+		# Goes from 1/n to 1: the last sample of a ramp is at the target volume.
+		self.ramp = np.arange(1, samples_per_frame + 1, dtype=np.float32) / samples_per_frame
+
+	@property
+	def volume(self) -> float:
+		"""
+		The volume to reach, clamped between 0 and :py:attr:`max_volume`.
+		"""
+		return self.target
+
+	@volume.setter
+	def volume(self, value: float):
+		self.target = min(max(value, 0.0), self.max_volume)
+
+	def scale(self, frame: bytes) -> bytes:
+		"""
+		Scales a frame by the current volume.
+
+		:param frame:
+			Interleaved 16-bit little-endian PCM.
+		:type frame: bytes
+
+		:return:
+			The scaled frame. The frame itself if no scaling is needed.
+		:rtype: bytes
+		"""
+
+		target = self.target
+		start = self.current
+
+		if not frame or (start == target == 1.0):
+			self.current = target
+			return frame
+
+		samples = np.frombuffer(frame, dtype=np.int16)
+		size = samples.size
+		per_channel = size // self.channels
+
+		if per_channel > self.samples_per_frame:
+			self.allocate(per_channel)
+
+		out = self.out[:size]
+		# Scaling down can't overflow: write straight to the output, without clipping.
+		no_clip = max(start, target) <= 1.0
+		dest = out if no_clip else self.work[:size]
+
+		if start == target:
+			np.multiply(samples, np.float32(target), out=dest, casting='unsafe')
+
+		else:
+			gains = self.gains[:per_channel]
+			if per_channel == self.samples_per_frame:
+				ramp = self.ramp
+			else:
+				ramp = np.arange(1, per_channel + 1, dtype=np.float32) / per_channel
+			np.multiply(ramp, np.float32(target - start), out=gains)
+			gains += np.float32(start)
+			np.multiply(
+				samples.reshape(per_channel, self.channels),
+				gains[:, None],
+				out=dest.reshape(per_channel, self.channels),
+				casting='unsafe'
+			)
+			self.current = target
+
+		if not no_clip:
+			np.clip(dest, -32768, 32767, out=dest)
+			np.copyto(out, dest, casting='unsafe')
+
+		return out.tobytes()
@@ -24,15 +24,14 @@ FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
 DEALINGS IN THE SOFTWARE.
 """
 
-import aiofiles
-import json
 import os
 
-from typing import List, Dict, Union
+from typing import Union
 
 import discord
 from discord.ext import commands
 
+from cogs.ext.journal import FavouritesJournal, FavouritesStore
 from cogs.music import YTDLSource, MaxDurationError
 
 
@@ -45,7 +44,8 @@ class Favourites(commands.Cog):
 
 	These commands allow users of the bot to have one playlist, which is
 	stored in a JSON file instead of using the Playlist cog that requires the use of a
-	PostgreSQL database.
+	PostgreSQL database. Each user's list has its own file, and the changes
+	are appended to a journal, see :py:class:`journal.FavouritesStore`.
 	"""
 
 	def __init__(
@@ -57,11 +57,27 @@ class Favourites(commands.Cog):
 
 		self.bot = bot
 		self.logger = bot.logger
-		self.flist: Union[Dict, None] = None
 		self.ffile = ffile
+		self.store = FavouritesStore(ffile, bot.logger.name)
 		self.prefix = bot._prefix
 		self.max_duration = max_duration
 
+	async def get_list(self, ctx: commands.Context) -> Union[FavouritesJournal, None]:
+		"""Loads the list of the author of a command if needed.
+
+		Returns:
+			The list, or None if it couldn't be loaded: the user is told so.
+		"""
+
+		try:
+			return await self.store.get(str(ctx.message.author.id))
+
+		except Exception as e:
+			self.logger.error(f"Could not load a list of favourites from \"{self.ffile}\".")
+			self.logger.debug(f"Unexpected exception:\n{e}")
+			await ctx.send("A problem occurred while loading your list, please try again.")
+			return None
+
 	@commands.group(
 		name="favourites",
 		aliases=["fav", "favorites"],
@@ -70,41 +86,15 @@ class Favourites(commands.Cog):
 	async def favourites(self, ctx: commands.Context):
 		"""Base command for managing favourite songs.
 
-		Loads the list of favourites from FAV_LIST_FILE during the first call.
+		The list of a user is loaded by the first subcommand that needs it.
 		"""
 
-		# First verify a subcommand has been used.
+		# Verify a subcommand has been used.
 		if ctx.invoked_subcommand is None:
 			await ctx.send("You have to use a subcommand:")
 			await ctx.send_help(self.favourites)
 			return
 
-		FAV_LIST_FILE = self.ffile
-		logger = self.logger
-
-		# TODO: Separate the lists for each user?
-		# Then load the lists if needed.
-		if self.flist is None:
-
-			try:
-				async with aiofiles.open(FAV_LIST_FILE, 'r') as file:
-					content = await file.read()
-
-				self.flist = json.loads(content) if content else dict()
-
-			except IOError as ioe:
-				logger.warning(
-					f"Could not open \"{FAV_LIST_FILE}\", maybe the file doesn't exist: ignoring."
-				)
-				logger.debug(f"IOError:\n{ioe}")
-				self.flist = dict()
-
-			except Exception as e:
-				logger.error(f"Could not load \"{FAV_LIST_FILE}\".")
-				logger.debug(f"Unexpected exception:\n{e}")
-				await ctx.send("A problem occurred while loading your list, please try again.")
-				return
-
 	@favourites.command(
 		name="list",
 		help="Displays your list of favourites songs: if an index is specified, shows that song's info"  # noqa: E501
@@ -117,24 +107,19 @@ class Favourites(commands.Cog):
 			If greater than zero, it displays the song with that index in the list with more info.
 		"""
 
-		FAV_LIST = self.flist
+		journal = await self.get_list(ctx)
+		if journal is None:
+			return
 
 		member: discord.Member = ctx.message.author
-		member_id: str = str(member.id)
+		songs = journal.state
 
-		songs = FAV_LIST.get(member_id, None)
-
-		if songs is not None:
+		if songs:
 
 			name = member.display_name
 			# don't append an s if the last letter of the name is s
 			title = f"{name}' list" if (name[-1] == 's') else f"{name}'s list"
 
-			if len(songs) == 0:
-				em = discord.Embed(title=title, description="Your list is empty.")
-				await ctx.send(embed=em)
-				return
-
 			if index <= 0:
 
 				cpt = 1
@@ -190,7 +175,6 @@ class Favourites(commands.Cog):
 			await ctx.send("You have to provide a URL.")
 			return
 
-		FAV_LIST_FILE = self.ffile
 		logger = self.logger
 
 		try:
@@ -205,19 +189,9 @@ class Favourites(commands.Cog):
 			info['thumbnail'] = song.thumbnail
 
 			member: discord.Member = ctx.message.author
-			member_id: str = str(member.id)
+			journal = await self.store.get(str(member.id))
 
-			songs = self.flist.get(member_id, None)
-
-			if songs is not None:
-				songs.append(info)
-			else:
-				songs = [info]
-				self.flist[member_id] = songs
-
-			dump = json.dumps(self.flist)
-			async with aiofiles.open(FAV_LIST_FILE, 'w') as file:
-				await file.write(dump)
+			await journal.append({'op': 'add', 'song': info})
 
 			em = discord.Embed(
 				description=f"Added \"{info.get('title')}\" to your list.",
@@ -252,13 +226,15 @@ class Favourites(commands.Cog):
 			)
 			return
 
-		FAV_LIST_FILE = self.ffile
 		logger = self.logger
 
-		member_id: str = str(ctx.message.author.id)
-		songs: List[Dict[str, str]] = self.flist.get(member_id, None)
+		journal = await self.get_list(ctx)
+		if journal is None:
+			return
+
+		songs = journal.state
 
-		if songs is None:
+		if not songs:
 			await ctx.send("You haven't saved any songs yet.")
 			return
 
@@ -268,20 +244,25 @@ class Favourites(commands.Cog):
 			)
 			return
 
-		song = songs.pop(index - 1)
-
 		try:
-			dump = json.dumps(self.flist)
-			async with aiofiles.open(FAV_LIST_FILE, 'w') as file:
-				await file.write(dump)
+			# Only removed if it's still the song at that index.
+			url = songs[index - 1].get('url')
+			song = await journal.append({'op': 'remove', 'index': index - 1, 'url': url})
 
 			message = f"Removed \"{song.get('title')}\" from your list."
 			em = discord.Embed(description=message)
 			await ctx.send(embed=em)
 
+		except ValueError:
+			# Another command removed a song in the meantime.
+			await ctx.send(
+				f"Your list changed, use `{self.prefix}favourites list` to check it again."
+			)
+
 		except Exception as e:
 			logger.error("Couldn't save favourites list after removing a song.")
 			logger.debug(f"Exception:\n{e}")
+			await ctx.send("An error occurred while removing the song, please try again.")
 
 	@favourites.command(
 		name="now",
@@ -302,7 +283,6 @@ class Favourites(commands.Cog):
 			return
 
 		BOT_PREFIX = self.prefix
-		FAV_LIST_FILE = self.ffile
 		logger = self.logger
 
 		info = music.info.get(gid)
@@ -310,25 +290,14 @@ class Favourites(commands.Cog):
 
 		if source is not None:
 
-			member_id: str = str(ctx.message.author.id)
-
-			songs = self.flist.get(member_id, None)
-
 			song = dict()
 			song['title'] = source.title
 			song['url'] = source.url
 			song['thumbnail'] = source.thumbnail
 
-			if songs is not None:
-				songs.append(song)
-			else:
-				songs = [song]
-				self.flist[member_id] = songs
-
 			try:
-				dump = json.dumps(self.flist)
-				async with aiofiles.open(FAV_LIST_FILE, 'w') as file:
-					await file.write(dump)
+				journal = await self.store.get(str(ctx.message.author.id))
+				await journal.append({'op': 'add', 'song': song})
 
 				em = discord.Embed(description=f"Added \"{song.get('title')}\"to your list.")
 
@@ -365,12 +334,14 @@ class Favourites(commands.Cog):
 			return
 
 		BOT_PREFIX = self.prefix
-		FAV_LIST = self.flist
 
-		member_id: str = str(ctx.message.author.id)
-		songs = FAV_LIST.get(member_id, None)
+		journal = await self.get_list(ctx)
+		if journal is None:
+			return
+
+		songs = journal.state
 
-		if songs is None:
+		if not songs:
 			await ctx.send(
 				f"You haven't saved a song yet, you can use `{BOT_PREFIX}favourites add <URL>` "
 				f"or `{BOT_PREFIX}favourites now`."
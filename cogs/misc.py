@@ -26,7 +26,6 @@ DEALINGS IN THE SOFTWARE.
 
 import aiofiles
 import random
-import json
 import os
 
 import discord
@@ -34,6 +33,8 @@ from discord.ext import commands
 
 from typing import Dict
 
+from cogs.ext.statefile import StateFile
+
 
 class Misc(commands.Cog):
 	"""Cog for miscellaneous commands.
@@ -53,9 +54,13 @@ class Misc(commands.Cog):
 		self.messages_file = messages_file
 		self.count_file    = count_file
 		self.gif_path      = gif_path
-		self.kcount: Dict[str, Dict[str, Dict[str, int]]] = dict()
+		# Loaded on first use, saved a few seconds after a change.
+		self.kcount = StateFile(count_file, bot.logger.name)
 		self.scount: Dict[str, Dict[str, Dict[str, int]]] = dict()
 
+	async def cog_unload(self):
+		await self.kcount.close()
+
 	@commands.command(
 		name="poggers",
 		hidden=True
@@ -112,10 +117,8 @@ class Misc(commands.Cog):
 		# Note: guild_id, killer_id and victim_id are strings.
 		# For suicide_count, the {victim_id:count} pair is replaced by the suicide count.
 
-		kill_count = self.kcount
 		suicide_count = self.scount
 		KILL_MESSAGES_FILE = self.messages_file
-		KILL_COUNT_FILE = self.count_file
 		logger = self.logger
 
 		if member is None:
@@ -175,12 +178,8 @@ class Misc(commands.Cog):
 						line = line.replace("<victim>", victim_name)
 						await ctx.send(line)
 
-						# If kill_count is empty we load the json copy, which may be empty as well
-						if not kill_count:
-							async with aiofiles.open(KILL_COUNT_FILE, 'r') as file:
-								content = await file.read()
-							if content:
-								kill_count = json.loads(content)
+						# Load the json copy if needed, which may be empty as well
+						kill_count = await self.kcount.load()
 
 						if gid not in kill_count:
 							kill_count[gid] = dict()
@@ -202,11 +201,8 @@ class Misc(commands.Cog):
 							else:
 								killer_count[victim] += 1
 
-						# Save the new count to the file
-						dump = json.dumps(kill_count)
-						logger.debug(dump)
-						async with aiofiles.open(KILL_COUNT_FILE, 'w') as file:
-							await file.write(dump)
+						# Save the new count to the file, with the other kills of the next seconds
+						self.kcount.mark_dirty()
 
 					except IOError as ie:
 						logger.error("Error while updating count.")
@@ -230,25 +226,22 @@ class Misc(commands.Cog):
 			If None, display the whole user's count in that server.
 		"""
 
-		kill_count = self.kcount
 		KILL_COUNT_FILE = self.count_file
 		logger = self.logger
 
-		# Check is kill_count is empty, load from the json if it's the case
-		if not kill_count:
-			try:
-				async with aiofiles.open(KILL_COUNT_FILE, 'r') as f:
-					content = await f.read()
-				if content:
-					kill_count = json.loads(content)
-			except IOError as ie:
-				logger.error(f"Couldn't read {KILL_COUNT_FILE}")
-				logger.debug(f"IOError:\n{ie}")
-				await ctx.send("Error fetching the count, please try again.")
-			except Exception as e:
-				logger.error(f"Couldn't read {KILL_COUNT_FILE}")
-				logger.debug(f"Unexpected exception:\n{e}")
-				await ctx.send("Error fetching the count, please try again.")
+		# Load the kill counts from the json if it's not done yet
+		try:
+			kill_count = await self.kcount.load()
+		except IOError as ie:
+			logger.error(f"Couldn't read {KILL_COUNT_FILE}")
+			logger.debug(f"IOError:\n{ie}")
+			await ctx.send("Error fetching the count, please try again.")
+			return
+		except Exception as e:
+			logger.error(f"Couldn't read {KILL_COUNT_FILE}")
+			logger.debug(f"Unexpected exception:\n{e}")
+			await ctx.send("Error fetching the count, please try again.")
+			return
 
 		killer_name: str = ctx.author.display_name
 		killer_id: str = str(ctx.author.id)
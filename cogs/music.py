@@ -56,10 +56,14 @@ import yt_dlp
 import discord
 from discord.ext import commands
 
+from cogs.ext.idle import IdleScheduler
+from cogs.ext.loudness import LoudnessAnalyzer
 from cogs.ext.songqueue import SongQueue, EmptyQueueError
 from cogs.ext.song import Song
+from cogs.ext.tracing import Trace, Tracer
+from cogs.ext.volume import MAX_VOLUME, VolumeScaler
 
-from typing import Tuple, Union
+from typing import Iterable, Tuple, Union
 
 
 # Colours and string for some coloured output
@@ -84,7 +88,15 @@ class Music(commands.Cog):
 	"""Cog for music related commands.
 	"""
 
-	def __init__(self, bot: commands.Bot, ytdl: yt_dlp.YoutubeDL, max_duration: int):
+	def __init__(
+		self,
+		bot: commands.Bot,
+		ytdl: yt_dlp.YoutubeDL,
+		max_duration: int,
+		idle_timeout: int,
+		pause_timeout: int,
+		loudness: Union[LoudnessAnalyzer, None]
+	):
 
 		self.bot = bot
 		# Template:
@@ -93,14 +105,36 @@ class Music(commands.Cog):
 		# 		channel: discord.TextChannel = None,
 		# 		queue: SongQueue = None,
 		# 		volume: float = 0.5,
-		#		source: discord.AudioSource = None
+		#		source: discord.AudioSource = None,
+		#		humans: int = 0
 		# 	}
 		# }
+		# 'humans' counts the non-bot members in 'channel', it's updated from the
+		# voice state events instead of scanning the channel's members.
 		self.info = dict()
 		self.logger = bot.logger
 		self.ytdl = ytdl
 		# Videos longer than max_duration seconds won't be downloaded
 		self.max_duration = max_duration
+		# Seconds to wait before leaving an empty channel, or a song paused for too long.
+		# A pause_timeout lower than 1 means the bot never leaves because of a pause.
+		self.idle_timeout = idle_timeout
+		self.pause_timeout = pause_timeout
+		# Timers are keyed by (guild_id, reason), reason being 'empty' or 'paused'.
+		self.idle = IdleScheduler(self.on_idle_timeout, "CroissantBot")
+		# Measures the loudness of the songs to normalize them, None if disabled.
+		self.loudness = loudness
+		# Times each play request, from the command to the first frame of audio.
+		self.tracer = Tracer("CroissantBot")
+
+	async def cog_load(self):
+		self.idle.start()
+
+	async def cog_unload(self):
+		self.idle.stop()
+		self.idle.clear()
+		if self.loudness is not None:
+			self.loudness.close()
 
 	async def is_connected(self, ctx: commands.Context) -> bool:
 		"""
@@ -147,7 +181,8 @@ class Music(commands.Cog):
 					'channel': None,
 					'queue': None,
 					'volume': 0.5,
-					'source': None
+					'source': None,
+					'humans': 0
 				}
 
 			current_info = self.info[gid]
@@ -172,6 +207,10 @@ class Music(commands.Cog):
 				_ = await channel.connect()
 				logger.debug(f"{VOICE} Connected to \"{channel}\"")
 
+				# Only time the members are counted, the voice state events keep it updated
+				current_info['humans'] = count_humans(channel.members)
+				self.update_empty_timer(gid)
+
 			except asyncio.TimeoutError as ate:
 				logger.error("Could not connect to voice channel in time.")
 				logger.debug(f"asyncio.TimeoutError:\n{ate}")
@@ -210,6 +249,7 @@ class Music(commands.Cog):
 			await self.stop(ctx, leaving=True)
 
 			self.info[gid]['channel'] = None
+			self.cancel_idle_timers(gid)
 
 			await vc.disconnect()
 
@@ -257,69 +297,114 @@ class Music(commands.Cog):
 
 		query = ' '.join(query)
 		logger = self.logger
-
-		# To avoid clutter, we edit the user's message to suppress the embed
-		msg = ctx.message
-		await msg.edit(suppress=True)
-
 		loop = self.bot.loop or asyncio.get_event_loop()
-
-		# Checks if query is a valid url, if not we search youtube for the query
-		if not await validate_url(query):
-			info = await loop.run_in_executor(
-				None, lambda: self.ytdl.extract_info(f"ytsearch:{query}", download=False)
-			)
-			video = info['entries'][0]
-			query = video['webpage_url']
-
-		# We know the query must be a valid url
-		url = query
+		trace = self.tracer.start('play', guild=ctx.message.guild.id)
+		# Once the song is handed to enqueue, it finishes the trace or the song does.
+		handed_off = False
 
 		try:
-			guild = ctx.message.guild
-			vc = guild.voice_client
+			# To avoid clutter, we edit the user's message to suppress the embed
+			msg = ctx.message
+			with trace.span('message_edit'):
+				await msg.edit(suppress=True)
+
+			with trace.span('validate_url'):
+				is_url = await validate_url(query)
+			trace.fields['search'] = not is_url
+
+			# Checks if query is a valid url, if not we search youtube for the query
+			if not is_url:
+				with trace.span('search'):
+					info = await loop.run_in_executor(
+						None, lambda: self.ytdl.extract_info(f"ytsearch:{query}", download=False)
+					)
+				video = info['entries'][0]
+				query = video['webpage_url']
+
+			# We know the query must be a valid url
+			url = query
 
 			queue = await self.get_queue(ctx)
 
 			if queue is None:
+				trace.finish('not_connected')
 				await ctx.send("The bot is not connected to a voice channel.")
 				return
 
 			song = await YTDLSource.from_url(
-				url, self.max_duration, self.ytdl, loop=self.bot.loop
+				url, self.max_duration, self.ytdl, loop=self.bot.loop, trace=trace
 			)
 
-			queue.push(song)
-
-			# If a song is playing or paused but not stopped, send a message
-			# to indicate the song is queued
-			if vc.is_playing() or vc.is_paused():
-				dem = {
-					"title": "Queued:",
-					"description": f"{song.title} - <{song.url}>",
-					"colour": ctx.author.color
-				}
-				em = discord.Embed.from_dict(dem)
-				em.set_thumbnail(url=song.thumbnail)
-				await ctx.send(embed=em)
-
-			# If no song is playing, we call play_song to start the queue
-			else:
-				await self.play_song(ctx)
+			handed_off = True
+			await self.enqueue(ctx, song, trace)
 
 		except MaxDurationError:
+			trace.finish('too_long')
 			await ctx.send(f"The song is too long (> {int(self.max_duration/60)} min), please try another link.")  # noqa: E501
 
 		except discord.DiscordException as de:
+			trace.finish('error')
 			await ctx.send(f"The bot is not connected to a voice channel, use `{BOT_PREFIX}join`.")
 			logger.warning("The bot is probably not connected to a voice channel.")
 			logger.debug(f"discord.DiscordException: {de}")
 
 		except Exception as e:
+			trace.finish('error')
 			logger.error("Couldn't play song.")
 			logger.debug(f"Unexpected exception: {e}")
 			await ctx.send("An error occurred, please try again.")
 
+		finally:
+			# Cancelled before the song was queued. Does nothing if already finished.
+			if not handed_off:
+				trace.finish('cancelled')
+
+	async def enqueue(self, ctx: commands.Context, song: Song, trace: Trace = None):
+		"""
+		Queues a song whose file is already downloaded, and starts playing the queue
+		if no song is playing. Used by play, and by the Playlist cog to play saved songs
+		without searching them again.
+
+		Parameters:
+			song: The song to queue.
+			trace: The trace of the play request. If None, a new one is started.
+
+		Raises:
+			discord.DiscordException: The bot is not connected to a voice channel.
+		"""
+
+		trace = trace or self.tracer.start('play', guild=ctx.message.guild.id)
+
+		vc = ctx.message.guild.voice_client
+		queue = await self.get_queue(ctx)
+		if queue is None:
+			trace.finish('not_connected')
+			raise discord.ClientException("The bot is not connected to a voice channel.")
+
+		if self.loudness is not None:
+			self.loudness.prepare(song, self.bot.loop)
+
+		queue.push(song)
+
+		# If a song is playing or paused but not stopped, send a message
+		# to indicate the song is queued
+		if vc.is_playing() or vc.is_paused():
+			dem = {
+				"title": "Queued:",
+				"description": f"{song.title} - <{song.url}>",
+				"colour": ctx.author.color
+			}
+			em = discord.Embed.from_dict(dem)
+			em.set_thumbnail(url=song.thumbnail)
+			# The song won't play right away, there is no first frame to wait for.
+			trace.finish('queued')
+			await ctx.send(embed=em)
+
+		# If no song is playing, we call play_song to start the queue
+		else:
+			# The trace finishes when the first frame is read.
+			await self.play_song(ctx, trace)
+
 	@play.before_invoke
 	async def ensure_voice(self, ctx: commands.Context):
 		"""
@@ -329,9 +414,12 @@ class Music(commands.Cog):
 		if ctx.voice_client is None:
 			await self.join(ctx)
 
-	async def play_song(self, ctx: commands.Context):
+	async def play_song(self, ctx: commands.Context, trace: Trace = None):
 		"""
 		Higher function, calls play_next and sends the message it receives.
+
+		Parameters:
+			trace: The trace of the play request, finished when the first frame is read.
 		"""
 
 		logger = self.logger
@@ -339,7 +427,9 @@ class Music(commands.Cog):
 		guild = ctx.message.guild
 		vc: discord.VoiceClient = guild.voice_client
 
-		def play_next() -> Tuple[Union[str, None], Union[discord.Embed, None]]:
+		def play_next(
+			trace: Trace = None
+		) -> Tuple[Union[str, None], Union[discord.Embed, None]]:
 			"""
 			Function in charge of actually playing a song.
 			It assumes three things:
@@ -347,23 +437,33 @@ class Music(commands.Cog):
 				2: if a song is playing and we called play_song anyway, we want to skip the song;
 				3: the bot is actually connected to a voice channel.
 
+			Parameters:
+				trace: The trace of the play request that started the queue, if any.
+
 			Returns:
 				First: An error message if an error occured, None otherwise.
 				Second: None if an error occured, an Embed with the song info otherwise.
 			"""
 
+			# Songs started by the after callback aren't traced: a trace without
+			# tracer records nothing.
+			if trace is None:
+				trace = Trace('play')
+
 			# Have to manually get the queue
 			gid = ctx.message.guild.id
 			queue: SongQueue = self.info[gid]['queue']
 
 			if queue is None:
 				logger.warning("No queue")
+				trace.finish('error')
 				return "Error: no queue", None
 
 			song = queue.pop()
 			# If song is None, it means that the queue is empty
 			if song is None:
 				vc.stop()
+				trace.finish('empty_queue')
 				return f"The queue is empty, use `{BOT_PREFIX}play`", None
 
 			# Skipping a song if one is playing or paused
@@ -386,11 +486,14 @@ class Music(commands.Cog):
 			em = discord.Embed.from_dict(dem)
 			em.set_thumbnail(url=song.thumbnail)
 
-			source = YTDLSource(
-				discord.FFmpegPCMAudio(source=song.file),
-				song=song,
-				volume=self.info[gid]['volume']
-			)
+			volume = self.info[gid]['volume']
+			# Spawning FFmpeg happens in FFmpegPCMAudio's constructor.
+			with trace.span('ffmpeg_spawn'):
+				ffmpeg = discord.FFmpegPCMAudio(
+					source=song.file,
+					options=YTDLSource.ffmpeg_options(song, volume)
+				)
+			source = YTDLSource(ffmpeg, song=song, volume=volume, trace=trace)
 			self.info[gid]['source'] = source
 
 			try:
@@ -399,11 +502,12 @@ class Music(commands.Cog):
 			except Exception as e:
 				logger.error("Couldn't play song.")
 				logger.debug(f"Unexpected exception:\n{e}")
+				trace.finish('error')
 
 			return None, em
 
 		async with ctx.typing():
-			res, em = play_next()
+			res, em = play_next(trace)
 
 		if em is None:
 			await ctx.send(res)
@@ -425,6 +529,8 @@ class Music(commands.Cog):
 
 			if voice_client.is_playing():
 				voice_client.pause()
+				if self.pause_timeout > 0:
+					self.idle.schedule((ctx.message.guild.id, 'paused'), self.pause_timeout)
 
 			else:
 				await ctx.send(f"The bot is not currently playing something, try `{BOT_PREFIX}play`")
@@ -456,6 +562,7 @@ class Music(commands.Cog):
 			# If paused, resume
 			elif voice_client.is_paused():
 				voice_client.resume()
+				self.idle.cancel((ctx.message.guild.id, 'paused'))
 
 			# if not paused, restart the queue
 			elif not queue.is_empty():
@@ -499,6 +606,7 @@ class Music(commands.Cog):
 
 			vc.stop()  # does it raise an exception if not playing?
 			queue.clear()
+			self.idle.cancel((gid, 'paused'))
 
 			if leaving:
 				self.info[gid]['queue'] = None
@@ -521,6 +629,8 @@ class Music(commands.Cog):
 		if not self.info:
 			return False
 
+		self.idle.clear()
+
 		# MAYBE: remove stop and disconnect since bot.close calls disconnect
 		# and disconnect calls stop.
 		for gid in self.info:
@@ -580,6 +690,7 @@ class Music(commands.Cog):
 				# since playing the next song implies popping that song.
 				queue.skip(index - 1)
 				vc.stop()
+				self.idle.cancel((ctx.message.guild.id, 'paused'))
 				if queue.is_empty():
 					gid = ctx.message.guild.id
 					self.info[gid]['source'] = None
@@ -834,6 +945,62 @@ class Music(commands.Cog):
 		else:
 			await ctx.send("The bot is not currently playing something.")
 
+	@commands.command(
+		name="play_latency",
+		help="Shows the latency percentiles of the play command",
+		hidden=True
+	)
+	@commands.is_owner()
+	async def play_latency(self, ctx: commands.Context, reset: bool = False):
+		"""
+		Sends the p50/p95/p99 latencies of each step of the play command since the cog
+		was loaded. 'first_frame' is the time from the command to the first frame of audio.
+
+		Parameters:
+			reset: Whether to drop the latencies after sending them.
+		"""
+
+		summary = self.tracer.summary('play')
+
+		if not summary:
+			await ctx.send("No play request was traced yet.")
+			return
+
+		# 'total' only has the songs that played, the other requests are by status.
+		requests = sum(
+			stats['count'] for name, stats in summary.items() if name.startswith('total')
+		)
+
+		em = discord.Embed(
+			title="Play latency",
+			description=f"In ms, over {requests} requests: p50 / p95 / p99",
+			colour=discord.Colour.blue()
+		)
+
+		# Steps in the order they happen, then anything else.
+		order = [
+			'message_edit', 'validate_url', 'search', 'metadata', 'download',
+			'ffmpeg_spawn', 'first_frame', 'total'
+		]
+		names = [name for name in order if name in summary]
+		names += sorted(name for name in summary if name not in order)
+
+		for name in names:
+			stats = summary[name]
+			em.add_field(
+				name=f"{name} ({stats['count']})",
+				value=" / ".join(
+					f"{stats[p] * 1000:.0f}" for p in ('p50', 'p95', 'p99')
+				),
+				inline=False
+			)
+
+		if reset:
+			self.tracer.reset()
+			em.set_footer(text="The latencies were reset.")
+
+		await ctx.send(embed=em)
+
 	@commands.command(
 		aliases=['mh'],
 		help="Moves the bot to your voice channel if the bot's current channel is empty"
@@ -862,21 +1029,18 @@ class Music(commands.Cog):
 			return
 
 		vc = ctx.message.guild.voice_client
-		channel = vc.channel
-		members = channel.members
 
-		empty = True
 		# We ignore bots, the channel is not empty if there's a non-bot user connected
-		for member in members:
-			if not member.bot:
-				await ctx.send("The bot's current channel is not empty, can't move it.")
-				empty = False
-				break
+		if self.info[gid]['humans'] > 0:
+			await ctx.send("The bot's current channel is not empty, can't move it.")
+			return
 
-		if empty:
-			await vc.move_to(user_channel)
-			self.info[gid]['channel'] = user_channel
-			await ctx.send(f"Moved the bot to {user_channel.name}")
+		# Update the channel first: the voice state event of the move is then ignored.
+		self.info[gid]['channel'] = user_channel
+		await vc.move_to(user_channel)
+		self.info[gid]['humans'] = count_humans(user_channel.members)
+		self.update_empty_timer(gid)
+		await ctx.send(f"Moved the bot to {user_channel.name}")
 
 	@commands.Cog.listener('on_voice_state_update')
 	async def on_empty_channel(
@@ -886,41 +1050,147 @@ class Music(commands.Cog):
 		after: discord.VoiceState
 	):
 		"""
-		Disconnects the bot if no (non-bot) users are left in the channel.
+		Updates the number of (non-bot) users in the bot's channel from the event's states.
+		Schedules a disconnection when no users are left, cancels it when one comes back.
+		Follows the bot when it's moved, and cleans up when it's disconnected.
 		"""
 
-		logger = self.logger
+		gid = member.guild.id
+		info = self.info.get(gid)
 
-		vc = member.guild.voice_client
+		if info is None or info['channel'] is None:
+			return
 
-		if vc is not None:
+		# Muting, deafening, etc. also trigger the event.
+		if before.channel == after.channel:
+			return
 
-			members = vc.channel.members
-			empty = True
+		channel_id = info['channel'].id
 
-			for member in members:
-				if not member.bot:
-					empty = False
-					break
+		if member.bot:
+			if member.id != self.bot.user.id:
+				return
 
-			if empty:
-				# I don't know if there's a way to get the context, so manual stopping,
-				# clearing queue and leaving it is
-				if vc.is_connected():
+			if after.channel is None:
+				# Someone disconnected the bot: clean up like leave does.
+				# leave and disconnect_guild forget the channel first, so they return above.
+				self.cancel_idle_timers(gid)
 
-					gid = member.guild.id
-					queue = self.info[gid]['queue']
-					channel = self.info[gid]['channel']
+				queue = info['queue']
+				if queue is not None:
+					queue.clear()
 
+				vc: discord.VoiceClient = member.guild.voice_client
+				if vc is not None:
 					vc.stop()
-					queue.clear()
 
-					self.info[gid]['queue'] = None
-					self.info[gid]['channel'] = None
+				info['queue'] = None
+				info['channel'] = None
+				info['source'] = None
+				info['humans'] = 0
+				self.logger.debug(f"{VOICE} Disconnected from \"{before.channel}\"")
+
+			elif after.channel.id != channel_id:
+				# Someone moved the bot: count the members of its new channel.
+				info['channel'] = after.channel
+				info['humans'] = count_humans(after.channel.members)
+				self.update_empty_timer(gid)
+
+			return
+
+		if before.channel is not None and before.channel.id == channel_id:
+			info['humans'] -= 1
+
+		if after.channel is not None and after.channel.id == channel_id:
+			info['humans'] += 1
+
+		self.update_empty_timer(gid)
+
+	def update_empty_timer(self, gid: int):
+		"""
+		Schedules the 'empty' timer of a guild if no users are left in the bot's channel,
+		cancels it otherwise.
+
+		Parameters:
+			gid: The ID of the guild.
+		"""
+
+		key = (gid, 'empty')
+
+		if self.info[gid]['humans'] > 0:
+			self.idle.cancel(key)
+		elif not self.idle.is_scheduled(key):
+			self.idle.schedule(key, self.idle_timeout)
+
+	def cancel_idle_timers(self, gid: int):
+		"""
+		Cancels all the idle timers of a guild.
+
+		Parameters:
+			gid: The ID of the guild.
+		"""
+
+		self.idle.cancel((gid, 'empty'))
+		self.idle.cancel((gid, 'paused'))
+
+	async def on_idle_timeout(self, key: Tuple[int, str]):
+		"""
+		Called by the idle scheduler when a timer expires. Checks the guild is still idle
+		before disconnecting, in case the state changed without cancelling the timer.
+
+		Parameters:
+			key: The (guild_id, reason) pair of the timer.
+		"""
+
+		gid, reason = key
 
-					await vc.disconnect()
-					vc.cleanup()
-					logger.debug(f"{VOICE} Left \"{channel}\"")
+		info = self.info.get(gid)
+		if info is None or info['channel'] is None:
+			return
+
+		vc: discord.VoiceClient = info['channel'].guild.voice_client
+		if vc is None:
+			return
+
+		if reason == 'empty' and info['humans'] > 0:
+			return
+
+		if reason == 'paused' and not vc.is_paused():
+			return
+
+		self.logger.debug(f"{VOICE} Leaving \"{info['channel']}\": {reason} for too long")
+		await self.disconnect_guild(gid, vc)
+
+	async def disconnect_guild(self, gid: int, vc: discord.VoiceClient):
+		"""
+		Stops the audio, clears the queue and leaves the voice channel of a guild,
+		without a context.
+
+		Parameters:
+			gid: The ID of the guild.
+			vc: The guild's voice client.
+		"""
+
+		logger = self.logger
+
+		self.cancel_idle_timers(gid)
+
+		if vc.is_connected():
+
+			queue = self.info[gid]['queue']
+			channel = self.info[gid]['channel']
+
+			vc.stop()
+			if queue is not None:
+				queue.clear()
+
+			self.info[gid]['queue'] = None
+			self.info[gid]['channel'] = None
+			self.info[gid]['source'] = None
+
+			await vc.disconnect()
+			vc.cleanup()
+			logger.debug(f"{VOICE} Left \"{channel}\"")
 
 	async def get_latency(self, ctx: commands.Context) -> Union[Tuple[float, float], None]:
 		"""
@@ -947,15 +1217,96 @@ class MaxDurationError(Exception):
 	pass
 
 
-class YTDLSource(discord.PCMVolumeTransformer):
+class YTDLSource(discord.AudioSource):
+	"""
+	The audio source of a Song, wraps the FFmpeg source.
+
+	The volume at creation and the song's gain are applied by FFmpeg, see ffmpeg_options.
+	The frames only go through the Python volume transform (a VolumeScaler) once the volume
+	is changed during playback.
+
+	If the source has a trace, it's finished when the first frame is read.
+	"""
 
-	def __init__(self, source, *, song, volume=0.5):
-		super().__init__(source, volume)
+	def __init__(
+		self,
+		source: discord.AudioSource,
+		*,
+		song: Song,
+		volume: float = 0.5,
+		trace: Trace = None
+	):
+
+		if source.is_opus():
+			raise discord.ClientException('AudioSource must not be Opus encoded.')
+
+		self.original = source
 		self.song: Song = song
 		self.title: str = song.title
 		self.file: str  = song.file
 		self.url: str   = song.url
 		self.thumbnail: str  = song.thumbnail
+		# The volume already applied by FFmpeg, see ffmpeg_options.
+		self.base_volume: float = volume if volume > 0 else 1.0
+		self._volume: float = volume
+		# Scales by volume / base_volume, so it starts at 1.0 unless the volume is 0.
+		# The limit applies to the volume, not to that ratio.
+		self.scaler = VolumeScaler(
+			volume / self.base_volume, max_volume=MAX_VOLUME / self.base_volume
+		)
+		# Set to None once finished, read() is called from the player's thread.
+		self.trace: Union[Trace, None] = trace
+
+	@property
+	def volume(self) -> float:
+		"""
+		The volume of the source, 1.0 being 100%.
+		"""
+		return self._volume
+
+	@volume.setter
+	def volume(self, value: float):
+		self._volume = max(value, 0.0)
+		self.scaler.volume = self._volume / self.base_volume
+
+	@staticmethod
+	def ffmpeg_options(song: Song, volume: float) -> str:
+		"""
+		Builds the FFmpeg output options that apply the volume and the song's gain.
+
+		Parameters:
+			song: The song to play.
+			volume: The volume the source is created with.
+
+		Returns:
+			The options to pass to FFmpegPCMAudio.
+		"""
+
+		factor = volume if volume > 0 else 1.0
+		if song.gain is not None:
+			factor *= 10 ** (song.gain / 20)
+
+		return f"-vn -af volume={factor:.4f}"
+
+	def read(self) -> bytes:
+		"""
+		Reads a frame, only scales it if the volume changed since the source was created.
+		"""
+
+		data = self.original.read()
+
+		if self.trace is not None:
+			self.trace.mark('first_frame')
+			self.trace.finish('ok' if data else 'no_audio')
+			self.trace = None
+
+		return self.scaler.scale(data)
+
+	def cleanup(self):
+		if self.trace is not None:
+			self.trace.finish('stopped')
+			self.trace = None
+		self.original.cleanup()
 
 	@classmethod
 	async def from_url(
@@ -964,7 +1315,8 @@ class YTDLSource(discord.PCMVolumeTransformer):
 		max_duration: int,
 		ytdl: yt_dlp.YoutubeDL = None,
 		loop: asyncio.AbstractEventLoop = None,
-		download: bool = True
+		download: bool = True,
+		trace: Trace = None
 	) -> Song:
 		"""
 		Downloads a song from its URL.
@@ -975,6 +1327,7 @@ class YTDLSource(discord.PCMVolumeTransformer):
 			ytdl: The YoutubeDL instance to use.
 			loop: The EventLoop to use.
 			download: Whether the song should be downloaded.
+			trace: The trace to add the 'metadata' and 'download' spans to.
 
 		Returns:
 			The corresponding (new) Song instance.
@@ -1003,10 +1356,12 @@ class YTDLSource(discord.PCMVolumeTransformer):
 			ytdl = yt_dlp.YoutubeDL(YTDL_FORMAT_OPTIONS)
 
 		loop = loop or asyncio.get_event_loop()
+		trace = trace or Trace('from_url')
 
-		metadata = await loop.run_in_executor(
-			None, lambda: ytdl.extract_info(url, download=False)
-		)
+		with trace.span('metadata'):
+			metadata = await loop.run_in_executor(
+				None, lambda: ytdl.extract_info(url, download=False)
+			)
 
 		duration = metadata['duration']
 		if duration > max_duration:
@@ -1024,9 +1379,18 @@ class YTDLSource(discord.PCMVolumeTransformer):
 
 		# If it isn't already there, download it
 		if download and not os.path.exists(filename):
-			await loop.run_in_executor(None, lambda: ytdl.extract_info(url, download=True))
-
-		song = Song(metadata['title'], filename, url, metadata['thumbnail'])
+			with trace.span('download'):
+				await loop.run_in_executor(None, lambda: ytdl.extract_info(url, download=True))
+
+		song = Song(
+			metadata['title'],
+			filename,
+			url,
+			metadata['thumbnail'],
+			# The IDs of other sites aren't unique across sites, see song.youtube_id.
+			video_id=metadata.get('id') if metadata.get('extractor_key') == 'Youtube' else None,
+			duration=duration
+		)
 		return song
 
 	async def get_song_info(self) -> str:
@@ -1037,6 +1401,19 @@ class YTDLSource(discord.PCMVolumeTransformer):
 		return f"{self.song.title} - {self.song.url}"
 
 
+def count_humans(members: Iterable[discord.Member]) -> int:
+	"""
+	Counts the non-bot members of a voice channel.
+
+	Parameters:
+		members: The members of the channel.
+
+	Returns:
+		How many of them are not bots.
+	"""
+	return sum(1 for member in members if not member.bot)
+
+
 async def validate_url(url: str) -> bool:
 	"""
 	Checks to see if url has any valid extractors for yt_dlp.
@@ -1055,6 +1432,11 @@ async def validate_url(url: str) -> bool:
 async def setup(bot):
 
 	max_duration = int(os.getenv('MAX_DURATION'))
+	idle_timeout = int(os.getenv('IDLE_TIMEOUT', 60))
+	pause_timeout = int(os.getenv('PAUSE_TIMEOUT', 600))
+	# An empty string disables the loudness normalization.
+	loudness_target = os.getenv('LOUDNESS_TARGET', '-16')
+	loudness_workers = int(os.getenv('LOUDNESS_WORKERS', 1))
 	save_dir = os.getenv('MUSIC_DIR')
 
 	YTDL_FORMAT_OPTIONS = {
@@ -1074,4 +1456,11 @@ async def setup(bot):
 
 	ytdl = yt_dlp.YoutubeDL(YTDL_FORMAT_OPTIONS)
 
-	await bot.add_cog(Music(bot, ytdl, max_duration))
+	if loudness_target:
+		loudness = LoudnessAnalyzer("CroissantBot", float(loudness_target), loudness_workers)
+	else:
+		loudness = None
+
+	await bot.add_cog(
+		Music(bot, ytdl, max_duration, idle_timeout, pause_timeout, loudness)
+	)
@@ -24,14 +24,22 @@ FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
 DEALINGS IN THE SOFTWARE.
 """
 
+import asyncio
+import io
+import json
 import os
 import yt_dlp
 
+from typing import Any, Dict, List, Set, Tuple, Union
+
 import discord
 from discord.ext import commands
 
-from cogs.ext.music_db import MusicDatabaseConnection
-from cogs.ext.db import DbInsertError, NotFoundError
+from cogs.ext.cache import LRUCache, MISSING
+from cogs.ext.journal import FavouritesStore
+from cogs.ext.music_store import ConflictError, DbInsertError, MusicStore, NotFoundError
+from cogs.ext.refresher import MetadataRefresher, SongUnavailableError
+from cogs.ext.song import Song
 from cogs.music import YTDLSource
 
 
@@ -39,6 +47,15 @@ MUSIC_ENABLED = bool(os.getenv('ENABLE_MUSIC', False))
 
 DB_CONNECTED = False
 
+# Parts of the yt-dlp errors meaning that a video is gone, rather than unreachable.
+UNAVAILABLE_MESSAGES = (
+	'unavailable',
+	'not available',
+	'private video',
+	'removed',
+	'terminated'
+)
+
 
 def check_if_db_is_connected():
 	"""
@@ -57,9 +74,99 @@ class Playlist(commands.Cog):
 
 	def __init__(self, bot: commands.Bot):
 		self.bot = bot
-		self.db = MusicDatabaseConnection("CroissantBot")
 		self.logger = bot.logger
 
+		# Each backend is imported only when used, so that only its package is needed.
+		self.backend = os.getenv('DB_MUSIC_BACKEND', 'postgres').lower()
+		self.db: MusicStore
+		if self.backend == 'sqlite':
+			from cogs.ext.sqlite_music_db import SQLiteMusicConnection
+			self.db = SQLiteMusicConnection("CroissantBot")
+		else:
+			from cogs.ext.music_db import MusicDatabaseConnection
+			self.db = MusicDatabaseConnection(
+				"CroissantBot", int(os.getenv('DB_MUSIC_CACHE_SIZE', 1024))
+			)
+			self.db.slow_query_threshold = float(os.getenv('DB_MUSIC_SLOW_QUERY_MS', 200)) / 1000
+		# Songs whose info is fetched at once when importing or refreshing.
+		self.import_workers = asyncio.Semaphore(int(os.getenv('DB_MUSIC_IMPORT_WORKERS', 4)))
+		# Seconds after which the info of a saved song is fetched again when played.
+		self.metadata_ttl = float(os.getenv('DB_MUSIC_METADATA_TTL', 168)) * 3600
+		self.refresh_tasks: Set[asyncio.Task] = set()
+		# (owner ID, title) -> version of the playlist when its indexes were last listed.
+		self.listed_versions = LRUCache(1024)
+		# Fetches the stale info of all the saved songs in the background, at most
+		# DB_MUSIC_REFRESH_RATE songs per minute.
+		self.refresh_interval = float(os.getenv('DB_MUSIC_REFRESH_INTERVAL', 300))
+		self.refresher = MetadataRefresher(
+			self.db,
+			self.resolve_saved_song,
+			"CroissantBot",
+			self.metadata_ttl,
+			batch_size=int(os.getenv('DB_MUSIC_REFRESH_BATCH', 20)),
+			interval=self.refresh_interval,
+			rate=float(os.getenv('DB_MUSIC_REFRESH_RATE', 6)) / 60
+		)
+
+	async def connect_db(
+		self
+	) -> bool:
+		"""
+		Connects to the database if not already connected, and starts the health checks.
+		Called when the bot starts to open the pool's connections before any command,
+		and by the playlist commands if that failed.
+		With the SQLite backend, opens the database file instead.
+
+		Returns:
+			True if connected, False otherwise.
+		"""
+		global DB_CONNECTED
+
+		if await self.db.is_connected():
+			DB_CONNECTED = True
+			return True
+
+		if self.backend == 'sqlite':
+			try:
+				await self.db.connect(os.getenv('DB_MUSIC_SQLITE_PATH', 'rsc/playlists.db'))
+				DB_CONNECTED = True
+				self.start_refresher()
+			except Exception as error:
+				message, *rest = error.args
+				self.logger.error(message)
+				self.logger.debug(rest)
+
+			return DB_CONNECTED
+
+		host = os.getenv('DB_MUSIC_HOST')
+		user = os.getenv('DB_MUSIC_USER')
+		port = os.getenv('DB_MUSIC_PORT', None)
+		password = os.getenv('DB_MUSIC_PASSWORD')
+		database = os.getenv('DB_MUSIC_DATABASE')
+		min_size = int(os.getenv('DB_MUSIC_POOL_MIN', 1))
+		max_size = int(os.getenv('DB_MUSIC_POOL_MAX', 10))
+		health_check = float(os.getenv('DB_MUSIC_HEALTH_CHECK', 30))
+
+		try:
+			await self.db.connect(
+				host,
+				user,
+				password,
+				database,
+				port=port,
+				min_size=min_size,
+				max_size=max_size
+			)
+			self.db.start_health_check(health_check)
+			DB_CONNECTED = True
+			self.start_refresher()
+		except Exception as error:
+			message, *rest = error.args
+			self.logger.error(message)
+			self.logger.debug(rest)
+
+		return DB_CONNECTED
+
 	async def close_db(
 		self
 	) -> bool:
@@ -70,8 +177,57 @@ class Playlist(commands.Cog):
 			True if the database was closed, False otherwise.
 		"""
 
+		self.refresher.stop()
 		return await self.db.close()
 
+	def start_refresher(self):
+		"""
+		Starts refreshing the info of the saved songs in the background, unless
+		DB_MUSIC_REFRESH_INTERVAL is 0.
+		"""
+
+		if self.refresh_interval > 0:
+			self.refresher.start(self.bot.loop)
+
+	async def resolve_saved_song(self, url: str) -> Song:
+		"""
+		Fetches the info of a saved song for the refresher, without downloading it.
+
+		Parameters:
+			url: The URL of the song.
+
+		Raises:
+			SongUnavailableError: The video was removed, made private or is blocked.
+
+		Returns:
+			The song.
+		"""
+
+		try:
+			# Songs too long to be played are still refreshed, playing them checks it.
+			return await YTDLSource.from_url(
+				url, float('inf'), loop=self.bot.loop, download=False
+			)
+		except yt_dlp.utils.DownloadError as error:
+			if any(part in str(error).lower() for part in UNAVAILABLE_MESSAGES):
+				raise SongUnavailableError(url) from error
+			raise
+
+	def listed_version(self, ctx: commands.Context, title: str) -> Union[int, None]:
+		"""
+		Gets the version of a playlist when the user last listed it, for a change by
+		index. The user's own change updates the indexes, so it's only used once.
+
+		Parameters:
+			title: The title of the playlist.
+
+		Returns:
+			The version, None if the user didn't list the playlist since the last change.
+		"""
+
+		version = self.listed_versions.pop((str(ctx.author.id), title))
+		return None if version is MISSING else version
+
 	async def is_connected_to_vc(self, ctx: commands.Context):
 		"""
 		Checks if the bot is connected to a voice channel.
@@ -97,38 +253,18 @@ class Playlist(commands.Cog):
 		"""
 		Base function for playlist management.
 		"""
-		global DB_CONNECTED
 
 		if ctx.invoked_subcommand is None:
 			await ctx.send("You have to use a subcommand:")
 			await ctx.send_help(self.playlist_base)
 			return
 
-		if not await self.db.is_connected():
-			host = os.getenv('DB_MUSIC_HOST')
-			user = os.getenv('DB_MUSIC_USER')
-			port = os.getenv('DB_MUSIC_PORT', None)
-			password = os.getenv('DB_MUSIC_PASSWORD')
-			database = os.getenv('DB_MUSIC_DATABASE')
-
-			try:
-				await self.db.connect(
-					host,
-					user,
-					password,
-					database,
-					self.bot.loop,
-					port
-				)
-				DB_CONNECTED = True
-			except Exception as error:
-				message, *rest = error.args
-				self.logger.error(message)
-				self.logger.debug(rest)
-				await ctx.send(
-					"An error occurred while getting the playlists,"
-					" please contact the bot's admin."
-				)
+		# Usually connected when the bot started.
+		if not await self.connect_db():
+			await ctx.send(
+				"An error occurred while getting the playlists,"
+				" please contact the bot's admin."
+			)
 
 	@playlist_base.command(
 		name="add",
@@ -228,7 +364,17 @@ class Playlist(commands.Cog):
 			return
 
 		try:
-			await self.db.remove_song_from(title, str(ctx.author.id), index)
+			await self.db.remove_song_from(
+				title, str(ctx.author.id), index, self.listed_version(ctx, title)
+			)
+		except ConflictError:
+			em = discord.Embed(
+				title="Error",
+				description=f"""{title} changed since you listed it, nothing was changed.\n
+				Use `{self.bot._prefix}playlist list {title}` to see its songs again.""",
+				colour=discord.Colour.gold()
+			)
+			await ctx.send(embed=em)
 		except NotFoundError as error:
 			message, *_ = error.args
 			em = discord.Embed(
@@ -246,7 +392,143 @@ class Playlist(commands.Cog):
 			)
 			await ctx.send(embed=em)
 			self.logger.error("Could not remove song from playlist.")
-			self.logger.debut(rest)
+			self.logger.debug(rest)
+
+	@playlist_base.command(
+		name="remove_range",
+		help="Remove the songs of a playlist from an index to another"
+	)
+	@check_if_db_is_connected()
+	async def playlist_remove_range(
+		self,
+		ctx: commands.Context,
+		title: str,
+		start: int,
+		end: int
+	):
+		"""
+		Removes the songs of a playlist from an index to another, both included.
+
+		Parameters:
+			title: The title of the playlist.
+			start: The index of the first song to remove.
+			end: The index of the last song to remove.
+		"""
+
+		if not await self.db.playlist_exists(title, str(ctx.author.id)):
+			em = discord.Embed(
+				title="Error",
+				description=f"""You don't have a playlist named {title}.\n
+				Use `{self.bot._prefix}playlist create <title>` to create a playlist.""",
+				colour=discord.Colour.gold()
+			)
+			await ctx.send(embed=em)
+			return
+
+		try:
+			count = await self.db.remove_songs_from(
+				title, str(ctx.author.id), start, end, self.listed_version(ctx, title)
+			)
+			em = discord.Embed(
+				title=f"Removed from {title}",
+				description=f"{count} song{'s' if count > 1 else ''} removed.",
+				colour=discord.Colour.green()
+			)
+			await ctx.send(embed=em)
+		except ConflictError:
+			em = discord.Embed(
+				title="Error",
+				description=f"""{title} changed since you listed it, nothing was changed.\n
+				Use `{self.bot._prefix}playlist list {title}` to see its songs again.""",
+				colour=discord.Colour.gold()
+			)
+			await ctx.send(embed=em)
+		except NotFoundError as error:
+			message, *_ = error.args
+			em = discord.Embed(
+				title="Error",
+				description=message,
+				colour=discord.Colour.gold()
+			)
+			await ctx.send(embed=em)
+		except DbInsertError as error:
+			message, *rest = error.args
+			em = discord.Embed(
+				title="Error",
+				description=message,
+				colour=discord.Colour.gold()
+			)
+			await ctx.send(embed=em)
+			self.logger.error("Could not remove songs from playlist.")
+			self.logger.debug(rest)
+
+	@playlist_base.command(
+		name="move",
+		help="Moves a song of a playlist to another index"
+	)
+	@check_if_db_is_connected()
+	async def playlist_move(
+		self,
+		ctx: commands.Context,
+		title: str,
+		index: int,
+		new_index: int
+	):
+		"""
+		Moves a song of a playlist from an index to another.
+
+		Parameters:
+			title: The title of the playlist.
+			index: The index of the song to move.
+			new_index: The index to move the song to. Past the end, the song is moved last.
+		"""
+
+		if not await self.db.playlist_exists(title, str(ctx.author.id)):
+			em = discord.Embed(
+				title="Error",
+				description=f"""You don't have a playlist named {title}.\n
+				Use `{self.bot._prefix}playlist create <title>` to create a playlist.""",
+				colour=discord.Colour.gold()
+			)
+			await ctx.send(embed=em)
+			return
+
+		try:
+			await self.db.move_song(
+				title, str(ctx.author.id), index, new_index, self.listed_version(ctx, title)
+			)
+			em = discord.Embed(
+				title=f"Moved in {title}",
+				description=f"From {index} to {new_index}.",
+				colour=discord.Colour.green()
+			)
+			await ctx.send(embed=em)
+		except ConflictError:
+			em = discord.Embed(
+				title="Error",
+				description=f"""{title} changed since you listed it, nothing was changed.\n
+				Use `{self.bot._prefix}playlist list {title}` to see its songs again.""",
+				colour=discord.Colour.gold()
+			)
+			await ctx.send(embed=em)
+		except NotFoundError as error:
+			message, *_ = error.args
+			em = discord.Embed(
+				title="Error",
+				description=message,
+				colour=discord.Colour.gold()
+			)
+			await ctx.send(embed=em)
+		except DbInsertError as error:
+			message, *rest = error.args
+			em = discord.Embed(
+				title="Error",
+				description=message,
+				colour=discord.Colour.gold()
+			)
+			await ctx.send(embed=em)
+			self.logger.error("Could not move song in playlist.")
+			self.logger.debug(rest)
 
 	@playlist_base.command(
 		name="now",
@@ -391,7 +673,7 @@ class Playlist(commands.Cog):
 		"""
 
 		if title is None:
-			playlists = await self.db.get_playlists(str(ctx.author.id))
+			playlists = await self.db.get_playlist_summaries(str(ctx.author.id))
 			if playlists is None:
 				await ctx.send(
 					"You haven't created a playlist yet, use"
@@ -401,7 +683,11 @@ class Playlist(commands.Cog):
 				cpt = 1
 				msg = ""
 				for pl in playlists:
-					msg += f"{cpt}. {pl}\n"
+					count = pl['song_count']
+					msg += (
+						f"{cpt}. {pl['title']}: {count} song{'' if count == 1 else 's'},"
+						f" {format_duration(pl['total_duration'])}\n"
+					)
 					cpt += 1
 				name = ctx.author.display_name
 				if name[-1].lower == 's':
@@ -416,6 +702,9 @@ class Playlist(commands.Cog):
 				await ctx.send(embed=em)
 
 		else:
+			# Read first: if the playlist changes before the titles are, the indexes
+			# are only checked against an older version.
+			version = await self.db.get_playlist_version(title, str(ctx.author.id))
 			songs = await self.db.get_titles_in_playlist(title, str(ctx.author.id))
 			if songs is None:
 				await ctx.send(
@@ -434,6 +723,46 @@ class Playlist(commands.Cog):
 					colour=ctx.author.colour
 				)
 				await ctx.send(embed=em)
+				self.listed_versions.put((str(ctx.author.id), title), version)
+
+	@playlist_base.command(
+		name="find",
+		help="Searches the songs of your playlists by title"
+	)
+	@check_if_db_is_connected()
+	async def playlist_find(
+		self,
+		ctx: commands.Context,
+		*,
+		text: str
+	):
+		"""
+		Shows the songs of the user's playlists whose title matches a text best,
+		with their index to use with `playlist play`.
+
+		Parameters:
+			text: The words to search for in the titles.
+		"""
+
+		matches = await self.db.find_songs(str(ctx.author.id), text)
+		if not matches:
+			em = discord.Embed(
+				title="No match",
+				description=f"None of your saved songs match \"{text}\".",
+				colour=discord.Colour.gold()
+			)
+			await ctx.send(embed=em)
+			return
+
+		msg = ""
+		for match in matches:
+			msg += f"{match['playlist']} #{match['index']}: {match['title']}\n"
+		em = discord.Embed(
+			title=f"Songs matching \"{text}\"",
+			description=msg,
+			colour=ctx.author.colour
+		)
+		await ctx.send(embed=em)
 
 	@playlist_base.command(
 		name="play",
@@ -446,7 +775,8 @@ class Playlist(commands.Cog):
 		self,
 		ctx: commands.Context,
 		title: str = 'favourites',
-		index: int = 0
+		*,
+		song: str = '0'
 	):
 		"""
 		Queues all songs from a playlist, or a specific song from a playlist.
@@ -454,8 +784,9 @@ class Playlist(commands.Cog):
 		Parameters:
 			title: The title of the playlist to queue or to get the song from.
 			'favourites' by default.
-			index: The index of the song to queue. If 0, queues all the songs in
-			the playlist. If the index exists in the playlist, queues that specific song.
+			song: The index of the song to queue, or words of its title. If 0, queues
+			all the songs in the playlist. If the index exists in the playlist, queues
+			that specific song. Otherwise, queues the song whose title matches best.
 		"""
 
 		if not await self.is_connected_to_vc(ctx):
@@ -477,8 +808,24 @@ class Playlist(commands.Cog):
 			await ctx.send(embed=em)
 			return
 
+		try:
+			index = int(song)
+		except ValueError:
+			matches = await self.db.find_songs(
+				str(ctx.author.id), song, playlist_title=title, limit=1
+			)
+			if not matches:
+				em = discord.Embed(
+					title="Error",
+					description=f"There's no song matching \"{song}\" in {title}.",
+					colour=discord.Colour.gold()
+				)
+				await ctx.send(embed=em)
+				return
+			index = matches[0]['index']
+
 		if index == 0:
-			songs = await self.db.get_songs_in_playlist(title, str(ctx.author.id))
+			songs = await self.db.get_playlist_songs(title, str(ctx.author.id))
 			if songs is None:
 				em = discord.Embed(
 					title="Error",
@@ -497,8 +844,7 @@ class Playlist(commands.Cog):
 					)
 					await ctx.send(embed=em)
 					return
-				for song in songs:
-					await music.play(ctx, song)
+				await self.queue_songs(ctx, music, songs)
 		elif index < 0:
 			em = discord.Embed(
 				title="Error",
@@ -507,8 +853,8 @@ class Playlist(commands.Cog):
 			)
 			await ctx.send(embed=em)
 		else:
-			song = await self.db.get_song_from(index, title, str(ctx.author.id))
-			if song is None:
+			songs = await self.db.get_playlist_songs(title, str(ctx.author.id), index)
+			if songs is None:
 				em = discord.Embed(
 					title="Error",
 					description=f"There's no song with that index in {title}.",
@@ -525,7 +871,418 @@ class Playlist(commands.Cog):
 					)
 					await ctx.send(embed=em)
 					return
-				await music.play(ctx, song)
+				await self.queue_songs(ctx, music, songs)
+
+	async def queue_songs(
+		self,
+		ctx: commands.Context,
+		music: commands.Cog,
+		songs: List[Dict[str, Any]]
+	):
+		"""
+		Queues songs of a playlist. Those whose file is still there are queued right
+		away with the info saved in the database, the others are searched and downloaded
+		again by the Music cog. The info older than DB_MUSIC_METADATA_TTL hours, or
+		missing, is then fetched again in the background. The songs whose video is gone
+		are skipped.
+
+		Parameters:
+			music: The Music cog.
+			songs: The songs, as returned by `get_playlist_songs`.
+		"""
+
+		max_duration = int(os.getenv('MAX_DURATION'))
+		stale: List[str] = list()
+
+		# Marked by the refresher, searching them would only fail.
+		unavailable = [row for row in songs if not row.get('available', True)]
+		if unavailable:
+			titles = "\n".join(row['title'] for row in unavailable[:10])
+			await ctx.send(
+				f"Skipping {len(unavailable)} song(s) that are not available anymore:\n{titles}"
+			)
+
+		for row in songs:
+			if not row.get('available', True):
+				continue
+
+			song = song_from_row(row, max_duration)
+			if song is None:
+				await music.play(ctx, row['url'])
+			else:
+				try:
+					await music.enqueue(ctx, song)
+				except discord.DiscordException as de:
+					await ctx.send("The bot is not connected to a voice channel.")
+					self.logger.debug(f"discord.DiscordException: {de}")
+					return
+
+			if song is None or row['age'] is None or row['age'] > self.metadata_ttl:
+				stale.append(row['url'])
+
+		if stale:
+			task = self.bot.loop.create_task(self.refresh_songs(stale))
+			# Keep a reference until it's done, the loop only keeps a weak one.
+			self.refresh_tasks.add(task)
+			task.add_done_callback(self.refresh_tasks.discard)
+
+	async def refresh_songs(self, urls: List[str]):
+		"""
+		Fetches the info of saved songs again, DB_MUSIC_IMPORT_WORKERS at a time,
+		and saves it in the database.
+
+		Parameters:
+			urls: The URLs of the songs.
+		"""
+
+		max_duration = int(os.getenv('MAX_DURATION'))
+
+		async def resolve(url: str) -> Song:
+			async with self.import_workers:
+				return await YTDLSource.from_url(
+					url, max_duration, loop=self.bot.loop, download=False
+				)
+
+		results = await asyncio.gather(*(resolve(url) for url in urls), return_exceptions=True)
+		songs = [result for result in results if isinstance(result, Song)]
+
+		try:
+			if songs:
+				await self.db.set_song_metadata(songs)
+		except Exception as e:
+			self.logger.error("Could not save the info of the songs.")
+			self.logger.debug(f"Unexpected exception:\n{e}")
+			return
+
+		self.logger.debug(f"Refreshed the info of {len(songs)} of {len(urls)} songs.")
+
+	@playlist_base.command(
+		name="import",
+		help="Adds your favourites, or the songs of an exported playlist, to a playlist"
+	)
+	@check_if_db_is_connected()
+	async def playlist_import(
+		self,
+		ctx: commands.Context,
+		title: str = 'favourites'
+	):
+		"""
+		Adds many songs to a playlist at once: the songs of the JSON file attached to the
+		message, in the format sent by `playlist export`, or else the user's list of the
+		Favourites cog. Creates the playlist if it doesn't exist.
+
+		Parameters:
+			title: The title of the playlist. 'favourites' by default.
+		"""
+
+		try:
+			if ctx.message.attachments:
+				content = await ctx.message.attachments[0].read()
+				entries = json.loads(content)
+			else:
+				cog = self.bot.get_cog('Favourites')
+				if cog is not None:
+					store = cog.store
+				else:
+					store = FavouritesStore(os.getenv('MUSIC_FAV_LIST'), self.logger.name)
+				entries = (await store.get(str(ctx.author.id))).state
+		except Exception as e:
+			self.logger.error("Could not read the songs to import.")
+			self.logger.debug(f"Unexpected exception:\n{e}")
+			await ctx.send(
+				"Couldn't read the songs to import: attach a file sent by"
+				f" `{self.bot._prefix}playlist export`, or save songs with"
+				f" `{self.bot._prefix}favourites add <song URL>`."
+			)
+			return
+
+		if not isinstance(entries, list) or not entries:
+			await ctx.send("There are no songs to import.")
+			return
+
+		async with ctx.typing():
+			songs, failed = await self.resolve_songs(entries)
+			if not songs:
+				await ctx.send("None of the songs could be found.")
+				return
+
+			try:
+				added, created = await self.db.import_songs(songs, title, str(ctx.author.id))
+			except DbInsertError as error:
+				message, *_ = error.args
+				em = discord.Embed(
+					title="Error",
+					description=message,
+					colour=discord.Colour.red()
+				)
+				await ctx.send(embed=em)
+				return
+
+		if created:
+			em = discord.Embed(
+				title="Created playlist",
+				description=title,
+				colour=discord.Colour.green()
+			)
+			await ctx.send(embed=em)
+
+		description = f"{added} song{'s' if added != 1 else ''} added."
+		if len(songs) > added:
+			description += f"\n{len(songs) - added} already in the playlist."
+		if failed:
+			description += f"\n{failed} could not be found."
+
+		em = discord.Embed(
+			title=f"Imported to {title}",
+			description=description,
+			colour=discord.Colour.green()
+		)
+		await ctx.send(embed=em)
+
+	@playlist_base.command(
+		name="export",
+		help="Sends the songs of a playlist as a file that can be imported"
+	)
+	@check_if_db_is_connected()
+	async def playlist_export(
+		self,
+		ctx: commands.Context,
+		title: str = 'favourites'
+	):
+		"""
+		Sends the songs of a playlist as a JSON file, which `playlist import` accepts.
+
+		Parameters:
+			title: The title of the playlist. 'favourites' by default.
+		"""
+
+		songs = await self.db.export_playlist(title, str(ctx.author.id))
+		if songs is None:
+			await ctx.send(f"You don't have a playlist named {title}, or it's empty.")
+			return
+
+		dump = json.dumps(songs, indent='\t')
+		file = discord.File(io.BytesIO(dump.encode()), filename=f"{title}.json")
+		await ctx.send(f"{len(songs)} songs in {title}.", file=file)
+
+	async def resolve_songs(
+		self,
+		entries: List[Dict[str, str]]
+	) -> Tuple[List[Song], int]:
+		"""
+		Turns the entries of an imported file into songs. The info of the entries that
+		only have a URL is fetched, up to DB_MUSIC_IMPORT_WORKERS of them at once.
+
+		Parameters:
+			entries: The songs to import, each with at least a 'url'.
+
+		Returns:
+			The songs in the order of the entries, without those that couldn't be found,
+			and the number of those.
+		"""
+
+		max_duration = int(os.getenv('MAX_DURATION'))
+
+		async def resolve(entry: Dict[str, str]) -> Song:
+			url = entry.get('url')
+			if entry.get('title') and entry.get('thumbnail'):
+				return Song(entry.get('title'), None, url, entry.get('thumbnail'))
+
+			async with self.import_workers:
+				return await YTDLSource.from_url(
+					url, max_duration, loop=self.bot.loop, download=False
+				)
+
+		entries = [entry for entry in entries if isinstance(entry, dict) and entry.get('url')]
+		results = await asyncio.gather(
+			*(resolve(entry) for entry in entries),
+			return_exceptions=True
+		)
+
+		songs = [result for result in results if isinstance(result, Song)]
+		failed = len(results) - len(songs)
+		if failed:
+			self.logger.warning(f"Could not find {failed} of the songs to import.")
+
+		return (songs, failed)
+
+	@playlist_base.command(
+		name="stats",
+		help="Shows the usage of the database connections",
+		hidden=True
+	)
+	@commands.is_owner()
+	@check_if_db_is_connected()
+	async def playlist_stats(
+		self,
+		ctx: commands.Context
+	):
+		"""
+		Sends the usage metrics of the database connection pool and caches, and the
+		statements taking the most time.
+		"""
+
+		if self.backend == 'sqlite':
+			await ctx.send("The stats are only available with the PostgreSQL backend.")
+			return
+
+		stats = self.db.pool_stats()
+
+		em = discord.Embed(
+			title="Database connections",
+			description=f"Pool of {stats['min_size']} to {stats['max_size']} connections",
+			colour=discord.Colour.blue()
+		)
+		em.add_field(
+			name="In use",
+			value=f"{stats['in_use']} (peak: {stats['peak_in_use']})"
+		)
+		em.add_field(
+			name="Acquisitions",
+			value=f"{stats['acquisitions']} ({stats['timeouts']} timed out)"
+		)
+		em.add_field(
+			name="Wait",
+			value=f"{stats['average_wait_ms']} ms avg, {stats['max_wait_ms']} ms max"
+		)
+		em.add_field(
+			name="Queries",
+			value=f"{stats['queries']} ({stats['errors']} failed)"
+		)
+		em.add_field(
+			name="Health checks",
+			value=(
+				f"{stats['health_checks']} ({stats['health_check_failures']} failed,"
+				f" {stats['health_checks_busy']} busy)"
+			)
+		)
+		em.add_field(
+			name="Reconnections",
+			value=stats['reconnects']
+		)
+
+		for name, cache in self.db.cache_stats().items():
+			em.add_field(
+				name=f"Cache: {name}",
+				value=f"{cache['size']} entries, {cache['hits']} hits, {cache['misses']} misses"
+			)
+
+		# The statements taking the most database time.
+		statements = self.db.statements.summary()[:8]
+		if statements:
+			em.add_field(
+				name="Statements: calls, average, total",
+				value="\n".join(
+					f"`{st['name']}`: {st['calls']}, {st['average_ms']} ms, {st['total_ms']} ms"
+					for st in statements
+				),
+				inline=False
+			)
+
+		await ctx.send(embed=em)
+
+	@playlist_base.command(
+		name="queries",
+		help="Shows the database queries taking the most time",
+		hidden=True
+	)
+	@commands.is_owner()
+	@check_if_db_is_connected()
+	async def playlist_queries(
+		self,
+		ctx: commands.Context,
+		reset: bool = False
+	):
+		"""
+		Sends the queries taking the most database time since the cog was loaded, with
+		their latency percentiles and the number of calls slower than DB_MUSIC_SLOW_QUERY_MS.
+
+		Parameters:
+			reset: Whether to drop the stats after sending them.
+		"""
+
+		if self.backend == 'sqlite':
+			await ctx.send("The stats are only available with the PostgreSQL backend.")
+			return
+
+		queries = self.db.statements.summary()[:10]
+		if not queries:
+			await ctx.send("No query was run yet.")
+			return
+
+		em = discord.Embed(
+			title="Database queries",
+			description="By total time, in ms: total, p50 / p95 / p99, max",
+			colour=discord.Colour.blue()
+		)
+
+		for query in queries:
+			# Queries that weren't named are shown by their fingerprint.
+			name = query['name'] if len(query['name']) <= 60 else f"{query['name'][:57]}..."
+			em.add_field(
+				name=f"{name} ({query['calls']} calls, {query['slow']} slow)",
+				value=(
+					f"{query['total_ms']:.0f}, {query['p50_ms']:.1f} / {query['p95_ms']:.1f}"
+					f" / {query['p99_ms']:.1f}, {query['max_ms']:.1f}"
+				),
+				inline=False
+			)
+
+		if reset:
+			self.db.statements.reset()
+			em.set_footer(text="The stats were reset.")
+
+		await ctx.send(embed=em)
+
+
+def song_from_row(row: Dict[str, Any], max_duration: int) -> Union[Song, None]:
+	"""
+	Builds a song from its info saved in the database, if it can be played as is.
+
+	Parameters:
+		row: The song, as returned by `get_playlist_songs`.
+		max_duration: The maximum length of a song, in seconds.
+
+	Returns:
+		The song, None if its file or its duration is unknown, if its file was deleted
+		or if it's too long.
+	"""
+
+	filename = row.get('filename')
+	duration = row.get('duration')
+
+	if not filename or duration is None or duration > max_duration:
+		return None
+	if not os.path.exists(filename):
+		return None
+
+	return Song(
+		row['title'],
+		filename,
+		row['url'],
+		row['thumbnail'],
+		video_id=row.get('video_id'),
+		duration=duration
+	)
+
+
+def format_duration(seconds: int) -> str:
+	"""
+	Formats a duration for the playlists' list.
+
+	Parameters:
+		seconds: The duration, in seconds.
+
+	Returns:
+		The duration as H:MM:SS, or M:SS under an hour.
+	"""
+
+	minutes, seconds = divmod(int(seconds), 60)
+	hours, minutes = divmod(minutes, 60)
+
+	if hours:
+		return f"{hours}:{minutes:02}:{seconds:02}"
+	return f"{minutes}:{seconds:02}"
 
 
 async def validate_url(url: str) -> bool:
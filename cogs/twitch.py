@@ -24,9 +24,7 @@ FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
 DEALINGS IN THE SOFTWARE.
 """
 
-import aiofiles
 import aiohttp
-import json
 
 from os import getenv
 from typing import Dict, Tuple, List, Set
@@ -35,6 +33,8 @@ import discord
 from discord import Embed
 from discord.ext import commands
 
+from cogs.ext.statefile import StateFile
+
 
 class Twitch(commands.Cog):
 	"""Cog to check the status of twitch livestreamers.
@@ -47,7 +47,8 @@ class Twitch(commands.Cog):
 		self,
 		bot: commands.Bot,
 		endpoint: str,
-		client_id: str
+		client_id: str,
+		tw_file: str
 	):
 		# Bot attributes
 		self.bot     = bot
@@ -56,6 +57,11 @@ class Twitch(commands.Cog):
 		# Cog attributes
 		self.endpoint = endpoint
 		self.cid      = client_id
+		# The streamers checked for each user, saved in TW_FILE.
+		self.tw_ids   = StateFile(tw_file, bot.logger.name)
+
+	async def cog_unload(self):
+		await self.tw_ids.close()
 
 	def init_streamers(self, ids: Dict[str, List[str]]) -> Dict[str, Set[str]]:
 		"""
@@ -312,7 +318,6 @@ class Twitch(commands.Cog):
 		logger = self.logger
 		TW_STREAMERS = self.bot._tw_streamers
 		TW_PREV_STATUS = self.bot._tw_prev_status
-		TW_FILE = self.bot._tw_file
 
 		if 'TWITCH' not in self.bot.enabled_cogs:
 			em = discord.Embed(
@@ -375,12 +380,9 @@ class Twitch(commands.Cog):
 			if streamer not in TW_PREV_STATUS:
 				TW_PREV_STATUS[streamer] = False
 
-			# And finally, add it to the file.
+			# And finally, add it to the file: it's saved a few seconds later.
 			try:
-				async with aiofiles.open(TW_FILE, 'r') as file:
-					content = await file.read()
-
-				ids = json.loads(content) if content else dict()
+				ids = await self.tw_ids.load()
 
 				if uid in ids:
 					streamers = ids.get(uid)
@@ -388,9 +390,7 @@ class Twitch(commands.Cog):
 				else:
 					ids[uid] = [streamer]
 
-				dump = json.dumps(ids)
-				async with aiofiles.open(TW_FILE, 'w') as file:
-					await file.write(dump)
+				self.tw_ids.mark_dirty()
 
 			except Exception as error:
 				logger.error("Couldn't add streamer to TW_FILE.")
@@ -428,5 +428,6 @@ async def setup(bot):
 
 	api_endpoint = "https://api.twitch.tv/helix/streams?user_login="
 	client_id = getenv('TW_CLIENT_ID')
+	tw_file = getenv('TW_FILE')
 
-	await bot.add_cog(Twitch(bot, api_endpoint, client_id))
+	await bot.add_cog(Twitch(bot, api_endpoint, client_id, tw_file))
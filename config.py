@@ -273,47 +273,22 @@ async def set_database() -> bool:
         print(error)
         return False
 
-    create_playlists = """
-        CREATE TABLE playlists (
-            list_id  serial      PRIMARY KEY,
-            title    varchar(80) NOT NULL,
-            owner_id varchar(20) NOT NULL
-        );
-    """
-    create_songs = """
-        CREATE TABLE songs (
-            song_id   serial      PRIMARY KEY,
-            title     varchar(80) NOT NULL,
-            url       varchar(80) NOT NULL,
-            thumbnail varchar(80) NOT NULL
-        );
-    """
-    create_songs_in_lists = """
-        CREATE TABLE songs_in_lists (
-            song_id int NOT NULL,
-            list_id int NOT NULL,
-            FOREIGN KEY (song_id)
-                REFERENCES songs (song_id)
-                ON DELETE CASCADE,
-            FOREIGN KEY (list_id)
-                REFERENCES playlists (list_id)
-                ON DELETE CASCADE
-        );
-    """
+    # The tables are created by the migrations the bot applies when connecting,
+    # imported here since they need asyncpg.
+    from cogs.ext.db import DatabaseConnection
+    from cogs.ext.migrations import load_migrations
 
-    tables = ['playlists', 'songs', 'songs_in_lists']
-    queries = {
-        'playlists': create_playlists,
-        'songs': create_songs,
-        'songs_in_lists': create_songs_in_lists
-    }
+    db = DatabaseConnection('config')
+    db.db_name = database
 
     try:
-        for table in tables:
-            await conn.execute(queries.get(table))
-            print(f"{DONE} Create table {CYAN}{table}{ENDC}")
+        applied = await db.migrate(conn, load_migrations())
+        for version in applied:
+            print(f"{DONE} Apply migration {CYAN}{version}{ENDC}")
+        if not applied:
+            print(f"{OK} Database already up to date")
     except Exception as error:
-        print(f"{ERR} Create table {table}")
+        print(f"{ERR} Apply migrations")
         print(error)
         await conn.close()
         return False
@@ -182,6 +182,13 @@ async def load_cogs(bot: CroissantBot):
 	if bool(os.getenv('ENABLE_PLAYLISTS', False)):
 		await bot.load_extension("cogs.playlist")
 		bot.enabled_cogs.append('PLAYLIST')
+		# Open the pool's connections now rather than on the first command.
+		playlist = bot.get_cog('Playlist')
+		if not await playlist.connect_db():
+			bot.logger.warning(
+				f"Couldn't connect to the {PURPLE}playlist{ENDC} database,"
+				" retrying on the first command."
+			)
 
 	if bool(os.getenv('ENABLE_TW', False)):
 		await bot.load_extension("cogs.twitch")
@@ -0,0 +1,82 @@
+# test_cache.py
+
+from cogs.ext.cache import LRUCache, MISSING
+
+
+def test_get_missing():
+	cache = LRUCache(2)
+	assert cache.get('a') is MISSING
+	assert cache.get('a', None) is None
+	assert cache.misses == 2
+
+
+def test_none_is_cached():
+	cache = LRUCache(2)
+	cache.put('a', None)
+	assert cache.get('a') is None
+	assert cache.hits == 1
+
+
+def test_evicts_least_recently_used():
+	cache = LRUCache(2)
+	cache.put('a', 1)
+	cache.put('b', 2)
+	# 'a' is now more recent than 'b'.
+	assert cache.get('a') == 1
+	cache.put('c', 3)
+
+	assert 'b' not in cache
+	assert cache.get('a') == 1
+	assert cache.get('c') == 3
+	assert cache.evictions == 1
+
+
+def test_put_replaces():
+	cache = LRUCache(2)
+	cache.put('a', 1)
+	cache.put('a', 2)
+	assert len(cache) == 1
+	assert cache.get('a') == 2
+
+
+def test_pop():
+	cache = LRUCache(2)
+	cache.put('a', 1)
+	assert cache.pop('a') == 1
+	assert cache.pop('a') is MISSING
+	assert len(cache) == 0
+
+
+def test_disabled():
+	cache = LRUCache(0)
+	cache.put('a', 1)
+	assert cache.get('a') is MISSING
+
+
+def test_invalidated_while_read():
+	cache = LRUCache(2)
+	generation = cache.generation('a')
+	# Changed by another command while the value was read.
+	cache.pop('a')
+	cache.put('a', 'outdated', generation)
+	assert 'a' not in cache
+	assert cache.stale == 1
+
+	generation = cache.generation('a')
+	cache.put('a', 'current', generation)
+	assert cache.get('a') == 'current'
+
+
+def test_generation_survives_forgotten_invalidations():
+	cache = LRUCache(1)
+	generation = cache.generation('a')
+	cache.pop('a')
+	# Pushes 'a' out of the invalidations kept.
+	cache.pop('b')
+	cache.put('a', 'outdated', generation)
+	assert 'a' not in cache
+
+	generation = cache.generation('c')
+	cache.clear()
+	cache.put('c', 'outdated', generation)
+	assert 'c' not in cache
@@ -0,0 +1,107 @@
+# test_db.py
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("asyncpg")
+
+from cogs.ext import db as db_module  # noqa: E402
+from cogs.ext.db import DatabaseConnection  # noqa: E402
+
+
+class BusyPool():
+	async def acquire(self, timeout=None):
+		raise asyncio.TimeoutError
+
+
+def test_busy_pool_is_not_reconnected():
+	async def main():
+		db = DatabaseConnection('test_db')
+		db.pool = BusyPool()
+		reconnects = list()
+
+		async def reconnect():
+			reconnects.append(True)
+			return True
+
+		db.reconnect = reconnect
+
+		assert not await db.check_health()
+		assert reconnects == []
+		stats = db.pool_stats()
+		assert (stats['health_checks_busy'], stats['health_check_failures']) == (1, 0)
+
+	asyncio.run(main())
+
+
+class BulkConnection():
+	async def executemany(self, query, args, timeout=None):
+		self.rows = list(args)
+
+	async def copy_records_to_table(self, table, records, columns, timeout=None):
+		raise ValueError("COPY failed")
+
+
+def test_bulk_calls_are_timed():
+	async def main():
+		db = DatabaseConnection('test_db')
+		conn = BulkConnection()
+
+		await db.executemany("UPDATE songs SET title = $2 WHERE url = $1;", [
+			('a', 'A'), ('b', 'B')
+		], conn=conn, name='set_titles')
+		assert conn.rows == [('a', 'A'), ('b', 'B')]
+
+		with pytest.raises(ValueError):
+			await db.copy_records_to_table(
+				'staging', [(1, 'a')], ['ord', 'url'], conn=conn, name='copy'
+			)
+
+		stats = db.statements.stats
+		assert (stats['set_titles'].calls, stats['set_titles'].errors) == (1, 0)
+		assert (stats['copy'].calls, stats['copy'].errors) == (1, 1)
+		assert (db.stats.queries, db.stats.errors) == (2, 1)
+
+	asyncio.run(main())
+
+
+class ClosingPool():
+	def __init__(self, released: asyncio.Event):
+		self.released = released
+		self.closed = self.terminated = False
+
+	async def close(self):
+		await self.released.wait()
+		self.closed = True
+
+	def terminate(self):
+		self.terminated = True
+
+
+@pytest.mark.parametrize("release, terminated", [(True, False), (False, True)])
+def test_reconnect_lets_queries_finish(monkeypatch, release: bool, terminated: bool):
+	async def main():
+		db = DatabaseConnection('test_db')
+		released = asyncio.Event()
+		old_pool = db.pool = ClosingPool(released)
+		db.pool_args = {'database': 'test_db'}
+
+		async def create_pool(**kwargs):
+			return ClosingPool(asyncio.Event())
+
+		monkeypatch.setattr(db_module.asyncpg, 'create_pool', create_pool)
+		monkeypatch.setattr(db_module, 'CLOSE_TIMEOUT', 0.1)
+
+		reconnect = asyncio.ensure_future(db.reconnect())
+		await asyncio.sleep(0.05)
+		# Replaced right away, the old pool waits for its connections.
+		assert db.pool is not old_pool
+		assert not old_pool.terminated
+		if release:
+			released.set()
+
+		assert await reconnect
+		assert (old_pool.closed, old_pool.terminated) == (release, terminated)
+
+	asyncio.run(main())
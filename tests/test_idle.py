@@ -0,0 +1,63 @@
+# test_idle.py
+
+import pytest
+
+from cogs.ext.idle import TimerWheel
+
+
+SLOTS = 8
+
+
+@pytest.fixture
+def wheel() -> TimerWheel:
+	return TimerWheel(SLOTS)
+
+
+def advance_until_expired(wheel: TimerWheel, key, limit: int) -> int:
+	"""
+	Advances the wheel until key expires, returns the number of ticks it took.
+	"""
+	for tick in range(1, limit + 1):
+		if key in wheel.advance():
+			return tick
+	return -1
+
+
+@pytest.mark.parametrize("ticks", [1, SLOTS - 1, SLOTS, SLOTS + 1, 3 * SLOTS + 2])
+def test_expires_on_time(wheel, ticks: int):
+	wheel.schedule('key', ticks)
+	assert advance_until_expired(wheel, 'key', 4 * SLOTS) == ticks
+	assert not wheel.is_scheduled('key')
+	assert len(wheel) == 0
+
+
+def test_cancel(wheel):
+	wheel.schedule('key', 2)
+	assert wheel.cancel('key')
+	assert not wheel.cancel('key')
+	assert advance_until_expired(wheel, 'key', 2 * SLOTS) == -1
+
+
+def test_reschedule_replaces(wheel):
+	wheel.schedule('key', 2)
+	wheel.schedule('key', 5)
+	assert len(wheel) == 1
+	assert advance_until_expired(wheel, 'key', 2 * SLOTS) == 5
+
+
+def test_schedule_after_advancing(wheel):
+	for _ in range(SLOTS + 3):
+		wheel.advance()
+	wheel.schedule('a', SLOTS)
+	wheel.schedule('b', 1)
+	assert wheel.advance() == ['b']
+	assert advance_until_expired(wheel, 'a', 2 * SLOTS) == SLOTS - 1
+
+
+def test_clear(wheel):
+	for i in range(SLOTS * 2):
+		wheel.schedule(i, i)
+	wheel.clear()
+	assert len(wheel) == 0
+	for _ in range(SLOTS * 2):
+		assert wheel.advance() == []
@@ -0,0 +1,126 @@
+# test_journal.py
+
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip('aiofiles')
+
+from cogs.ext.journal import FavouritesJournal, FavouritesStore  # noqa: E402
+
+
+def song(n):
+	return {'title': f"Song {n}", 'url': f"https://youtu.be/{n}", 'thumbnail': 't'}
+
+
+def load(path, **kwargs):
+	async def scenario():
+		journal = FavouritesJournal(str(path), 'test_journal', **kwargs)
+		return await journal.load()
+	return asyncio.run(scenario())
+
+
+def test_changes_survive_a_restart(tmp_path):
+	path = tmp_path / 'favourites.json'
+
+	async def scenario():
+		journal = FavouritesJournal(str(path), 'test_journal')
+		assert await journal.load() == []
+		for n in range(3):
+			await journal.append({'op': 'add', 'song': song(n)})
+		removed = await journal.append({'op': 'remove', 'index': 1})
+		assert removed == song(1)
+		with pytest.raises(ValueError):
+			await journal.append({'op': 'remove', 'index': 2})
+
+	asyncio.run(scenario())
+
+	assert not path.exists()
+	assert load(path) == [song(0), song(2)]
+
+
+def test_compaction(tmp_path):
+	path = tmp_path / 'favourites.json'
+
+	async def scenario():
+		journal = FavouritesJournal(str(path), 'test_journal', compact_after=2)
+		await journal.load()
+		for n in range(3):
+			await journal.append({'op': 'add', 'song': song(n)})
+		return journal.journal_path
+
+	journal_path = asyncio.run(scenario())
+
+	assert json.loads(path.read_text()) == {'seq': 2, 'state': [song(0), song(1)]}
+	assert len(open(journal_path).readlines()) == 1
+	assert load(path) == [song(0), song(1), song(2)]
+
+
+def test_replay_skips_compacted_and_torn_changes(tmp_path):
+	path = tmp_path / 'favourites.json'
+	# A snapshot saved before the journal existed.
+	path.write_text(json.dumps([song(0)]))
+
+	async def scenario():
+		journal = FavouritesJournal(str(path), 'test_journal')
+		await journal.load()
+		await journal.append({'op': 'add', 'song': song(1)})
+		await journal.compact()
+		# As if the journal couldn't be emptied, then a crash during a write.
+		with open(journal.journal_path, 'w') as file:
+			file.write(json.dumps({'seq': 1, 'op': 'add', 'song': song(1)}))
+			file.write('\n{"seq": 2, "op": "a')
+
+		journal = FavouritesJournal(str(path), 'test_journal')
+		assert await journal.load() == [song(0), song(1)]
+		assert journal.torn
+		await journal.append({'op': 'add', 'song': song(2)})
+		return await FavouritesJournal(str(path), 'test_journal').load()
+
+	assert asyncio.run(scenario()) == [song(0), song(1), song(2)]
+
+
+def test_store_splits_the_shared_file(tmp_path):
+	path = tmp_path / 'favourites.json'
+	path.write_text(json.dumps({'seq': 1, 'state': {'1': [song(0)]}}))
+	with open(f"{path}.journal", 'w') as file:
+		file.write(json.dumps({'seq': 2, 'op': 'add', 'user': '2', 'song': song(1)}) + '\n')
+
+	async def scenario():
+		store = FavouritesStore(str(path), 'test_journal', maxsize=1)
+		first = await store.get('1')
+		assert first.state == [song(0)]
+		assert (await store.get('2')).state == [song(1)]
+		assert (await store.get('3')).state == []
+
+		# Evicted, but still used: the same list is returned.
+		assert '1' not in store.lists
+		assert await store.get('1') is first
+		await first.append({'op': 'add', 'song': song(2)})
+
+		return await FavouritesStore(str(path), 'test_journal').get('1')
+
+	assert asyncio.run(scenario()).state == [song(0), song(2)]
+	assert sorted(p.name for p in (tmp_path / 'favourites').iterdir()) == [
+		'1.json', '1.json.journal', '2.json'
+	]
+
+
+def test_remove_checks_the_song(tmp_path):
+	async def scenario():
+		journal = FavouritesJournal(str(tmp_path / 'favourites.json'), 'test_journal')
+		await journal.load()
+		for n in range(3):
+			await journal.append({'op': 'add', 'song': song(n)})
+
+		# Two removals of the first song, read before either ran.
+		first = {'op': 'remove', 'index': 0, 'url': song(0)['url']}
+		results = await asyncio.gather(
+			journal.append(dict(first)), journal.append(dict(first)), return_exceptions=True
+		)
+		assert results[0] == song(0)
+		assert isinstance(results[1], ValueError)
+		return journal.state
+
+	assert asyncio.run(scenario()) == [song(1), song(2)]
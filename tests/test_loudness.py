@@ -0,0 +1,131 @@
+# test_loudness.py
+
+import asyncio
+import json
+
+from concurrent.futures import Future
+
+import pytest
+
+from cogs.ext.loudness import (
+	LoudnessAnalyzer, MAX_GAIN, MIN_GAIN, PEAK_CEILING, compute_gain, parse_loudnorm_output,
+	sidecar_path
+)
+from cogs.ext.song import Song
+
+
+LOUDNORM_OUTPUT = """
+[Parsed_loudnorm_0 @ 0x55d1c2f0a2c0]
+{
+	"input_i" : "-9.87",
+	"input_tp" : "0.42",
+	"input_lra" : "5.60",
+	"input_thresh" : "-20.05",
+	"output_i" : "-23.72",
+	"output_tp" : "-2.00",
+	"output_lra" : "4.40",
+	"output_thresh" : "-33.79",
+	"normalization_type" : "dynamic",
+	"target_offset" : "-0.28"
+}
+"""
+
+
+def test_parse_loudnorm_output():
+	assert parse_loudnorm_output(LOUDNORM_OUTPUT) == pytest.approx((-9.87, 0.42))
+
+
+@pytest.mark.parametrize(
+	"output", [
+		"", "no json here", '{"input_i" : "-inf", "input_tp" : "-inf"}',
+		'{"input_i" : "-20.0"}', '{"other": 1}'
+	]
+)
+def test_parse_invalid_output(output: str):
+	assert parse_loudnorm_output(output) is None
+
+
+@pytest.mark.parametrize("loudness, target, peak, gain", [
+	(-10.0, -16.0, -1.0, -6.0),
+	(-20.0, -16.0, -10.0, 4.0),
+	(-70.0, -16.0, -60.0, MAX_GAIN),
+	(10.0, -16.0, 12.0, MIN_GAIN),
+	# Quiet, but raising it by 12 dB would clip its peaks.
+	(-28.0, -16.0, -3.0, PEAK_CEILING + 3.0),
+])
+def test_compute_gain(loudness: float, target: float, peak: float, gain: float):
+	assert compute_gain(loudness, target, peak) == pytest.approx(gain)
+
+
+def test_load_from_sidecar(tmp_path):
+	song_file = tmp_path / "song.webm"
+	song_file.touch()
+	song = Song("title", str(song_file), "url", "thumbnail")
+	analyzer = LoudnessAnalyzer("test", -16.0)
+
+	assert not analyzer.load(song)
+	assert song.gain is None
+
+	# Saved without the true peak, measured again.
+	with open(sidecar_path(song.file), 'w') as file:
+		json.dump({'loudness': -12.0}, file)
+	assert not analyzer.load(song)
+
+	with open(sidecar_path(song.file), 'w') as file:
+		json.dump({'loudness': -12.0, 'peak': -6.0}, file)
+
+	assert analyzer.load(song)
+	assert song.gain == pytest.approx(-4.0)
+
+
+def test_close_cancels_pending_measurements():
+	class Executor():
+		def __init__(self):
+			self.shutdown_args = None
+
+		def shutdown(self, **kwargs):
+			self.shutdown_args = kwargs
+
+	analyzer = LoudnessAnalyzer("test", -16.0)
+	executor = analyzer.executor = Executor()
+	pending = analyzer.pending['song.webm'] = Future()
+
+	analyzer.close()
+
+	assert pending.cancelled()
+	assert executor.shutdown_args == {'wait': False}
+	assert analyzer.executor is None
+
+
+def test_close_cancels_prepared_analyses(tmp_path):
+	song_file = tmp_path / "song.webm"
+	song_file.touch()
+	song = Song("title", str(song_file), "url", "thumbnail")
+
+	async def main():
+		analyzer = LoudnessAnalyzer("test", -16.0)
+		future = Future()
+
+		class Executor():
+			def submit(self, *args):
+				return future
+
+			def shutdown(self, **kwargs):
+				pass
+
+		analyzer.executor = Executor()
+		analyzer.prepare(song)
+		# Referenced until it finishes.
+		task, = analyzer.tasks
+		await asyncio.sleep(0)
+
+		analyzer.close()
+		# Once for the task to be cancelled, once for its done callback.
+		await asyncio.sleep(0)
+		await asyncio.sleep(0)
+
+		assert task.cancelled()
+		assert future.cancelled()
+		assert not analyzer.tasks and not analyzer.pending
+
+	asyncio.run(main())
@@ -0,0 +1,33 @@
+# test_migrations.py
+
+import pytest
+
+from cogs.ext.migrations import load_migrations
+
+
+def test_bundled_migrations():
+	migrations = load_migrations()
+	versions = [migration.version for migration in migrations]
+	# The initial schema comes first.
+	assert versions[0] == 0
+	assert versions == sorted(versions)
+	assert len(set(versions)) == len(versions)
+	for migration in migrations:
+		assert migration.read().strip()
+
+
+def test_ignores_other_files(tmp_path):
+	(tmp_path / "0002_second.sql").write_text("SELECT 2;")
+	(tmp_path / "0001_first.sql").write_text("SELECT 1;")
+	(tmp_path / "README.md").write_text("")
+	(tmp_path / "3_bad_version.sql").write_text("")
+
+	migrations = load_migrations(str(tmp_path))
+	assert [(m.version, m.name) for m in migrations] == [(1, 'first'), (2, 'second')]
+
+
+def test_duplicate_versions(tmp_path):
+	(tmp_path / "0001_first.sql").write_text("")
+	(tmp_path / "0001_again.sql").write_text("")
+	with pytest.raises(ValueError):
+		load_migrations(str(tmp_path))
@@ -0,0 +1,168 @@
+# test_music_db.py
+
+import asyncio
+import os
+import uuid
+
+import pytest
+
+pytest.importorskip("asyncpg")
+
+from cogs.ext.music_db import MusicDatabaseConnection  # noqa: E402
+from cogs.ext.music_store import ConflictError  # noqa: E402
+from cogs.ext.song import Song  # noqa: E402
+
+
+# The tests using the database are skipped unless it's set, along with
+# TEST_DB_MUSIC_HOST, TEST_DB_MUSIC_PORT, TEST_DB_MUSIC_USER and TEST_DB_MUSIC_PASSWORD.
+# They create their own user and delete its playlists afterwards.
+DATABASE = os.getenv('TEST_DB_MUSIC_DATABASE')
+
+
+def run_with_db(scenario):
+	if not DATABASE:
+		pytest.skip("TEST_DB_MUSIC_DATABASE isn't set.")
+
+	async def main():
+		db = MusicDatabaseConnection('test_music_db')
+		await db.connect(
+			os.getenv('TEST_DB_MUSIC_HOST', 'localhost'),
+			os.getenv('TEST_DB_MUSIC_USER'),
+			os.getenv('TEST_DB_MUSIC_PASSWORD'),
+			DATABASE,
+			port=os.getenv('TEST_DB_MUSIC_PORT')
+		)
+		owner = f"test-{uuid.uuid4().hex[:12]}"
+		try:
+			return await scenario(db, owner)
+		finally:
+			for title in await db.get_playlists(owner) or list():
+				await db.delete_playlist(title, owner)
+			await db.close()
+
+	return asyncio.run(main())
+
+
+def song(owner: str, number: int) -> Song:
+	# Not on YouTube, the songs of each test are new.
+	return Song(
+		f"Song {number}", None, f"https://example.com/{owner}/{number}",
+		f"https://img/{number}"
+	)
+
+
+def test_miss_interleaved_with_a_write():
+	async def main():
+		db = MusicDatabaseConnection('test_music_db')
+		read, release = asyncio.Event(), asyncio.Event()
+		results = [None, 7]
+
+		async def run_prepared(method, name, *args):
+			# The first query runs before the playlist is created.
+			result = results.pop(0)
+			read.set()
+			await release.wait()
+			return result
+
+		db.run_prepared = run_prepared
+
+		lookup = asyncio.ensure_future(db.get_playlist_id('mix', '1'))
+		await read.wait()
+		# create_playlist invalidates the entry during the query.
+		db.invalidate_playlist('mix', '1')
+		release.set()
+		assert await lookup is None
+
+		assert await db.get_playlist_id('mix', '1') == 7
+		assert db.playlist_ids.stale == 1
+
+	asyncio.run(main())
+
+
+def test_changes_by_index_check_the_version():
+	async def scenario(db, owner):
+		await db.import_songs([song(owner, n) for n in range(1, 4)], 'mix', owner)
+		listed = await db.get_playlist_version('mix', owner)
+		assert await db.get_playlist_version('other', owner) is None
+
+		# Another command changes the playlist after it was listed.
+		await db.add_song_to_playlist(song(owner, 4), 'mix', owner)
+		assert await db.get_playlist_version('mix', owner) > listed
+
+		with pytest.raises(ConflictError):
+			await db.remove_song_from('mix', owner, 1, listed)
+		with pytest.raises(ConflictError):
+			await db.remove_songs_from('mix', owner, 1, 2, listed)
+		with pytest.raises(ConflictError):
+			await db.move_song('mix', owner, 1, 3, listed)
+		assert await db.get_titles_in_playlist('mix', owner) == [
+			'Song 1', 'Song 2', 'Song 3', 'Song 4'
+		]
+
+		current = await db.get_playlist_version('mix', owner)
+		assert await db.remove_songs_from('mix', owner, 1, 2, current) == 2
+		# The triggers run once per statement, whatever the number of songs.
+		assert await db.get_playlist_version('mix', owner) == current + 1
+		with pytest.raises(ConflictError):
+			await db.remove_song_from('mix', owner, 1, current)
+
+		await db.move_song('mix', owner, 2, 1, current + 1)
+		await db.remove_song_from('mix', owner, 2)
+		assert await db.get_titles_in_playlist('mix', owner) == ['Song 4']
+
+	run_with_db(scenario)
+
+
+def test_playlist_counters():
+	async def scenario(db, owner):
+		resolved = Song(
+			"Song 1", "music/1.webm", f"https://example.com/{owner}/1", "t", duration=60
+		)
+		await db.import_songs([resolved, song(owner, 2), song(owner, 3)], 'mix', owner)
+		await db.add_song_to_playlist(resolved, 'other', owner)
+
+		# Found by yt-dlp later, in every playlist of the song.
+		await db.set_song_metadata([
+			Song("Song 2", "music/2.webm", f"https://example.com/{owner}/2", "t", duration=30)
+		])
+		mix, other = await db.get_playlist_summaries(owner)
+		assert (mix['song_count'], mix['total_duration']) == (3, 90)
+		assert (other['song_count'], other['total_duration']) == (1, 60)
+
+		assert await db.remove_songs_from('mix', owner, 2, 3) == 2
+		mix, other = await db.get_playlist_summaries(owner)
+		assert (mix['song_count'], mix['total_duration']) == (1, 60)
+
+		# A deleted song, like the duplicates merged by a migration, removes its entries.
+		await db.execute("DELETE FROM songs WHERE url = $1;", resolved.url)
+		mix, other = await db.get_playlist_summaries(owner)
+		assert (mix['song_count'], mix['total_duration']) == (0, 0)
+		assert (other['song_count'], other['total_duration']) == (0, 0)
+
+	run_with_db(scenario)
+
+
+def test_import_waits_for_concurrent_adds():
+	async def scenario(db, owner):
+		# Another command saves one of the songs meanwhile, committed after the import
+		# tried to insert it.
+		async with db.acquire() as conn:
+			transaction = conn.transaction()
+			await transaction.start()
+			await conn.execute(
+				"INSERT INTO songs(title, url, thumbnail) VALUES ($1, $2, $3);",
+				"Song 2", song(owner, 2).url, "t"
+			)
+
+			songs = [song(owner, n) for n in range(1, 4)]
+			import_songs = asyncio.ensure_future(db.import_songs(songs, 'mix', owner))
+			await asyncio.sleep(0.5)
+			assert not import_songs.done()
+			await transaction.commit()
+
+		assert await import_songs == (3, True)
+		assert await db.get_titles_in_playlist('mix', owner) == [
+			'Song 1', 'Song 2', 'Song 3'
+		]
+
+	run_with_db(scenario)
@@ -0,0 +1,89 @@
+# test_refresher.py
+
+import asyncio
+
+import pytest
+
+from cogs.ext.refresher import MetadataRefresher, RateLimiter, SongUnavailableError
+from cogs.ext.song import Song
+
+
+class FakeStore():
+	def __init__(self, urls):
+		self.songs = {song_id: url for song_id, url in enumerate(urls, start=1)}
+		self.saved = list()
+		self.unavailable = list()
+
+	async def get_stale_songs(self, after_id, max_age, limit):
+		rows = [(song_id, url) for song_id, url in self.songs.items() if song_id > after_id]
+		return rows[:limit]
+
+	async def set_song_metadata(self, songs):
+		self.saved.append([song.url for song in songs])
+
+	async def mark_unavailable(self, urls):
+		self.unavailable.append(urls)
+
+
+async def resolve(url):
+	if url.endswith('gone'):
+		raise SongUnavailableError(url)
+	if url.endswith('timeout'):
+		raise TimeoutError
+	return Song(url, None, url, None)
+
+
+def test_run_once_walks_in_batches():
+	store = FakeStore(['a', 'gone', 'timeout', 'b', 'c'])
+	refresher = MetadataRefresher(
+		store, resolve, 'test_refresher', 3600, batch_size=3, rate=1e6
+	)
+
+	async def main():
+		assert not await refresher.run_once()
+		assert refresher.cursor == 3
+		assert await refresher.run_once()
+		assert refresher.cursor == 0
+
+	asyncio.run(main())
+
+	# One bulk update per batch.
+	assert store.saved == [['a'], ['b', 'c']]
+	assert store.unavailable == [['gone']]
+	assert refresher.counts == {'refreshed': 3, 'unavailable': 1, 'failed': 1}
+
+
+def test_rate_limiter_spaces_calls():
+	limiter = RateLimiter(20)
+
+	async def main():
+		loop = asyncio.get_event_loop()
+		start = loop.time()
+		for _ in range(3):
+			await limiter.wait()
+		return loop.time() - start
+
+	# The first call goes through right away.
+	assert asyncio.run(main()) >= 0.09
+
+
+def test_rate_limiter_rejects_zero():
+	with pytest.raises(ValueError):
+		RateLimiter(0)
+
+
+def test_start_and_stop():
+	store = FakeStore(['a'])
+	refresher = MetadataRefresher(store, resolve, 'test_refresher', 3600, rate=1e6)
+
+	async def main():
+		refresher.start()
+		task = refresher.task
+		refresher.start()
+		assert refresher.task is task
+		await asyncio.sleep(0.01)
+		refresher.stop()
+		assert refresher.task is None
+
+	asyncio.run(main())
+	assert store.saved == [['a']]
@@ -0,0 +1,48 @@
+# test_song.py
+
+import pytest
+
+from cogs.ext.song import canonical_url, video_id_from_url, youtube_id
+
+
+CANONICAL = "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+
+
+@pytest.mark.parametrize('url', [
+	"https://youtu.be/dQw4w9WgXcQ",
+	"youtu.be/dQw4w9WgXcQ?t=42",
+	"https://www.youtube.com/watch?v=dQw4w9WgXcQ&t=10",
+	"https://m.youtube.com/watch?feature=share&v=dQw4w9WgXcQ",
+	"https://music.youtube.com/watch?v=dQw4w9WgXcQ&list=RDAMVM",
+	"https://www.youtube.com/shorts/dQw4w9WgXcQ",
+	"https://www.youtube-nocookie.com/embed/dQw4w9WgXcQ",
+	CANONICAL
+])
+def test_links_to_the_same_video(url):
+	assert video_id_from_url(url) == 'dQw4w9WgXcQ'
+	assert canonical_url(url) == CANONICAL
+
+
+@pytest.mark.parametrize('url', [
+	"https://soundcloud.com/artist/song",
+	"https://www.youtube.com/watch?v=short",
+	"https://www.youtube.com/playlist?list=PL123",
+	"never gonna give you up"
+])
+def test_other_urls_are_kept(url):
+	assert video_id_from_url(url) is None
+	assert canonical_url(url) == url
+
+
+def test_id_from_yt_dlp():
+	url = "https://www.youtube.com/attribution_link?u=/watch"
+	assert canonical_url(url, 'dQw4w9WgXcQ') == CANONICAL
+	# Only for YouTube links.
+	assert canonical_url("https://example.com/x", 'dQw4w9WgXcQ') == "https://example.com/x"
+
+
+def test_only_youtube_songs_have_an_id():
+	assert youtube_id("https://youtu.be/dQw4w9WgXcQ?t=3") == 'dQw4w9WgXcQ'
+	url = "https://www.youtube.com/attribution_link"
+	assert youtube_id(url, 'dQw4w9WgXcQ') == 'dQw4w9WgXcQ'
+	assert youtube_id("https://a.example.com/files/track.mp3", 'track') is None
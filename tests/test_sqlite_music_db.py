@@ -0,0 +1,386 @@
+# test_sqlite_music_db.py
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("aiosqlite")
+
+from cogs.ext.music_store import ConflictError, DbInsertError, NotFoundError  # noqa: E402
+from cogs.ext.song import Song  # noqa: E402
+from cogs.ext.sqlite_music_db import (  # noqa: E402
+	SQLiteMusicConnection, fts_query, position_between
+)
+
+
+OWNER = '1234'
+
+
+def song(number: int) -> Song:
+	return Song(
+		f"Song {number}", None, f"https://youtu.be/{number}", f"https://img/{number}"
+	)
+
+
+def run_with_store(path, scenario):
+	async def main():
+		store = SQLiteMusicConnection('test_sqlite_music_db')
+		await store.connect(str(path))
+		try:
+			return await scenario(store)
+		finally:
+			await store.close()
+
+	return asyncio.run(main())
+
+
+def test_add_and_list(tmp_path):
+	async def scenario(store):
+		assert await store.add_song_to_playlist(song(1), 'mix', OWNER) == (True, True)
+		assert await store.add_song_to_playlist(song(2), 'mix', OWNER) == (True, False)
+		assert await store.add_song_to_playlist(song(1), 'mix', OWNER) == (False, False)
+
+		assert await store.get_playlists(OWNER) == ['mix']
+		assert await store.get_titles_in_playlist('mix', OWNER) == ['Song 1', 'Song 2']
+		assert await store.get_song_from(2, 'mix', OWNER) == 'https://youtu.be/2'
+		assert await store.get_song_from(3, 'mix', OWNER) is None
+		assert await store.get_songs_in_playlist('other', OWNER) is None
+
+	run_with_store(tmp_path / 'music.db', scenario)
+
+
+def test_playlists(tmp_path):
+	async def scenario(store):
+		await store.create_playlist('mix', OWNER)
+		with pytest.raises(DbInsertError):
+			await store.create_playlist('mix', OWNER)
+		assert await store.playlist_exists('mix', OWNER)
+		assert not await store.playlist_exists('mix', '5678')
+
+		await store.delete_playlist('mix', OWNER)
+		assert await store.get_playlists(OWNER) is None
+		with pytest.raises(DbInsertError):
+			await store.delete_playlist('mix', OWNER)
+
+	run_with_store(tmp_path / 'music.db', scenario)
+
+
+def test_remove_only_from_one_playlist(tmp_path):
+	async def scenario(store):
+		await store.import_songs([song(1), song(2), song(3)], 'mix', OWNER)
+		await store.add_song_to_playlist(song(2), 'other', OWNER)
+
+		await store.remove_song_from('mix', OWNER, 2)
+		assert await store.get_titles_in_playlist('mix', OWNER) == ['Song 1', 'Song 3']
+		assert await store.get_titles_in_playlist('other', OWNER) == ['Song 2']
+
+		with pytest.raises(NotFoundError):
+			await store.remove_song_from('mix', OWNER, 3)
+
+		assert await store.remove_songs_from('mix', OWNER, 1, 10) == 2
+		assert await store.get_titles_in_playlist('mix', OWNER) is None
+
+	run_with_store(tmp_path / 'music.db', scenario)
+
+
+def test_import_and_export(tmp_path):
+	async def scenario(store):
+		added, created = await store.import_songs(
+			[song(1), song(2), song(1), song(3)], 'mix', OWNER
+		)
+		assert (added, created) == (3, True)
+
+		exported = await store.export_playlist('mix', OWNER)
+		assert [entry['url'] for entry in exported] == [
+			'https://youtu.be/1', 'https://youtu.be/2', 'https://youtu.be/3'
+		]
+		assert exported[0] == {
+			'title': 'Song 1', 'url': 'https://youtu.be/1', 'thumbnail': 'https://img/1'
+		}
+
+	run_with_store(tmp_path / 'music.db', scenario)
+
+
+def test_move(tmp_path):
+	async def scenario(store):
+		await store.import_songs([song(n) for n in range(1, 5)], 'mix', OWNER)
+
+		await store.move_song('mix', OWNER, 4, 1)
+		await store.move_song('mix', OWNER, 2, 10)
+		titles = await store.get_titles_in_playlist('mix', OWNER)
+		assert titles == ['Song 4', 'Song 2', 'Song 3', 'Song 1']
+
+		# Moving back and forth eventually renumbers the playlist.
+		for _ in range(12):
+			await store.move_song('mix', OWNER, 4, 2)
+		assert len(await store.get_titles_in_playlist('mix', OWNER)) == 4
+
+		with pytest.raises(NotFoundError):
+			await store.move_song('mix', OWNER, 5, 1)
+
+	run_with_store(tmp_path / 'music.db', scenario)
+
+
+def test_position_between():
+	assert position_between([], 1) == 1024
+	assert position_between([1024, 2048], 1) == 512
+	assert position_between([1024, 2048], 2) == 1536
+	assert position_between([1024, 2048], 9) == 3072
+	assert position_between([1024, 1025], 2) is None
+
+
+def test_reopen_keeps_data(tmp_path):
+	path = tmp_path / 'music.db'
+
+	async def add(store):
+		await store.add_song_to_playlist(song(1), 'mix', OWNER)
+
+	async def read(store):
+		assert await store.get_titles_in_playlist('mix', OWNER) == ['Song 1']
+		return await store.migrate(store.conn, store.migrations)
+
+	run_with_store(path, add)
+	assert run_with_store(path, read) == []
+
+
+def test_fts_query():
+	assert fts_query('daft  punk!') == '"daft"* "punk"*'
+	assert fts_query('"OR" -') == '"OR"*'
+	assert fts_query('?!') is None
+
+
+def test_find_songs(tmp_path):
+	async def scenario(store):
+		songs = [
+			Song("Daft Punk - Around the World", None, "https://youtu.be/a", "t"),
+			Song("Daft Punk - One More Time", None, "https://youtu.be/b", "t"),
+			Song("Justice - D.A.N.C.E.", None, "https://youtu.be/c", "t")
+		]
+		await store.import_songs(songs, 'mix', OWNER)
+		await store.import_songs(songs[1:], 'other', '5678')
+
+		matches = await store.find_songs(OWNER, 'one more')
+		assert [(m['playlist'], m['index'], m['url']) for m in matches] == [
+			('mix', 2, 'https://youtu.be/b')
+		]
+
+		matches = await store.find_songs(OWNER, 'daft', playlist_title='mix')
+		assert {m['index'] for m in matches} == {1, 2}
+		assert await store.find_songs(OWNER, 'daft', playlist_title='other') == []
+		assert await store.find_songs(OWNER, '...') == []
+
+		# Renamed titles are indexed again.
+		await store.conn.execute(
+			"UPDATE songs SET title = 'Aerodynamic' WHERE url = 'https://youtu.be/a';"
+		)
+		assert [m['url'] for m in await store.find_songs(OWNER, 'aero')] == [
+			'https://youtu.be/a'
+		]
+
+	run_with_store(tmp_path / 'music.db', scenario)
+
+
+def test_song_metadata(tmp_path):
+	async def scenario(store):
+		resolved = Song(
+			"Song 1", "music/1.webm", "https://youtu.be/dQw4w9WgXcQ", "t",
+			video_id='dQw4w9WgXcQ', duration=60
+		)
+		await store.import_songs([resolved, song(2)], 'mix', OWNER)
+
+		first, second = await store.get_playlist_songs('mix', OWNER)
+		assert first['filename'] == 'music/1.webm'
+		assert (first['duration'], first['video_id']) == (60, 'dQw4w9WgXcQ')
+		assert 0 <= first['age'] < 60
+		assert second['filename'] is None and second['age'] is None
+
+		await store.set_song_metadata([
+			Song("Song 2", "music/2.webm", "https://youtu.be/2", "t", video_id='2', duration=30)
+		])
+		[second] = await store.get_playlist_songs('mix', OWNER, 2)
+		assert (second['filename'], second['duration']) == ('music/2.webm', 30)
+		assert second['age'] is not None
+
+		assert await store.get_playlist_songs('mix', OWNER, 3) is None
+		assert await store.get_playlist_songs('mix', OWNER, 0) is None
+
+	run_with_store(tmp_path / 'music.db', scenario)
+
+
+def test_stale_and_unavailable_songs(tmp_path):
+	async def scenario(store):
+		resolved = Song(
+			"Song 1", "music/1.webm", "https://youtu.be/1", "t", video_id='1', duration=60
+		)
+		await store.import_songs([resolved, song(2), song(3)], 'mix', OWNER)
+
+		stale = await store.get_stale_songs(0, 3600, 10)
+		assert [url for _, url in stale] == ['https://youtu.be/2', 'https://youtu.be/3']
+		first_id = stale[0][0]
+		assert await store.get_stale_songs(first_id, 3600, 10) == stale[1:]
+		assert len(await store.get_stale_songs(0, -1, 10)) == 3
+
+		await store.mark_unavailable(['https://youtu.be/3'])
+		*_, third = await store.get_playlist_songs('mix', OWNER)
+		assert not third['available']
+		assert len(await store.get_stale_songs(0, 3600, 10)) == 1
+
+		# Found again, with a new title.
+		await store.set_song_metadata([
+			Song("Song 3 (live)", "music/3.webm", "https://youtu.be/3", None, duration=5)
+		])
+		*_, third = await store.get_playlist_songs('mix', OWNER)
+		assert third['available']
+		assert (third['title'], third['thumbnail']) == ("Song 3 (live)", "https://img/3")
+
+	run_with_store(tmp_path / 'music.db', scenario)
+
+
+def test_changes_by_index_check_the_version(tmp_path):
+	async def scenario(store):
+		await store.import_songs([song(1), song(2), song(3)], 'mix', OWNER)
+		listed = await store.get_playlist_version('mix', OWNER)
+		assert await store.get_playlist_version('other', OWNER) is None
+
+		# Another command changes the playlist after it was listed.
+		await store.add_song_to_playlist(song(4), 'mix', OWNER)
+		assert await store.get_playlist_version('mix', OWNER) > listed
+
+		with pytest.raises(ConflictError):
+			await store.remove_song_from('mix', OWNER, 1, listed)
+		with pytest.raises(ConflictError):
+			await store.remove_songs_from('mix', OWNER, 1, 2, listed)
+		with pytest.raises(ConflictError):
+			await store.move_song('mix', OWNER, 1, 3, listed)
+		assert await store.get_titles_in_playlist('mix', OWNER) == [
+			'Song 1', 'Song 2', 'Song 3', 'Song 4'
+		]
+
+		current = await store.get_playlist_version('mix', OWNER)
+		assert await store.remove_songs_from('mix', OWNER, 1, 2, current) == 2
+		# SQLite only has row triggers: once per song removed.
+		assert await store.get_playlist_version('mix', OWNER) == current + 2
+		with pytest.raises(ConflictError):
+			await store.remove_song_from('mix', OWNER, 1, current)
+
+		await store.move_song('mix', OWNER, 2, 1, current + 2)
+		assert await store.get_titles_in_playlist('mix', OWNER) == ['Song 4', 'Song 3']
+
+	run_with_store(tmp_path / 'music.db', scenario)
+
+
+def test_links_to_the_same_video_are_one_song(tmp_path):
+	async def scenario(store):
+		short = Song("Video", None, "https://youtu.be/dQw4w9WgXcQ", "t")
+		long = Song("Video", None, "https://www.youtube.com/watch?v=dQw4w9WgXcQ&t=9", "t")
+
+		assert await store.add_song_to_playlist(short, 'mix', OWNER) == (True, True)
+		assert await store.add_song_to_playlist(long, 'mix', OWNER) == (False, False)
+		assert await store.add_song_to_playlist(long, 'other', OWNER) == (True, True)
+
+		assert await store.get_songs_in_playlist('other', OWNER) == [
+			'https://www.youtube.com/watch?v=dQw4w9WgXcQ'
+		]
+		rows = await store.conn.execute_fetchall("SELECT video_id FROM songs;")
+		assert [row[0] for row in rows] == ['dQw4w9WgXcQ']
+
+	run_with_store(tmp_path / 'music.db', scenario)
+
+
+def test_ids_of_other_sites_are_not_unique(tmp_path):
+	async def scenario(store):
+		# yt-dlp's generic extractor uses the name of the file as ID.
+		first = Song("A", None, "https://a.example.com/files/track.mp3", "t", video_id='track')
+		second = Song("B", None, "https://b.example.org/music/track.mp3", "t", video_id='track')
+
+		assert await store.add_song_to_playlist(first, 'mix', OWNER) == (True, True)
+		assert await store.add_song_to_playlist(second, 'mix', OWNER) == (True, False)
+		await store.set_song_metadata([second])
+
+		assert await store.get_titles_in_playlist('mix', OWNER) == ['A', 'B']
+		rows = await store.conn.execute_fetchall("SELECT video_id FROM songs;")
+		assert [row[0] for row in rows] == [None, None]
+
+	run_with_store(tmp_path / 'music.db', scenario)
+
+
+def test_migration_merges_links_to_the_same_video(tmp_path):
+	path = tmp_path / 'music.db'
+
+	async def main():
+		store = SQLiteMusicConnection('test_sqlite_music_db')
+		before = [m for m in store.migrations if m.name != 'song_video_ids']
+		store.migrations = before
+		await store.connect(str(path))
+		await store.conn.executescript("""
+			INSERT INTO playlists(list_id, title, owner_id) VALUES (1, 'a', '1'), (2, 'b', '1');
+			INSERT INTO songs(song_id, title, url, thumbnail, video_id) VALUES
+				(1, 'Video', 'https://youtu.be/dQw4w9WgXcQ', 't', NULL),
+				(2, 'Video', 'https://www.youtube.com/watch?v=dQw4w9WgXcQ&t=1', 't', NULL),
+				(3, 'Other', 'https://a.example.com/track.mp3', 't', 'track'),
+				(4, 'Another', 'https://b.example.org/track.mp3', 't', 'track');
+			INSERT INTO songs_in_lists(list_id, song_id, position) VALUES
+				(1, 1, 1024), (1, 2, 2048), (1, 3, 3072), (2, 2, 1024), (2, 4, 2048);
+		""")
+		await store.close()
+
+		store = SQLiteMusicConnection('test_sqlite_music_db')
+		await store.connect(str(path))
+		try:
+			assert await store.get_songs_in_playlist('a', '1') == [
+				'https://www.youtube.com/watch?v=dQw4w9WgXcQ', 'https://a.example.com/track.mp3'
+			]
+			assert await store.get_songs_in_playlist('b', '1') == [
+				'https://www.youtube.com/watch?v=dQw4w9WgXcQ', 'https://b.example.org/track.mp3'
+			]
+			rows = await store.conn.execute_fetchall(
+				"SELECT song_id, video_id FROM songs ORDER BY song_id;"
+			)
+			assert [tuple(row) for row in rows] == [(1, 'dQw4w9WgXcQ'), (3, None), (4, None)]
+		finally:
+			await store.close()
+
+	asyncio.run(main())
+
+
+def test_playlist_counters(tmp_path):
+	async def scenario(store):
+		resolved = Song(
+			"Song 1", "music/1.webm", "https://youtu.be/1", "t", video_id='1', duration=60
+		)
+		await store.import_songs([resolved, song(2)], 'mix', OWNER)
+		await store.add_song_to_playlist(resolved, 'other', OWNER)
+		await store.create_playlist('empty', OWNER)
+
+		assert await store.get_playlist_summaries(OWNER) == [
+			{'title': 'mix', 'song_count': 2, 'total_duration': 60},
+			{'title': 'other', 'song_count': 1, 'total_duration': 60},
+			{'title': 'empty', 'song_count': 0, 'total_duration': 0}
+		]
+		assert await store.get_playlist_summaries('5678') is None
+
+		# Found by yt-dlp later, in every playlist of the song.
+		await store.set_song_metadata([
+			Song("Song 2", "music/2.webm", "https://youtu.be/2", "t", duration=30),
+			Song("Song 1", "music/1.webm", "https://youtu.be/1", "t", duration=50)
+		])
+		await store.move_song('mix', OWNER, 2, 1)
+		await store.remove_song_from('other', OWNER, 1)
+
+		mix, other, _ = await store.get_playlist_summaries(OWNER)
+		assert (mix['song_count'], mix['total_duration']) == (2, 80)
+		assert (other['song_count'], other['total_duration']) == (0, 0)
+
+		await store.import_songs([song(3), song(1), song(2)], 'other', OWNER)
+		assert await store.remove_songs_from('other', OWNER, 2, 3) == 2
+		mix, other, _ = await store.get_playlist_summaries(OWNER)
+		assert (other['song_count'], other['total_duration']) == (1, 0)
+
+		# A deleted song, like the duplicates merged by a migration, removes its entries.
+		await store.add_song_to_playlist(resolved, 'other', OWNER)
+		await store.conn.execute("DELETE FROM songs WHERE url = ?;", (resolved.url,))
+		mix, other, _ = await store.get_playlist_summaries(OWNER)
+		assert (mix['song_count'], mix['total_duration']) == (1, 30)
+		assert (other['song_count'], other['total_duration']) == (1, 0)
+
+	run_with_store(tmp_path / 'music.db', scenario)
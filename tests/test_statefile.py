@@ -0,0 +1,65 @@
+# test_statefile.py
+
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip('aiofiles')
+
+from cogs.ext.statefile import StateFile, flush_all  # noqa: E402
+
+
+def test_changes_are_coalesced(tmp_path):
+	path = tmp_path / 'kill_count.json'
+
+	async def scenario():
+		state_file = StateFile(str(path), 'test_statefile', delay=0.05)
+		counts = await state_file.load()
+		assert counts == {}
+		for n in range(10):
+			counts[str(n)] = n
+			state_file.mark_dirty()
+		assert not path.exists()
+
+		await asyncio.sleep(0.1)
+		return state_file
+
+	state_file = asyncio.run(scenario())
+
+	assert state_file.writes == 1
+	assert not state_file.dirty
+	assert json.loads(path.read_text()) == {str(n): n for n in range(10)}
+	assert [p.name for p in tmp_path.iterdir()] == ['kill_count.json']
+
+
+def test_flush_all(tmp_path):
+	path = tmp_path / 'streamers.json'
+	path.write_text(json.dumps({'1': ['a']}))
+
+	async def scenario():
+		state_file = StateFile(str(path), 'test_statefile', delay=60)
+		ids = await state_file.load()
+		ids['1'].append('b')
+		state_file.mark_dirty()
+		assert await flush_all()
+		assert state_file.timer is None
+		return state_file
+
+	state_file = asyncio.run(scenario())
+
+	assert state_file.writes == 1
+	assert json.loads(path.read_text()) == {'1': ['a', 'b']}
+
+
+def test_failed_write_stays_dirty(tmp_path):
+	path = tmp_path / 'missing' / 'kill_count.json'
+
+	async def scenario():
+		state_file = StateFile(str(path), 'test_statefile')
+		(await state_file.load())['1'] = 1
+		state_file.mark_dirty()
+		assert not await state_file.close()
+		return state_file
+
+	assert asyncio.run(scenario()).dirty
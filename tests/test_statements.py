@@ -0,0 +1,110 @@
+# test_statements.py
+
+import asyncio
+
+import pytest
+
+from cogs.ext.statements import StatementRegistry, fingerprint
+
+
+class FakeConnection():
+	"""
+	Counts the statements prepared, like asyncpg.Connection._prepare would with its
+	statement cache.
+	"""
+
+	def __init__(self, pid: int):
+		self.pid = pid
+		self.prepared = list()
+		self.cache = dict()
+
+	async def _prepare(self, query: str, use_cache: bool = False):
+		if use_cache and query in self.cache:
+			return self.cache[query]
+		self.prepared.append(query)
+		statement = self.cache[query] = (self, query)
+		return statement
+
+
+class Proxy():
+	"""
+	Forwards to a connection, like the proxies of an asyncpg pool.
+	"""
+
+	def __init__(self, conn: FakeConnection):
+		self._con = conn
+
+	def __getattr__(self, attr: str):
+		return getattr(self._con, attr)
+
+
+@pytest.fixture
+def registry() -> StatementRegistry:
+	registry = StatementRegistry()
+	registry.register('one', "SELECT 1;")
+	registry.register('two', "SELECT 2;")
+	return registry
+
+
+def test_prepared_once_per_connection(registry):
+	conn = FakeConnection(1)
+	asyncio.run(registry.prepare_all(conn))
+	assert len(conn.prepared) == 2
+
+	# Through any proxy of the pool.
+	statement = asyncio.run(registry.get(Proxy(conn), 'one'))
+	assert statement == (conn, "SELECT 1;")
+	assert len(conn.prepared) == 2
+
+	# A reconnection can reuse the server process ID, not the statements.
+	other = FakeConnection(1)
+	assert asyncio.run(registry.get(other, 'one')) == (other, "SELECT 1;")
+	assert len(other.prepared) == 1
+
+
+def test_register_new_query(registry):
+	conn = FakeConnection(1)
+	asyncio.run(registry.prepare_all(conn))
+	registry.register('one', "SELECT 'one';")
+	assert asyncio.run(registry.get(conn, 'one')) == (conn, "SELECT 'one';")
+
+
+def test_unknown_statement(registry):
+	with pytest.raises(KeyError):
+		asyncio.run(registry.get(FakeConnection(1), 'three'))
+
+
+def test_summary(registry):
+	registry.record('one', 0.001)
+	registry.record('two', 0.010)
+	registry.record('two', 0.020, error=True)
+
+	summary = registry.summary()
+	assert [stats['name'] for stats in summary] == ['two', 'one']
+	assert summary[0]['calls'] == 2
+	assert summary[0]['errors'] == 1
+	assert summary[0]['max_ms'] == 20.0
+	assert summary[0]['p50_ms'] <= summary[0]['p95_ms'] <= summary[0]['max_ms']
+
+
+def test_unregistered_queries_and_reset(registry):
+	registry.record('SELECT ?;', 0.5, slow=True)
+	assert registry.summary()[0]['name'] == 'SELECT ?;'
+	assert registry.summary()[0]['slow'] == 1
+
+	registry.reset()
+	assert registry.summary() == []
+	assert set(registry.stats) == {'one', 'two'}
+
+
+def test_fingerprint():
+	query = """
+		SELECT title FROM songs
+		WHERE url = 'https://youtu.be/1' AND duration > 600
+			AND song_id = $1::int4 LIMIT 10;
+	"""
+	assert fingerprint(query) == (
+		"SELECT title FROM songs WHERE url = ? AND duration > ?"
+		" AND song_id = $1::int4 LIMIT ?;"
+	)
+	assert fingerprint("SELECT 'it''s';") == "SELECT ?;"
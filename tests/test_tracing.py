@@ -0,0 +1,101 @@
+# test_tracing.py
+
+import logging
+
+import pytest
+
+from cogs.ext.tracing import LatencyHistogram, Trace, Tracer
+
+
+def test_histogram_empty():
+	histogram = LatencyHistogram()
+	assert histogram.percentile(0.5) == 0.0
+	assert histogram.summary()['count'] == 0
+
+
+def test_histogram_percentiles():
+	histogram = LatencyHistogram(bounds=[0.01, 0.1, 1.0])
+	for _ in range(90):
+		histogram.record(0.005)
+	for _ in range(9):
+		histogram.record(0.05)
+	histogram.record(0.5)
+
+	assert histogram.percentile(0.50) == 0.01
+	assert histogram.percentile(0.95) == 0.1
+	# Capped at the highest latency recorded.
+	assert histogram.percentile(0.99) == 0.1
+	assert histogram.percentile(1.0) == 0.5
+	assert histogram.count == 100
+
+
+def test_histogram_overflow():
+	histogram = LatencyHistogram(bounds=[0.01])
+	histogram.record(3.0)
+	assert histogram.percentile(0.5) == 3.0
+
+
+def test_histogram_bounds_are_inclusive():
+	histogram = LatencyHistogram(bounds=[0.01, 0.1])
+	histogram.record(0.01)
+	assert histogram.counts == [1, 0, 0]
+
+
+def test_trace_records_once(caplog):
+	tracer = Tracer('test_tracing')
+	trace = tracer.start('play', guild=1)
+
+	with trace.span('download'):
+		pass
+	trace.mark('first_frame')
+	trace.mark('first_frame')
+
+	with caplog.at_level(logging.DEBUG, logger='test_tracing'):
+		trace.finish()
+		trace.finish('error')
+
+	assert trace.status == 'ok'
+	assert len(caplog.records) == 1
+	assert '"guild": 1' in caplog.records[0].getMessage()
+
+	summary = tracer.summary('play')
+	assert set(summary) == {'total', 'download', 'first_frame'}
+	assert all(stats['count'] == 1 for stats in summary.values())
+
+
+def test_total_by_status():
+	tracer = Tracer('test_tracing')
+	tracer.start('play').finish()
+	with tracer.start('play').span('validate_url'):
+		pass
+	tracer.start('play').finish('error')
+
+	summary = tracer.summary('play')
+	# The unfinished trace isn't recorded, the failed one is kept apart.
+	assert set(summary) == {'total', 'total_error'}
+	assert summary['total']['count'] == summary['total_error']['count'] == 1
+
+
+def test_spans_add_up():
+	trace = Trace('play')
+	with trace.span('search'):
+		pass
+	first = trace.spans['search']
+	with trace.span('search'):
+		pass
+	assert trace.spans['search'] >= first
+
+
+def test_span_records_on_exception():
+	trace = Trace('play')
+	with pytest.raises(ValueError):
+		with trace.span('metadata'):
+			raise ValueError
+	assert 'metadata' in trace.spans
+
+
+def test_reset():
+	tracer = Tracer('test_tracing')
+	tracer.start('play').finish()
+	tracer.reset()
+	assert tracer.summary('play') == {}
@@ -0,0 +1,74 @@
+# test_volume.py
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from cogs.ext.volume import CHANNELS, SAMPLES_PER_FRAME, VolumeScaler  # noqa: E402
+
+
+def make_frame(value: int) -> bytes:
+	"""
+	A 20 ms frame where every sample is value.
+	"""
+	return np.full(SAMPLES_PER_FRAME * CHANNELS, value, dtype=np.int16).tobytes()
+
+
+def samples(frame: bytes) -> np.ndarray:
+	return np.frombuffer(frame, dtype=np.int16)
+
+
+def test_unity_volume_is_passthrough():
+	scaler = VolumeScaler(1.0)
+	frame = make_frame(1000)
+	assert scaler.scale(frame) is frame
+
+
+@pytest.mark.parametrize("volume", [0.0, 0.25, 0.5, 1.5])
+def test_steady_volume(volume: float):
+	scaler = VolumeScaler(volume)
+	scaled = samples(scaler.scale(make_frame(1000)))
+	assert np.all(scaled == int(1000 * volume))
+
+
+def test_clipping():
+	scaler = VolumeScaler(2.0)
+	assert np.all(samples(scaler.scale(make_frame(30000))) == 32767)
+	assert np.all(samples(scaler.scale(make_frame(-30000))) == -32768)
+
+
+def test_ramp_is_smooth():
+	scaler = VolumeScaler(1.0)
+	scaler.volume = 0.0
+	ramp = samples(scaler.scale(make_frame(10000))).reshape(-1, CHANNELS)
+	# Both channels get the same gain, decreasing over the frame until it reaches 0.
+	assert np.all(ramp[:, 0] == ramp[:, 1])
+	assert np.all(np.diff(ramp[:, 0].astype(int)) <= 0)
+	assert ramp[0, 0] > 9900
+	assert ramp[-1, 0] == 0
+	# The following frames are at the new volume.
+	assert np.all(samples(scaler.scale(make_frame(10000))) == 0)
+
+
+def test_volume_is_clamped():
+	scaler = VolumeScaler()
+	scaler.volume = -1.0
+	assert scaler.volume == 0.0
+	scaler.volume = 10.0
+	assert scaler.volume == 2.0
+
+
+def test_source_volume_isnt_limited_by_starting_volume():
+	music = pytest.importorskip("cogs.music")
+	from cogs.ext.song import Song
+
+	class Frames(music.discord.AudioSource):
+		def read(self):
+			return make_frame(1000)
+
+	# FFmpeg already played the frames at 10%.
+	song = Song('title', 'file', 'url', 'thumbnail')
+	source = music.YTDLSource(Frames(), song=song, volume=0.1)
+	source.volume = 1.0
+	source.read()
+	assert np.all(samples(source.read()) == 10000)